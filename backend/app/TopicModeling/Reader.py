@@ -1,12 +1,18 @@
 import base64
 import os
 import pathlib
+import shutil
 import subprocess
+import tempfile
 import time
+from collections import deque
+from collections.abc import Iterator
 from concurrent.futures import (
-    ProcessPoolExecutor,
-    TimeoutError as FutureTimeoutError,
-    as_completed,
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ThreadPoolExecutor,
+    wait,
 )
 from multiprocessing import cpu_count
 
@@ -17,8 +23,107 @@ import unidecode
 from docx2txt import docx2txt
 from PIL import Image
 
+from app.TopicModeling.doc_converter import (
+    connect_converter_service,
+    converted_text_files,
+    get_converter_pool,
+    group_by_unique_stem,
+)
+from app.TopicModeling.document_session import PAGED_EXTENSIONS, DocumentSession
+from app.TopicModeling.extraction_cache import (
+    ExtractionCache,
+    file_digest,
+    get_extraction_cache,
+)
+from app.TopicModeling.image_preprocessing import (
+    BYTES_PER_PIXEL as PREPROCESS_BYTES_PER_PIXEL,
+    preprocess_for_ocr,
+)
+from app.TopicModeling.memo import digest, get_memo, memo_stats
+from app.TopicModeling.page_screen import (
+    PageOCRCache,
+    PageSignature,
+    is_blank,
+    pixmap_to_gray,
+)
+from app.TopicModeling.parallel_text import iter_page_texts_parallel
+from app.TopicModeling.progress import BatchProgress, order_by_cost
+from app.TopicModeling.supervised_pool import (
+    QuarantinedError,
+    SupervisedPool,
+    TaskTimeoutError,
+    WorkerCrashedError,
+)
+from app.TopicModeling.text_spool import ExtractedText, TextSpool, iter_text_file
+
+# Bump when a change to the extraction changes its output, to invalidate the cache
+READER_VERSION = "2"
+DEFAULT_CACHE_MAX_SIZE = 2 * 1024 * 1024 * 1024
+DEFAULT_SPOOL_THRESHOLD = 64 * 1024 * 1024
+# File digests remembered in memory by each process and on disk for all of them
+FILE_DIGEST_MEMO_SIZE = 1024 * 1024
+FILE_DIGEST_STORE_SIZE = 16 * 1024 * 1024
 
-def process_single_file(config: dict) -> tuple[str, str | None, str | None, int, float]:
+# Rough single-core extraction times in seconds, used to schedule batches
+COST_TEXT_PAGE = 0.02
+COST_OCR_PAGE_150_DPI = 1.5
+COST_PER_MB = {".txt": 0.05, ".docx": 0.2, ".doc": 0.5}
+COST_PER_FILE = {".txt": 0.01, ".docx": 0.1, ".doc": 1.0}
+COST_CACHED = 0.001
+
+
+_readers: dict[tuple, "Reader"] = {}
+
+
+def get_reader(config: dict) -> "Reader":
+    """
+    Returns a Reader for the settings of a task configuration.
+
+    Readers are kept for the lifetime of the process, so a long-lived worker only
+    creates its temporary directory and sets up Tesseract once.
+    """
+    reader_kwargs = {
+        "temporary_path": config.get("temporary_path", "./tmp"),
+        "doc_reader_path": config.get("doc_reader_path"),
+        "tesseract_path": config.get("tesseract_path"),
+        "image_resolution": config.get("image_resolution", 500),
+        "n_char_min": config.get("n_char_min", 5),
+        "ocr_workers": config.get("ocr_workers", 1),
+        "doc_converter_pool_size": config.get("doc_converter_pool_size", 0),
+        "doc_converter_address": config.get("doc_converter_address"),
+        "cache_path": config.get("cache_path"),
+        "cache_max_size": config.get("cache_max_size", DEFAULT_CACHE_MAX_SIZE),
+        "skip_blank_pages": config.get("skip_blank_pages", True),
+        "page_cache_size": config.get("page_cache_size", 64),
+        "ocr_dpi_ladder": tuple(config.get("ocr_dpi_ladder") or ()),
+        "ocr_min_confidence": config.get("ocr_min_confidence", 70.0),
+        "ocr_max_page_mb": config.get("ocr_max_page_mb", 0),
+        "parallel_page_threshold": config.get("parallel_page_threshold", 0),
+        "parallel_page_workers": config.get("parallel_page_workers", 4),
+        "ocr_preprocess": config.get("ocr_preprocess", False),
+        "debug": config.get("debug", False),
+    }
+    key = tuple(sorted(reader_kwargs.items()))
+    reader_instance = _readers.get(key)
+    if reader_instance is None:
+        reader_instance = Reader(**reader_kwargs)
+        _readers[key] = reader_instance
+    return reader_instance
+
+
+def limit_ocr_threads() -> None:
+    """Keep the Tesseract runs of this process single-threaded.
+
+    For extraction worker processes only: documents and their pages are already
+    OCR'd in parallel there. The limit is set in the environment, inherited by
+    every Tesseract subprocess, so it must not be set in the API process.
+    """
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def process_single_file(
+    config: dict,
+) -> tuple[str, str | None, str | None, int, float, dict]:
     """
     Reads and processes a single file based on the provided configuration.
 
@@ -30,38 +135,118 @@ def process_single_file(config: dict) -> tuple[str, str | None, str | None, int,
             'tesseract_path': Path to the tesseract executable.
             'image_resolution': Resolution for OCR image conversion.
             'n_char_min': Minimum characters to attempt vectorized text extraction.
+            'ocr_workers': Number of pages OCR'd concurrently for scanned documents.
+            'doc_converter_pool_size': Number of warm soffice instances, 0 = one-shot.
+            'doc_converter_address': Address of a converter service to use instead
+                of a pool of this process (see start_converter_service).
+            'preview_path': Where to save the first page render of a PDF, used to
+                create its previews without opening it again.
+            'content': Raw text already extracted for the file (e.g. by a batch
+                .doc conversion). The file is not read again when it is given.
+            'cache_path': Directory of the extraction cache, disabled if empty.
+            'cache_max_size': Maximum size of the extraction cache in bytes.
+            'skip_blank_pages': Skip blank pages instead of OCR'ing them.
+            'page_cache_size': Number of OCR'd page images remembered to reuse the
+                text of pixel-identical pages, 0 to disable.
+            'ocr_dpi_ladder': Increasing OCR resolutions for adaptive OCR, empty to
+                always OCR at 'image_resolution'.
+            'ocr_min_confidence': Mean word confidence under which a page is OCR'd
+                again at the next resolution of the ladder.
+            'ocr_max_page_mb': Memory cap of a rendered page, 0 for no cap.
+            'parallel_page_threshold': Page count from which the text layer of a
+                PDF is extracted by several processes, 0 to disable.
+            'parallel_page_workers': Number of processes used for those PDFs.
+            'ocr_preprocess': Binarize, deskew and crop scanned pages before OCR.
+            'stream': Return the content as an ExtractedText handle, extracted page
+                by page (or chunk by chunk) without holding the whole text.
+            'spool_threshold': Number of characters over which a streamed text is
+                moved from memory to a file.
             'debug': Debug flag.
 
     Returns:
-        tuple: (file_path, content, error_message, n_pages, processing_time)
+        tuple: (file_path, content, error_message, n_pages, processing_time, stats)
     """
     file_path = config["file_path"]
     start_time = time.time()
-    reader_instance = Reader(
-        temporary_path=config.get("temporary_path", "./tmp"),
-        doc_reader_path=config.get("doc_reader_path"),
-        tesseract_path=config.get("tesseract_path"),
-        image_resolution=config.get("image_resolution", 500),
-        n_char_min=config.get("n_char_min", 5),
-        debug=config.get("debug", False),
-    )
+    reader_instance = get_reader(config)
+    reader_instance.stats = {}
 
-    content: str | None = None
+    content: str | ExtractedText | None = None
+    stream = config.get("stream", False)
     error_msg: str | None = None
     n_pages: int = 0
 
+    cache_key = None
+    if reader_instance.cache is not None:
+        try:
+            cache_key = reader_instance.cache_key(file_path)
+            entry = reader_instance.cache.get(cache_key)
+        except OSError as e:
+            print(f"Extraction cache lookup failed for {file_path}: {e}")
+            entry = None
+        if entry is not None:
+            stats = {**entry["stats"], "cache_hit": True, "cached_dt": entry["dt"]}
+            return (
+                file_path,
+                ExtractedText(entry["content"]) if stream else entry["content"],
+                None,
+                entry["n_pages"],
+                time.time() - start_time,
+                stats,
+            )
+
     try:
-        n_pages = reader_instance.get_n_pages(file_path)
-        content = reader_instance.read_one_file(file_path)
-        if content is not None:
-            content = unidecode.unidecode(content)
+        # The file is opened once for the page count, its text and its preview
+        with DocumentSession(file_path) as session:
+            n_pages = session.n_pages
+            content = config.get("content")
+            if content is None and stream:
+                content = reader_instance.extract_to_spool(
+                    file_path, session, config.get("spool_threshold")
+                )
+            elif content is None:
+                content = reader_instance.read_one_file(file_path, session)
+            if config.get("preview_path"):
+                try:
+                    session.save_first_page(config["preview_path"])
+                except Exception as e:
+                    print(f"Could not render the preview of {file_path}: {e}")
+        if isinstance(content, str):
+            # PDF and XPS text is already transliterated by read_xps
+            if not content.isascii():
+                content = unidecode.unidecode(content)
+            if stream:
+                content = ExtractedText(content)
 
     except Exception as e:
         error_msg = f"Reader Error: {e}"
         print(f"Error processing {file_path}: {error_msg}")
 
     processing_time = time.time() - start_time
-    return file_path, content, error_msg, n_pages, processing_time
+    # Texts spooled to disk are too big to be cached
+    cached_content = (
+        content.read()
+        if isinstance(content, ExtractedText) and content.in_memory
+        else content
+    )
+    if cache_key is not None and error_msg is None and isinstance(cached_content, str):
+        reader_instance.cache.put(
+            cache_key,
+            {
+                "content": cached_content,
+                "n_pages": n_pages,
+                "dt": processing_time,
+                "stats": reader_instance.stats,
+            },
+        )
+    return (
+        file_path,
+        content,
+        error_msg,
+        n_pages,
+        processing_time,
+        reader_instance.stats,
+    )
 
 
 class Reader:
@@ -73,6 +258,19 @@ class Reader:
         tesseract_path="",
         image_resolution=500,
         n_char_min=5,
+        ocr_workers=1,
+        doc_converter_pool_size=0,
+        doc_converter_address=None,
+        cache_path=None,
+        cache_max_size=DEFAULT_CACHE_MAX_SIZE,
+        skip_blank_pages=True,
+        page_cache_size=64,
+        ocr_dpi_ladder=None,
+        ocr_min_confidence=70.0,
+        ocr_max_page_mb=0,
+        parallel_page_threshold=0,
+        parallel_page_workers=4,
+        ocr_preprocess=False,
         debug=False,
     ):
         self.switcher = {
@@ -90,116 +288,447 @@ class Reader:
         self.image_resolution = image_resolution
         self.debug = debug
         self.n_char_min = n_char_min
+        # 0 = all cores for this reader; documents read by a process pool share them
+        self.ocr_workers_auto = not ocr_workers
+        self.ocr_workers = max(1, ocr_workers or cpu_count())
+        self.doc_converter_pool_size = doc_converter_pool_size
+        self.doc_converter_address = doc_converter_address
+        self.cache_path = cache_path
+        self.cache_max_size = cache_max_size
+        self.cache: ExtractionCache | None = (
+            get_extraction_cache(cache_path, cache_max_size) if cache_path else None
+        )
+        self.file_digests = get_memo(
+            "file_digests",
+            FILE_DIGEST_MEMO_SIZE,
+            store_dir=os.path.join(temporary_path, "file_digests"),
+            store_max_bytes=FILE_DIGEST_STORE_SIZE,
+        )
+        self.skip_blank_pages = skip_blank_pages
+        self.page_cache_size = page_cache_size
+        self.page_cache: PageOCRCache | None = (
+            PageOCRCache(page_cache_size) if page_cache_size > 0 else None
+        )
+        # Adaptive OCR starts at the lowest resolution of the ladder
+        self.ocr_dpi_ladder = tuple(sorted(ocr_dpi_ladder or (image_resolution,)))
+        self.ocr_min_confidence = ocr_min_confidence
+        self.ocr_max_page_mb = ocr_max_page_mb
+        self.parallel_page_threshold = parallel_page_threshold
+        self.parallel_page_workers = parallel_page_workers
+        self.ocr_preprocess = ocr_preprocess
+        self.stats: dict = {}
 
         os.makedirs(self.temporary_path, exist_ok=True)
 
         if self.tesseract_bin_path:
             pytesseract.pytesseract.tesseract_cmd = self.tesseract_bin_path
 
-    def get_n_pages(self, filepath):
-        extension = pathlib.PurePosixPath(filepath).suffix.lower()
-        if extension in (".txt", ".doc", ".docx"):
-            return 0
-        if extension == ".png":
-            return 1
+    def file_digest(self, file_path: str) -> str:
+        """SHA-256 of a file, remembered by path, size, inode and times.
+
+        The digest of a file is needed to schedule it and again by the worker that
+        extracts it: the memo's store spares the workers from reading it again.
+        """
+        stat = os.stat(file_path)
+        key = digest(
+            os.path.realpath(file_path),
+            stat.st_size,
+            stat.st_ino,
+            stat.st_mtime_ns,
+            stat.st_ctime_ns,
+        )
+        return self.file_digests.cached(key, lambda: file_digest(file_path))
+
+    def cache_key(self, file_path: str) -> str:
+        """Extraction cache key of a file: its contents and the extraction settings."""
+        return ExtractionCache.make_key_from_digest(
+            self.file_digest(file_path),
+            image_resolution=self.image_resolution,
+            n_char_min=self.n_char_min,
+            skip_blank_pages=self.skip_blank_pages,
+            ocr_dpi_ladder=self.ocr_dpi_ladder,
+            ocr_min_confidence=self.ocr_min_confidence,
+            ocr_max_page_mb=self.ocr_max_page_mb,
+            ocr_preprocess=self.ocr_preprocess,
+            reader_version=READER_VERSION,
+        )
+
+    def estimate_cost(self, file_path: str) -> dict:
+        """
+        Cheap pre-flight estimate of the extraction cost of a file.
+
+        Returns its page count, whether a PDF/XPS has a text layer (sampled on the
+        first pages), its size, extension and the estimated cost in single-core
+        seconds.
+        """
+        extension = pathlib.PurePosixPath(file_path).suffix.lower()
         try:
-            doc = fitz.open(filepath)
-            n_pages = doc.page_count
-            doc.close()
-            return n_pages
-        except Exception as e:
-            print(f"Warning: Could not get page count for {filepath}: {e}")
-            return 0
+            file_size = os.path.getsize(file_path)
+        except OSError:
+            file_size = 0
+        estimate = {
+            "n_pages": 0,
+            "has_text_layer": extension not in (".pdf", ".xps", ".png"),
+            "file_size": file_size,
+            "extension": extension,
+        }
 
-    def pdf_to_image_to_text(self, fullpath):
-        default_resolution = 96
-        zoom_x = self.image_resolution / default_resolution
-        zoom_y = zoom_x
-        mat = fitz.Matrix(zoom_x, zoom_y)
-        text = ""
-        doc = None
         try:
-            doc = fitz.open(fullpath)
-            for page in doc:
-                pix = page.get_pixmap(alpha=False, matrix=mat)
-                image_path = os.path.join(
-                    self.temporary_path,
-                    f"{os.getpid()}_page_{page.number}_{os.path.basename(fullpath)}.png",
+            if self.cache is not None and self.cache_key(file_path) in self.cache:
+                estimate["cost"] = COST_CACHED
+                return estimate
+        except OSError:
+            pass
+
+        ocr_page_cost = COST_OCR_PAGE_150_DPI * (self.ocr_dpi_ladder[0] / 150) ** 2
+        if extension == ".png":
+            estimate["n_pages"] = 1
+            estimate["cost"] = ocr_page_cost
+        elif extension in (".pdf", ".xps"):
+            try:
+                with fitz.open(file_path) as doc:
+                    estimate["n_pages"] = doc.page_count
+                    sample = [doc[i].get_text() for i in range(min(3, doc.page_count))]
+                estimate["has_text_layer"] = all(
+                    len(text.strip()) >= self.n_char_min for text in sample
                 )
-                try:
-                    pix.save(image_path)
-                    text += self.read_image(image_path)
-                finally:
-                    if not self.debug and os.path.exists(image_path):
-                        os.remove(image_path)
+            except Exception as e:
+                print(f"Warning: Could not estimate cost of {file_path}: {e}")
+            page_cost = COST_TEXT_PAGE if estimate["has_text_layer"] else ocr_page_cost
+            estimate["cost"] = estimate["n_pages"] * page_cost
+        else:
+            size_mb = file_size / (1024 * 1024)
+            estimate["cost"] = (
+                COST_PER_FILE.get(extension, 1.0)
+                + COST_PER_MB.get(extension, 0.0) * size_mb
+            )
+        return estimate
+
+    def get_n_pages(self, filepath):
+        with DocumentSession(filepath) as session:
+            return session.n_pages
+
+    @staticmethod
+    def pixmap_to_image(pix) -> Image.Image:
+        """Wrap a rendered pixmap into a PIL image without going through disk."""
+        mode = "RGB" if pix.n >= 3 else "L"
+        return Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+
+    def pdf_to_image_to_text(self, fullpath, session: DocumentSession | None = None):
+        own_session = session is None
+        if own_session:
+            session = DocumentSession(fullpath)
+        try:
+            page_texts = self.ocr_pages(session.doc)
         except Exception as e:
             print(f"Error during OCR for {fullpath}: {e}")
+            return ""
         finally:
-            if doc:
-                doc.close()
-        return text
+            if own_session:
+                session.close()
+        return "".join(page_texts.values())
+
+    def render_page(self, page, dpi: int):
+        """Render a page for OCR at ``dpi``, lowered so that the page, and its
+        preprocessing with ``ocr_preprocess``, fit in ``ocr_max_page_mb``."""
+        default_resolution = 96
+        zoom = dpi / default_resolution
+        bytes_per_pixel = PREPROCESS_BYTES_PER_PIXEL if self.ocr_preprocess else 3
+        n_bytes = page.rect.width * page.rect.height * zoom**2 * bytes_per_pixel
+        max_bytes = self.ocr_max_page_mb * 1024 * 1024
+        if max_bytes > 0 and n_bytes > max_bytes:
+            zoom *= (max_bytes / n_bytes) ** 0.5
+        return page.get_pixmap(alpha=False, matrix=fitz.Matrix(zoom, zoom))
+
+    def ocr_pages(self, doc, page_numbers=None) -> dict[int, str]:
+        """OCR the given pages (all by default) of an open document.
+
+        Returns the text of each page keyed by page number, in page order.
+
+        With a DPI ladder of several resolutions, pages are OCR'd at the lowest one
+        first and only re-rendered at the next one while Tesseract's mean word
+        confidence stays under ``ocr_min_confidence``. Pages without any word
+        recognized (figures, noise the blank check missed) are not re-rendered.
+        """
+        if page_numbers is None:
+            page_numbers = range(doc.page_count)
+        ladder = self.ocr_dpi_ladder
+        ocr = self.ocr_image_with_confidence if len(ladder) > 1 else self.ocr_image
+        page_texts = {}
+        start_time = time.time()
+        n_ocr_pages = 0
+        blank_pages = 0
+        escalations = 0
+        duplicate_pages = 0
+        signatures: dict[int, PageSignature] = {}
+        # Page number of the first page with each pixel digest
+        first_pages: dict[str, int] = {}
+        same_as: dict[int, int] = {}
+        # Pages are rendered one at a time here (PyMuPDF is not thread-safe) and
+        # OCR'd by a thread pool: Tesseract runs as a subprocess, so threads are
+        # enough to keep several cores busy. At most 2 * ocr_workers rendered
+        # pages are kept in memory at once. Blank pages are skipped and pages with
+        # the same pixels as an already OCR'd page (in this or an earlier document)
+        # reuse its text.
+        with ThreadPoolExecutor(max_workers=self.ocr_workers) as executor:
+            pending: deque[tuple[int, Future, int]] = deque()
+
+            def collect():
+                nonlocal escalations
+                page_number, future, rung = pending.popleft()
+                if len(ladder) == 1:
+                    page_texts[page_number] = future.result()
+                else:
+                    text, confidence = future.result()
+                    if (
+                        confidence is not None
+                        and confidence < self.ocr_min_confidence
+                        and rung + 1 < len(ladder)
+                    ):
+                        escalations += 1
+                        pix = self.render_page(doc[page_number], ladder[rung + 1])
+                        future = executor.submit(ocr, self.pixmap_to_image(pix))
+                        pending.append((page_number, future, rung + 1))
+                        return
+                    page_texts[page_number] = text
+                if page_number in signatures and self.page_cache is not None:
+                    self.page_cache.put(
+                        signatures[page_number], page_texts[page_number]
+                    )
+
+            for page_number in page_numbers:
+                pix = self.render_page(doc[page_number], ladder[0])
+                if self.skip_blank_pages:
+                    gray = pixmap_to_gray(pix.samples, pix.width, pix.height, pix.n)
+                    blank = is_blank(gray)
+                    del gray
+                    if blank:
+                        blank_pages += 1
+                        page_texts[page_number] = ""
+                        continue
+                if self.page_cache is not None:
+                    signature = PageSignature(pix.samples, pix.width, pix.height, pix.n)
+                    cached_text = self.page_cache.get(signature)
+                    if cached_text is not None:
+                        duplicate_pages += 1
+                        page_texts[page_number] = cached_text
+                        continue
+                    same_page = first_pages.get(signature.exact_key)
+                    if same_page is not None:
+                        duplicate_pages += 1
+                        same_as[page_number] = same_page
+                        continue
+                    first_pages[signature.exact_key] = page_number
+                    signatures[page_number] = signature
+                pending.append(
+                    (page_number, executor.submit(ocr, self.pixmap_to_image(pix)), 0)
+                )
+                n_ocr_pages += 1
+                del pix
+                while len(pending) >= 2 * self.ocr_workers:
+                    collect()
+            while pending:
+                collect()
+
+        for page_number, same_page in same_as.items():
+            page_texts[page_number] = page_texts.get(same_page, "")
+        page_texts = dict(sorted(page_texts.items()))
+
+        ocr_time = time.time() - start_time
+        n_ocr_pages += self.stats.get("ocr_pages", 0)
+        ocr_time += self.stats.get("ocr_time", 0.0)
+        self.stats["blank_pages_skipped"] = (
+            self.stats.get("blank_pages_skipped", 0) + blank_pages
+        )
+        self.stats["duplicate_pages_reused"] = (
+            self.stats.get("duplicate_pages_reused", 0) + duplicate_pages
+        )
+        self.stats["ocr_escalations"] = (
+            self.stats.get("ocr_escalations", 0) + escalations
+        )
+        self.stats["ocr_pages"] = n_ocr_pages
+        self.stats["ocr_time"] = ocr_time
+        self.stats["ocr_pages_per_sec"] = (
+            n_ocr_pages / ocr_time if ocr_time > 0 else 0.0
+        )
+        return page_texts
 
     def read_text(self, file_path):
-        content = ""
         try:
-            with open(file_path, encoding="utf-8") as one_file:
-                content = one_file.read()
-        except UnicodeDecodeError:
-            try:
-                with open(file_path, encoding="latin-1") as one_file:
-                    content = one_file.read()
-            except Exception as e:
-                raise OSError(
-                    f"Not able to read text file:{file_path} in [utf-8,latin-1] coding. Error: {e}"
-                ) from e
+            return "".join(iter_text_file(file_path))
         except Exception as e:
             raise OSError(f"Error reading text file {file_path}: {e}") from e
-        return content
 
-    def read_doc(self, file_path):
-        content = ""
-        text_file_path = os.path.join(
-            self.temporary_path, pathlib.PurePosixPath(file_path).stem + ".txt"
+    def iter_segments(
+        self, file_path: str, session: DocumentSession | None = None
+    ) -> Iterator[str]:
+        """Yield the text of a file segment by segment: pages of a PDF/XPS, chunks
+        of a text file. Other formats are yielded in one segment.
+        """
+        extension = pathlib.PurePosixPath(file_path).suffix.lower()
+        if extension == ".txt":
+            yield from iter_text_file(file_path)
+        elif extension in PAGED_EXTENSIONS:
+            own_session = session is None
+            if own_session:
+                session = DocumentSession(file_path)
+            try:
+                yield from self._iter_pages(session)
+            finally:
+                if own_session:
+                    session.close()
+        else:
+            yield self.read_one_file(file_path, session)
+
+    def _iter_pages(self, session: DocumentSession, window: int = 32) -> Iterator[str]:
+        """Text of each page, OCR'ing sparse pages ``window`` pages at a time."""
+        doc = session.doc
+        self.stats["text_pages"] = 0
+        self.stats["ocr_pages"] = 0
+        text_layer = self._iter_text_layer(session)
+        for start in range(0, doc.page_count, window):
+            page_numbers = range(start, min(start + window, doc.page_count))
+            page_texts = dict(zip(page_numbers, text_layer))
+            sparse_pages = [
+                n
+                for n, text in page_texts.items()
+                if len(text.strip()) < self.n_char_min
+            ]
+            self.stats["text_pages"] += len(page_texts) - len(sparse_pages)
+            if sparse_pages:
+                try:
+                    page_texts.update(self.ocr_pages(doc, sparse_pages))
+                except Exception as e:
+                    print(f"Error during OCR for {session.file_path}: {e}")
+            for page_number in page_numbers:
+                yield page_texts[page_number]
+
+    def _iter_text_layer(self, session: DocumentSession) -> Iterator[str]:
+        """Text layer of each page, extracted by several processes for large PDFs."""
+        n_pages = session.n_pages
+        workers = min(self.parallel_page_workers, cpu_count())
+        start_time = time.time()
+        if (
+            self.parallel_page_threshold > 0
+            and n_pages >= self.parallel_page_threshold
+            and workers > 1
+        ):
+            self.stats["parallel_ranges"] = min(workers, n_pages)
+            yield from iter_page_texts_parallel(
+                session.file_path, n_pages, workers, tmp_dir=self.temporary_path
+            )
+        else:
+            yield from session.page_texts()
+        self.stats["text_layer_time"] = time.time() - start_time
+
+    def extract_to_spool(
+        self,
+        file_path: str,
+        session: DocumentSession | None = None,
+        spool_threshold: int | None = None,
+    ) -> ExtractedText:
+        """Extract a file segment by segment into memory, or into a temporary file
+        once the text grows over ``spool_threshold`` characters.
+        """
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(
+                f"file_path:'{file_path}' is not a file or does not exist!"
+            )
+        self.stats = {}
+        spool = TextSpool(
+            spool_threshold or DEFAULT_SPOOL_THRESHOLD, dir=self.temporary_path
         )
         try:
-            if not self.doc_reader_path or not os.path.exists(self.doc_reader_path):
-                raise OSError(
-                    f"doc_reader_path not configured or not found: {self.doc_reader_path}"
-                )
+            for segment in self.iter_segments(file_path, session):
+                spool.write(unidecode.unidecode(segment))
+        except Exception:
+            spool.abort()
+            raise
+        text = spool.close()
+        self.stats["spooled"] = not text.in_memory
+        return text
 
-            result = subprocess.run(
-                [
-                    self.doc_reader_path,
-                    "--headless",
-                    "--convert-to",
-                    "txt:Text",
-                    "--outdir",
-                    self.temporary_path,
-                    file_path,
-                ],
-                capture_output=True,
-                text=True,
-                timeout=60,
-                check=True,
+    def read_doc(self, file_path):
+        contents = self.read_docs([file_path])
+        if file_path not in contents:
+            raise OSError(f"Not able to read/convert doc file: {file_path}.")
+        return contents[file_path]
+
+    def read_docs(self, file_paths: list[str]) -> dict[str, str]:
+        """Convert several .doc files in as few converter calls as possible.
+
+        Uses the warm soffice pool of the converter service (or else of this
+        process) when it is available and falls back to a one-shot ``--convert-to``
+        call otherwise. Files that could not be converted are left out of the
+        returned mapping.
+        """
+        if not self.doc_reader_path or not os.path.exists(self.doc_reader_path):
+            raise OSError(
+                f"doc_reader_path not configured or not found: {self.doc_reader_path}"
             )
 
-            if not os.path.exists(text_file_path):
-                raise OSError(
-                    f"Converted text file not found: {text_file_path}. "
-                    f"Converter output: {result.stdout} {result.stderr}"
+        outdir = tempfile.mkdtemp(prefix="doc_", dir=self.temporary_path)
+        try:
+            converted = {}
+            if self.doc_converter_address:
+                pool = connect_converter_service(self.doc_converter_address)
+            else:
+                pool = get_converter_pool(
+                    self.doc_reader_path,
+                    self.doc_converter_pool_size,
+                    self.temporary_path,
                 )
+            if pool is not None:
+                try:
+                    converted = pool.convert_batch(file_paths, outdir)
+                except Exception as e:
+                    print(f"Converter pool error, falling back to one-shot mode: {e}")
 
-            content = self.read_text(text_file_path)
-        except subprocess.TimeoutExpired:
-            raise OSError(f"Timeout converting .doc file: {file_path}")
-        except (subprocess.CalledProcessError, OSError, FileNotFoundError) as e:
-            raise OSError(
-                f"Not able to read/convert doc file: {file_path}. Error: {e}"
-            ) from e
+            remaining = [path for path in file_paths if path not in converted]
+            if remaining:
+                converted.update(self._convert_docs_one_shot(remaining, outdir))
+
+            contents = {}
+            for file_path, text_file_path in converted.items():
+                try:
+                    contents[file_path] = self.read_text(text_file_path)
+                except OSError as e:
+                    print(f"Not able to read converted doc file {file_path}: {e}")
+            return contents
         finally:
-            if not self.debug and os.path.exists(text_file_path):
-                os.remove(text_file_path)
-        return content
+            if not self.debug:
+                shutil.rmtree(outdir, ignore_errors=True)
+
+    def _convert_docs_one_shot(
+        self, file_paths: list[str], outdir: str
+    ) -> dict[str, str]:
+        converted = {}
+        for group in group_by_unique_stem(file_paths):
+            group_outdir = tempfile.mkdtemp(prefix="convert_", dir=outdir)
+            try:
+                subprocess.run(
+                    [
+                        self.doc_reader_path,
+                        "--headless",
+                        "--convert-to",
+                        "txt:Text",
+                        "--outdir",
+                        group_outdir,
+                        *group,
+                    ],
+                    capture_output=True,
+                    text=True,
+                    timeout=60 * len(group),
+                    check=True,
+                )
+            except subprocess.TimeoutExpired:
+                raise OSError(f"Timeout converting .doc files: {group}")
+            except (subprocess.CalledProcessError, OSError) as e:
+                raise OSError(
+                    f"Not able to read/convert doc files: {group}. Error: {e}"
+                ) from e
+            converted.update(converted_text_files(group, group_outdir))
+        return converted
 
     def read_docx(self, file_path):
         try:
@@ -207,55 +736,112 @@ class Reader:
         except Exception as e:
             raise OSError(f"Not able to read docx file:{file_path}. Error: {e}") from e
 
-    def read_pdf(self, file_path):
-        return self.read_xps(file_path)
+    def read_pdf(self, file_path, session: DocumentSession | None = None):
+        return self.read_xps(file_path, session)
 
-    def read_xps(self, file_path):
-        doc = None
+    def read_xps(self, file_path, session: DocumentSession | None = None):
+        own_session = session is None
+        if own_session:
+            session = DocumentSession(file_path)
         try:
-            doc = fitz.open(file_path)
-            text = "".join(page.get_text() for page in doc)
+            page_texts = list(self._iter_text_layer(session))
 
-            if len(text.strip()) < self.n_char_min * doc.page_count:
+            # Only pages whose text layer is too sparse are OCR'd, so a scanned
+            # annex does not force OCR on the born-digital pages of the document
+            sparse_pages = [
+                page_number
+                for page_number, page_text in enumerate(page_texts)
+                if len(page_text.strip()) < self.n_char_min
+            ]
+            self.stats["text_pages"] = len(page_texts) - len(sparse_pages)
+            self.stats["ocr_pages"] = 0
+            if sparse_pages:
                 print(
-                    f"Low text yield ({len(text.strip())} chars) for {file_path}, attempting OCR."
+                    f"Low text yield on {len(sparse_pages)}/{len(page_texts)} pages "
+                    f"for {file_path}, attempting OCR."
                 )
-                text = self.pdf_to_image_to_text(file_path)
-            else:
-                text = unidecode.unidecode(text)
+                try:
+                    ocr_texts = self.ocr_pages(session.doc, sparse_pages)
+                except Exception as e:
+                    print(f"Error during OCR for {file_path}: {e}")
+                    ocr_texts = {}
+                for page_number, page_text in ocr_texts.items():
+                    page_texts[page_number] = page_text
+
+            text = unidecode.unidecode("".join(page_texts))
 
         except Exception as e:
             print(f"Error reading XPS/PDF file {file_path}: {e}")
             raise OSError(f"Failed to process XPS/PDF: {file_path}. Error: {e}") from e
         finally:
-            if doc:
-                doc.close()
+            if own_session:
+                session.close()
         return text
 
     def read_image(self, fullpath):
         try:
-            text = pytesseract.image_to_string(
-                Image.open(fullpath),
+            image = Image.open(fullpath)
+        except Exception as e:
+            raise OSError(f"Error during OCR for image {fullpath}: {e}") from e
+        return self.ocr_image(image)
+
+    def ocr_image(self, image: Image.Image) -> str:
+        if self.ocr_preprocess:
+            image = preprocess_for_ocr(image)
+        try:
+            return pytesseract.image_to_string(image)
+        except pytesseract.TesseractNotFoundError:
+            raise OSError(
+                f"Tesseract executable not found at {self.tesseract_bin_path} or in PATH."
             )
-            return text
+        except Exception as e:
+            raise OSError(f"Error during OCR: {e}") from e
+
+    def ocr_image_with_confidence(
+        self, image: Image.Image
+    ) -> tuple[str, float | None]:
+        """OCR an image, returning its text and the mean word confidence (0-100),
+        None when no word was recognized."""
+        if self.ocr_preprocess:
+            image = preprocess_for_ocr(image)
+        try:
+            data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
         except pytesseract.TesseractNotFoundError:
             raise OSError(
                 f"Tesseract executable not found at {self.tesseract_bin_path} or in PATH."
             )
         except Exception as e:
-            raise OSError(f"Error during OCR for image {fullpath}: {e}") from e
+            raise OSError(f"Error during OCR: {e}") from e
+
+        lines: dict[tuple, list[str]] = {}
+        confidences = []
+        for i, word in enumerate(data["text"]):
+            if not word.strip():
+                continue
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(key, []).append(word)
+            confidence = float(data["conf"][i])
+            if confidence >= 0:
+                confidences.append(confidence)
+        text = "".join(" ".join(words) + "\n" for words in lines.values())
+        confidence = sum(confidences) / len(confidences) if confidences else None
+        return text, confidence
 
-    def read_one_file(self, file_path):
+    def read_one_file(self, file_path, session: DocumentSession | None = None):
+        """Extract the text of a file, reusing the open document of ``session``."""
         if not os.path.isfile(file_path):
             raise FileNotFoundError(
                 f"file_path:'{file_path}' is not a file or does not exist!"
             )
+        self.stats = {}
 
         extension = pathlib.PurePosixPath(file_path).suffix.lower()
         read_function = self.switcher.get(extension)
 
         if read_function:
             try:
+                if extension in PAGED_EXTENSIONS:
+                    return read_function(file_path, session)
                 return read_function(file_path)
             except Exception as e:
                 raise OSError(
@@ -268,8 +854,149 @@ class Reader:
                 f"Supported: {supported_extensions}"
             )
 
+    def ocr_workers_per_process(self, processes: int) -> int:
+        """OCR threads of each document read by a pool of ``processes`` processes:
+        the cores are split between the processes unless ocr_workers was set."""
+        if not self.ocr_workers_auto:
+            return self.ocr_workers
+        return max(1, cpu_count() // max(1, processes))
+
+    def _task_config(self, file_path: str, ocr_workers: int | None = None) -> dict:
+        return {
+            "file_path": file_path,
+            "temporary_path": self.temporary_path,
+            "doc_reader_path": self.doc_reader_path,
+            "tesseract_path": self.tesseract_bin_path,
+            "image_resolution": self.image_resolution,
+            "n_char_min": self.n_char_min,
+            "ocr_workers": ocr_workers or self.ocr_workers,
+            "doc_converter_pool_size": self.doc_converter_pool_size,
+            "doc_converter_address": self.doc_converter_address,
+            "cache_path": self.cache_path,
+            "cache_max_size": self.cache_max_size,
+            "skip_blank_pages": self.skip_blank_pages,
+            "page_cache_size": self.page_cache_size,
+            "ocr_dpi_ladder": self.ocr_dpi_ladder,
+            "ocr_min_confidence": self.ocr_min_confidence,
+            "ocr_max_page_mb": self.ocr_max_page_mb,
+            "parallel_page_threshold": self.parallel_page_threshold,
+            "parallel_page_workers": self.parallel_page_workers,
+            "ocr_preprocess": self.ocr_preprocess,
+            "debug": self.debug,
+        }
+
+    def iter_read(
+        self,
+        file_paths: list[str],
+        max_in_flight: int | None = None,
+        timeout_per_task: float = 300.0,
+        executor: Executor | None = None,
+        schedule: str = "fifo",
+        progress: BatchProgress | None = None,
+    ) -> Iterator[tuple[str, str | None, str | None, int, float, dict]]:
+        """Read files in parallel, yielding each result as soon as it is ready.
+
+        Yields ``(file_path, content, error, n_pages, dt, stats)`` tuples in
+        completion order. At most ``max_in_flight`` files (twice the number of
+        workers by default) are submitted at once, and new files are only submitted
+        when the consumer pulls results, so memory stays bounded and a slow
+        consumer throttles the extraction.
+
+        Files are submitted to ``executor`` when one is given (e.g. the shared
+        extraction pool), otherwise to a supervised process pool created for this
+        call, which kills and respawns a worker stuck on a file for more than
+        ``timeout_per_task`` seconds. Unless ``ocr_workers`` was set, the workers
+        split the cores between them to OCR their documents.
+
+        ``schedule`` orders the files by estimated cost before submission (see
+        progress.order_by_cost) and ``progress`` is updated as files complete.
+        """
+        max_in_flight = max_in_flight or 2 * cpu_count()
+        if schedule != "fifo":
+            costs = {
+                path: self.estimate_cost(path)["cost"]
+                for path in file_paths
+                if isinstance(path, str) and os.path.exists(path)
+            }
+            file_paths = order_by_cost(costs, schedule) + [
+                path for path in file_paths if path not in costs
+            ]
+        paths = iter(file_paths)
+        own_executor = executor is None
+        if own_executor:
+            executor = SupervisedPool(
+                max_workers=cpu_count(),
+                task_timeout=timeout_per_task,
+                initializer=limit_ocr_threads,
+            )
+        ocr_workers = self.ocr_workers_per_process(
+            getattr(executor, "max_workers", None)
+            or getattr(executor, "_max_workers", cpu_count())
+        )
+        in_flight = {}
+        try:
+            exhausted = False
+            while True:
+                while not exhausted and len(in_flight) < max_in_flight:
+                    path = next(paths, None)
+                    if path is None:
+                        exhausted = True
+                        break
+                    if not isinstance(path, str) or not os.path.exists(path):
+                        print("  Path is invalid or does not exist. Skipping.")
+                        yield path, None, "Path skipped or invalid", 0, 0.0, {}
+                        continue
+                    future = executor.submit(
+                        process_single_file, self._task_config(path, ocr_workers)
+                    )
+                    in_flight[future] = path
+
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                        error, dt = result[2], result[4]
+                        if error:
+                            print(
+                                f"Processed {file_path} with error: {error} in {dt:.2f}s"
+                            )
+                    except TaskTimeoutError as exc:
+                        print(f"Timeout processing {file_path}: {exc}")
+                        result = (
+                            file_path,
+                            None,
+                            f"Timeout after {timeout_per_task}s",
+                            0,
+                            timeout_per_task,
+                            {},
+                        )
+                    except (WorkerCrashedError, QuarantinedError) as exc:
+                        print(f"Worker error for {file_path}: {exc}")
+                        result = (file_path, None, f"Worker Error: {exc}", 0, 0.0, {})
+                    except Exception as exc:
+                        print(f"Error retrieving result for {file_path}: {exc}")
+                        result = (file_path, None, f"Future Error: {exc}", 0, 0.0, {})
+                    if progress is not None:
+                        progress.complete(file_path)
+                    yield result
+        finally:
+            if own_executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+            else:
+                for future in in_flight:
+                    future.cancel()
+
     def read(
-        self, doc_df: pd.DataFrame, timeout_per_task: float = 300.0
+        self,
+        doc_df: pd.DataFrame,
+        timeout_per_task: float = 300.0,
+        executor: Executor | None = None,
+        schedule: str = "fifo",
+        progress: BatchProgress | None = None,
     ) -> pd.DataFrame:
         if self.cv_file_column not in doc_df.columns:
             raise ValueError(f"Column '{self.cv_file_column}' not found in DataFrame.")
@@ -277,69 +1004,30 @@ class Reader:
         filepath_list = doc_df[self.cv_file_column].dropna().unique().tolist()
         print(f"[DOCUMENT PROCESSING] Processing {len(filepath_list)} unique files...")
 
-        tasks_config = []
-        for path in filepath_list:
-            is_string = isinstance(path, str)
-            exists = False
-            if is_string:
-                try:
-                    exists = os.path.exists(path)
-                except Exception as e:
-                    print(f"  Error checking path existence: {e}")
-
-            if is_string and exists:
-                tasks_config.append(
-                    {
-                        "file_path": path,
-                        "temporary_path": self.temporary_path,
-                        "doc_reader_path": self.doc_reader_path,
-                        "tesseract_path": self.tesseract_bin_path,
-                        "image_resolution": self.image_resolution,
-                        "n_char_min": self.n_char_min,
-                        "debug": self.debug,
-                    }
-                )
-            else:
-                print(
-                    "  Path is invalid or does not exist. Skipping."
-                )  # Modified message
-
-        print(f"[DOCUMENT PROCESSING] Number of tasks configured: {len(tasks_config)}")
         results_map = {}
-        with ProcessPoolExecutor(max_workers=cpu_count()) as executor:
-            future_to_config = {
-                executor.submit(process_single_file, config): config
-                for config in tasks_config
-            }
-
-            processed_count = 0
-            for future in as_completed(future_to_config):
-                config = future_to_config[future]
-                file_path = config["file_path"]
-                try:
-                    _fp, content, error, n_pages, dt = future.result(
-                        timeout=timeout_per_task
-                    )
-                    results_map[file_path] = (content, error, n_pages, dt)
-                    if error:
-                        print(f"Processed {file_path} with error: {error} in {dt:.2f}s")
-                except FutureTimeoutError:
-                    results_map[file_path] = (
-                        None,
-                        f"Timeout after {timeout_per_task}s",
-                        0,
-                        timeout_per_task,
-                    )
-                    print(f"Timeout processing {file_path}")
-                except Exception as exc:
-                    results_map[file_path] = (None, f"Future Error: {exc}", 0, 0.0)
-                    print(f"Error retrieving result for {file_path}: {exc}")
-
-                processed_count += 1
-                if processed_count % 10 == 0:
-                    print(f"Processed {processed_count}/{len(tasks_config)} files...")
+        processed_count = 0
+        for file_path, *result in self.iter_read(
+            filepath_list,
+            timeout_per_task=timeout_per_task,
+            executor=executor,
+            schedule=schedule,
+            progress=progress,
+        ):
+            results_map[file_path] = tuple(result)
+            processed_count += 1
+            if processed_count % 10 == 0:
+                print(f"Processed {processed_count}/{len(filepath_list)} files...")
 
         print(f"[DOCUMENT PROCESSING] Finished processing {len(results_map)} files.")
+        if self.cache is not None:
+            cache_hits = sum(
+                1 for result in results_map.values() if result[4].get("cache_hit")
+            )
+            print(
+                f"[DOCUMENT PROCESSING] Extraction cache hits: "
+                f"{cache_hits}/{len(results_map)}"
+            )
+        print(f"[DOCUMENT PROCESSING] Memo counters: {memo_stats()}")
 
         results_series = pd.Series(results_map, name="results").reindex(
             doc_df[self.cv_file_column]
@@ -349,20 +1037,23 @@ class Reader:
         error_list = []
         n_pages_list = []
         dt_list = []
+        stats_list = []
 
         for result_tuple in results_series:
-            if pd.notna(result_tuple):
-                content, error, n_pages, dt = result_tuple
+            if isinstance(result_tuple, tuple):
+                content, error, n_pages, dt, stats = result_tuple
                 content_list.append(content)
                 error_list.append(error)
                 n_pages_list.append(n_pages)
                 dt_list.append(dt)
+                stats_list.append(stats)
             else:
                 # Handle cases where reindex might have resulted in NaN (shouldn't happen based on logs, but safe)
                 content_list.append(None)
                 error_list.append("Path skipped or invalid")
                 n_pages_list.append(0)
                 dt_list.append(0.0)
+                stats_list.append({})
 
         try:
             doc_df["content"] = content_list
@@ -370,6 +1061,7 @@ class Reader:
             doc_df["n_pages"] = n_pages_list
             doc_df["n_pages"] = doc_df["n_pages"].astype("Int64")
             doc_df["dt"] = dt_list
+            doc_df["stats"] = stats_list
 
         except Exception as e:
             print(f"!!! Error during list assignment: {e}")
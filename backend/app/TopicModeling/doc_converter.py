@@ -0,0 +1,394 @@
+import atexit
+import multiprocessing
+import os
+import pathlib
+import queue
+import shutil
+import signal
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import util
+from multiprocessing.managers import BaseManager
+
+
+def _get_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def group_by_unique_stem(file_paths: list[str]) -> list[list[str]]:
+    """Split files into groups without two files of the same stem, in order.
+
+    LibreOffice names each output after the stem of its input, in a single output
+    directory, so files of the same stem must be converted by separate calls.
+    """
+    groups: list[tuple[list[str], set[str]]] = []
+    for file_path in file_paths:
+        stem = pathlib.PurePosixPath(file_path).stem
+        for group, stems in groups:
+            if stem not in stems:
+                group.append(file_path)
+                stems.add(stem)
+                break
+        else:
+            groups.append(([file_path], {stem}))
+    return [group for group, _ in groups]
+
+
+def converted_text_files(file_paths: list[str], outdir: str) -> dict[str, str]:
+    """Text file converted from each file found in ``outdir``."""
+    converted = {}
+    for file_path in file_paths:
+        text_file_path = os.path.join(
+            outdir, pathlib.PurePosixPath(file_path).stem + ".txt"
+        )
+        if os.path.exists(text_file_path):
+            converted[file_path] = text_file_path
+    return converted
+
+
+class SofficeWorker:
+    """A warm headless LibreOffice instance with its own user profile.
+
+    The instance listens on a local socket, which is only used to know when it is
+    ready. Conversions are sent with a regular ``soffice --convert-to`` call using
+    the same profile: LibreOffice hands the request over to the running instance
+    through its single-instance pipe instead of booting a new office.
+
+    The instance runs in its own process group, so that stopping it also stops
+    the soffice.bin process started by the soffice wrapper.
+    """
+
+    def __init__(
+        self,
+        soffice_path: str,
+        profile_dir: str,
+        max_conversions: int = 200,
+        timeout: float = 60.0,
+    ):
+        self.soffice_path = soffice_path
+        self.profile_dir = profile_dir
+        self.profile_url = pathlib.Path(profile_dir).absolute().as_uri()
+        self.max_conversions = max_conversions
+        self.timeout = timeout
+        self.port: int | None = None
+        self.conversions = 0
+        self._process: subprocess.Popen | None = None
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self) -> None:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        self.port = _get_free_port()
+        self.conversions = 0
+        self._process = subprocess.Popen(
+            [
+                self.soffice_path,
+                f"-env:UserInstallation={self.profile_url}",
+                "--headless",
+                "--invisible",
+                "--nologo",
+                "--norestore",
+                "--nodefault",
+                f"--accept=socket,host=127.0.0.1,port={self.port};urp;",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+        deadline = time.time() + self.timeout
+        while time.time() < deadline:
+            if self._process.poll() is not None:
+                raise OSError(
+                    f"soffice exited during startup (code {self._process.returncode})"
+                )
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        self.stop()
+        raise OSError(f"soffice did not start within {self.timeout}s")
+
+    def stop(self) -> None:
+        if self._process is None:
+            return
+        try:
+            self._signal_group(signal.SIGTERM)
+            self._process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+        except Exception:
+            pass
+        # Whatever is left of the group, e.g. a soffice.bin outliving the wrapper
+        self._signal_group(signal.SIGKILL)
+        self._process = None
+
+    def _signal_group(self, signum: int) -> None:
+        try:
+            os.killpg(self._process.pid, signum)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def restart(self) -> None:
+        self.stop()
+        self.start()
+
+    def convert(
+        self, file_paths: list[str], outdir: str
+    ) -> subprocess.CompletedProcess:
+        """Convert files to text in ``outdir`` through the running instance."""
+        if not self.is_alive() or self.conversions >= self.max_conversions:
+            self.restart()
+
+        try:
+            result = subprocess.run(
+                [
+                    self.soffice_path,
+                    f"-env:UserInstallation={self.profile_url}",
+                    "--headless",
+                    "--convert-to",
+                    "txt:Text",
+                    "--outdir",
+                    outdir,
+                    *file_paths,
+                ],
+                capture_output=True,
+                text=True,
+                timeout=self.timeout * max(1, len(file_paths)),
+                check=True,
+            )
+        except subprocess.TimeoutExpired:
+            # A hung conversion leaves the instance unusable
+            self.stop()
+            raise
+        self.conversions += len(file_paths)
+        return result
+
+
+class DocConverterPool:
+    """Fixed-size pool of warm soffice instances used to convert .doc files."""
+
+    def __init__(
+        self,
+        soffice_path: str,
+        size: int = 2,
+        work_dir: str = "tmp",
+        max_conversions: int = 200,
+        timeout: float = 60.0,
+    ):
+        self.soffice_path = soffice_path
+        self.size = max(1, size)
+        self.work_dir = os.path.join(work_dir, "soffice", str(os.getpid()))
+        self.max_conversions = max_conversions
+        self.timeout = timeout
+        self._workers: list[SofficeWorker] = []
+        self._idle: queue.Queue[SofficeWorker] = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+
+    @property
+    def available(self) -> bool:
+        return len(self._workers) > 0
+
+    def is_available(self) -> bool:
+        return self.available
+
+    def start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            for i in range(self.size):
+                worker = SofficeWorker(
+                    self.soffice_path,
+                    os.path.join(self.work_dir, f"profile_{i}"),
+                    max_conversions=self.max_conversions,
+                    timeout=self.timeout,
+                )
+                try:
+                    worker.start()
+                except Exception as e:
+                    print(f"[DOC CONVERTER] Could not start soffice worker {i}: {e}")
+                    continue
+                self._workers.append(worker)
+                self._idle.put(worker)
+            print(
+                f"[DOC CONVERTER] Started {len(self._workers)}/{self.size} soffice workers"
+            )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for worker in self._workers:
+                worker.stop()
+            self._workers = []
+            self._idle = queue.Queue()
+            self._started = False
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def convert(self, file_paths: list[str], outdir: str) -> dict[str, str]:
+        """Convert files with the first idle worker.
+
+        Returns a mapping of each input path to its converted text file, in a new
+        directory under ``outdir`` per call and per group of files of distinct
+        stems. Files that failed to convert are missing from the mapping; a worker
+        that died on a failure is restarted before going back to the pool.
+        """
+        worker = self._idle.get()
+        converted = {}
+        try:
+            for group in group_by_unique_stem(file_paths):
+                group_outdir = tempfile.mkdtemp(prefix="convert_", dir=outdir)
+                try:
+                    worker.convert(group, group_outdir)
+                except Exception as e:
+                    print(f"[DOC CONVERTER] Conversion failed for {group}: {e}")
+                    self._revive(worker)
+                converted.update(converted_text_files(group, group_outdir))
+        finally:
+            self._idle.put(worker)
+        return converted
+
+    @staticmethod
+    def _revive(worker: SofficeWorker) -> None:
+        if worker.is_alive():
+            return
+        try:
+            worker.restart()
+        except Exception as e:
+            # Tried again by its next conversion
+            print(f"[DOC CONVERTER] Could not restart soffice worker: {e}")
+
+    def convert_batch(
+        self, file_paths: list[str], outdir: str, batch_size: int = 20
+    ) -> dict[str, str]:
+        """Spread many files over all workers, ``batch_size`` files per call."""
+        batches = [
+            file_paths[i : i + batch_size]
+            for i in range(0, len(file_paths), batch_size)
+        ]
+        converted = {}
+        with ThreadPoolExecutor(max_workers=len(self._workers) or 1) as executor:
+            for result in executor.map(lambda b: self.convert(b, outdir), batches):
+                converted.update(result)
+        return converted
+
+
+_pools: dict[str, DocConverterPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_converter_pool(
+    soffice_path: str, size: int, work_dir: str = "tmp", max_conversions: int = 200
+) -> DocConverterPool | None:
+    """Return the process-wide converter pool, starting it on first use."""
+    if size <= 0 or not soffice_path or not os.path.exists(soffice_path):
+        return None
+    with _pools_lock:
+        pool = _pools.get(soffice_path)
+        if pool is None:
+            pool = DocConverterPool(
+                soffice_path, size, work_dir, max_conversions=max_conversions
+            )
+            _pools[soffice_path] = pool
+    pool.start()
+    return pool if pool.available else None
+
+
+class ConverterService(BaseManager):
+    """Process owning a converter pool shared by other processes, e.g. all the
+    extraction workers, so that they use DOC_CONVERTER_POOL_SIZE soffice
+    instances in total instead of a pool each. Worker processes that get killed
+    (timeouts) leave no soffice instance behind."""
+
+
+_service_pool: DocConverterPool | None = None
+
+
+def _start_service_pool(
+    soffice_path: str, size: int, work_dir: str, max_conversions: int
+) -> None:
+    global _service_pool
+    _service_pool = DocConverterPool(
+        soffice_path, size, work_dir, max_conversions=max_conversions
+    )
+    _service_pool.start()
+    # Run when the service process exits, atexit handlers are not
+    util.Finalize(_service_pool, _service_pool.shutdown, exitpriority=10)
+
+
+def _get_service_pool() -> DocConverterPool:
+    return _service_pool
+
+
+ConverterService.register(
+    "pool",
+    callable=_get_service_pool,
+    exposed=("convert", "convert_batch", "is_available"),
+)
+
+_services: dict[str, ConverterService] = {}
+_connections: dict[str, DocConverterPool | None] = {}
+
+
+def start_converter_service(
+    soffice_path: str, size: int, work_dir: str = "tmp", max_conversions: int = 200
+) -> str | None:
+    """Start the process owning the converter pool of ``soffice_path``, once.
+
+    Returns the address to give to connect_converter_service in other processes,
+    None without a usable soffice.
+    """
+    if size <= 0 or not soffice_path or not os.path.exists(soffice_path):
+        return None
+    with _pools_lock:
+        service = _services.get(soffice_path)
+        if service is None:
+            service = ConverterService(ctx=multiprocessing.get_context("spawn"))
+            service.start(
+                _start_service_pool,
+                (soffice_path, size, os.path.abspath(work_dir), max_conversions),
+            )
+            _services[soffice_path] = service
+            print(f"[DOC CONVERTER] Converter service started at {service.address}")
+    return service.address
+
+
+def connect_converter_service(address: str) -> DocConverterPool | None:
+    """Proxy to the converter pool of the service at ``address``, None when it has
+    no running soffice instance or cannot be reached."""
+    with _pools_lock:
+        if address not in _connections:
+            try:
+                service = ConverterService(address=address)
+                service.connect()
+                pool = service.pool()
+                _connections[address] = pool if pool.is_available() else None
+            except Exception as e:
+                print(f"[DOC CONVERTER] Could not reach the converter service: {e}")
+                return None
+        return _connections[address]
+
+
+@atexit.register
+def shutdown_converter_pools() -> None:
+    """Stop the converter pools of this process and the services it started."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown()
+        _pools.clear()
+        for service in _services.values():
+            try:
+                service.shutdown()
+            except Exception as e:
+                print(f"[DOC CONVERTER] Could not stop the converter service: {e}")
+        _services.clear()
+        _connections.clear()
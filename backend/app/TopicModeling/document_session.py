@@ -0,0 +1,93 @@
+import os
+import pathlib
+
+import fitz
+from PIL import Image
+
+PAGED_EXTENSIONS = (".pdf", ".xps")
+# First page renders used for previews: rendered at 4x (288 DPI) and kept at the
+# width of the largest preview
+PREVIEW_SCALE = 4
+PREVIEW_SOURCE_WIDTH = 1200
+
+
+class DocumentSession:
+    """A document opened once for every step of its processing.
+
+    Opening a PDF parses its cross-reference table and page tree, which is slow for
+    large or damaged files. The session opens it on first use and shares the open
+    document for the page count, the text of each page, the pages rendered for OCR
+    and the first page render used for previews. Files without pages (.txt, .doc,
+    .docx) and images are never opened.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.extension = pathlib.PurePosixPath(file_path).suffix.lower()
+        self._doc: fitz.Document | None = None
+        self._page_texts: list[str] | None = None
+        self._first_page: Image.Image | None = None
+
+    def __enter__(self) -> "DocumentSession":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
+
+    @property
+    def doc(self) -> fitz.Document:
+        if self._doc is None:
+            self._doc = fitz.open(self.file_path)
+        return self._doc
+
+    @property
+    def n_pages(self) -> int:
+        if self.extension == ".png":
+            return 1
+        if self.extension not in PAGED_EXTENSIONS:
+            return 0
+        try:
+            return self.doc.page_count
+        except Exception as e:
+            print(f"Warning: Could not get page count for {self.file_path}: {e}")
+            return 0
+
+    def page_texts(self) -> list[str]:
+        """Text layer of each page, extracted once."""
+        if self._page_texts is None:
+            self._page_texts = [page.get_text() for page in self.doc]
+        return self._page_texts
+
+    def render_first_page(self) -> Image.Image | None:
+        """First page rendered for previews, None for a document without pages."""
+        if self._first_page is None:
+            if self.extension not in PAGED_EXTENSIONS or self.doc.page_count == 0:
+                return None
+            pix = self.doc[0].get_pixmap(
+                matrix=fitz.Matrix(PREVIEW_SCALE, PREVIEW_SCALE)
+            )
+            mode = "RGB" if pix.n >= 3 else "L"
+            image = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+            if image.width > PREVIEW_SOURCE_WIDTH:
+                height = int(PREVIEW_SOURCE_WIDTH * image.height / image.width)
+                image = image.resize(
+                    (PREVIEW_SOURCE_WIDTH, height), Image.Resampling.LANCZOS
+                )
+            self._first_page = image
+        return self._first_page
+
+    def save_first_page(self, path: str) -> bool:
+        """Save the first page render, e.g. for the preview of a new upload."""
+        image = self.render_first_page()
+        if image is None:
+            return False
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        image.save(tmp_path, "PNG", compress_level=1)
+        os.replace(tmp_path, path)
+        return True
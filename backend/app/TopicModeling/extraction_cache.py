@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zlib
+
+
+def file_digest(file_path: str) -> str:
+    """SHA-256 of the file contents."""
+    with open(file_path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+class ExtractionCache:
+    """Persistent on-disk cache of extracted document text.
+
+    Entries are keyed by the SHA-256 of the file contents and the extraction
+    parameters, stored as one zlib-compressed JSON file each, and evicted in least
+    recently used order (using the file modification time, refreshed on every hit)
+    once the cache grows over ``max_size`` bytes. Several processes can share the
+    same directory: entries are written atomically.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int = 1024 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._entries())
+
+    @staticmethod
+    def make_key(file_path: str, **params) -> str:
+        """Build the cache key of a file for the given extraction parameters."""
+        return ExtractionCache.make_key_from_digest(file_digest(file_path), **params)
+
+    @staticmethod
+    def make_key_from_digest(content_digest: str, **params) -> str:
+        """make_key for a file whose file_digest is already known."""
+        digest = hashlib.sha256(content_digest.encode())
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json.z")
+
+    def _entries(self) -> list[tuple[str, int, float]]:
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json.z"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._entry_path(key))
+
+    def get(self, key: str) -> dict | None:
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = json.loads(zlib.decompress(f.read()))
+            os.utime(path)
+        except (OSError, ValueError, zlib.error):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: dict) -> None:
+        data = zlib.compress(json.dumps(entry).encode("utf-8"))
+        if len(data) > self.max_size:
+            return
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            # An entry overwritten with the same key no longer counts
+            try:
+                replaced_size = os.stat(path).st_size
+            except FileNotFoundError:
+                replaced_size = 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Extraction cache: could not write entry {key}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            self._size += len(data) - replaced_size
+            if self._size > self.max_size:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache is at 90% capacity."""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self._size = sum(size for _, size, _ in entries)
+        target = self.max_size * 0.9
+        for path, size, _ in entries:
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            for path, _, _ in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._size = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def counters(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": self._size,
+        }
+
+
+_caches: dict[str, ExtractionCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_extraction_cache(cache_dir: str, max_size: int) -> ExtractionCache:
+    """Return the process-wide cache instance for ``cache_dir``."""
+    with _caches_lock:
+        cache = _caches.get(cache_dir)
+        if cache is None:
+            cache = ExtractionCache(cache_dir, max_size)
+            _caches[cache_dir] = cache
+        return cache
@@ -0,0 +1,169 @@
+"""Clean-up of scanned pages before OCR: grayscale, adaptive binarization, deskew
+and border crop, all vectorized with NumPy.
+
+Tesseract is slow and inaccurate on grey, noisy or skewed scans with dark scanner
+borders, and the junk it produces then fails language detection in the miner.
+"""
+
+import numpy as np
+from PIL import Image
+
+# Local threshold window (pixels) and how much darker than the local mean a pixel
+# must be to count as ink
+BINARIZE_WINDOW = 31
+BINARIZE_OFFSET = 12
+# Skew angles tried, in degrees
+MAX_SKEW = 5.0
+SKEW_STEP = 0.25
+# Edge rows/columns with more dark pixels than this are scanner borders
+BORDER_DARK_LEVEL = 96
+BORDER_INK = 0.5
+# Rows/columns with less ink than this are margins (isolated specks are noise)
+CONTENT_INK = 0.01
+CROP_MARGIN = 10
+# Memory per pixel of a page rendered in RGB and preprocessed, in bytes: the
+# preprocessing peaks at 141 MB on a 300 DPI letter page (8.4 megapixels), see
+# benchmarks/ocr_preprocessing.py
+BYTES_PER_PIXEL = 20
+
+
+def to_gray(image: Image.Image) -> np.ndarray:
+    return np.asarray(image.convert("L"))
+
+
+def _window_sums(values: np.ndarray, half: int) -> np.ndarray:
+    """Sums of the rows from ``half`` above to ``half`` below each row, clipped at
+    the edges, as uint32.
+
+    The cumulative sums may wrap around on large pages, but their differences are
+    still exact as long as each window sum fits in 32 bits.
+    """
+    n = len(values)
+    cumulative = np.zeros((n + 1,) + values.shape[1:], dtype=np.uint32)
+    np.cumsum(values, axis=0, dtype=np.uint32, out=cumulative[1:])
+    sums = np.empty_like(cumulative[1:])
+    split = max(n - half, 0)
+    sums[:split] = cumulative[half + 1 :]
+    sums[split:] = cumulative[n]
+    if split > 1:
+        sums[half + 1 :] -= cumulative[1:split]
+    return sums
+
+
+def _window_sizes(n: int, half: int) -> np.ndarray:
+    positions = np.arange(n)
+    return (
+        np.minimum(positions + half + 1, n) - np.maximum(positions - half, 0)
+    ).astype(np.float32)
+
+
+def box_mean(gray: np.ndarray, window: int) -> np.ndarray:
+    """Mean of the ``window`` x ``window`` neighbourhood of each pixel, as float32.
+
+    Computed with running sums along the rows, then the columns, so the cost does
+    not depend on the window size and a page needs about three uint32 copies of
+    itself (100 MB at 300 DPI). Neighbourhoods are clipped at the image edges.
+    """
+    height, width = gray.shape
+    half = window // 2
+    sums = _window_sums(_window_sums(gray, half).T, half).T
+    mean = sums.astype(np.float32)
+    del sums
+    mean /= _window_sizes(height, half)[:, None]
+    mean /= _window_sizes(width, half)[None, :]
+    return mean
+
+
+def adaptive_binarize(
+    gray: np.ndarray, window: int = BINARIZE_WINDOW, offset: int = BINARIZE_OFFSET
+) -> np.ndarray:
+    """Threshold each pixel against the mean of its neighbourhood.
+
+    Unlike a global threshold, this copes with uneven lighting and grey paper.
+    Pixels are first averaged with their direct neighbours to smooth out scanner
+    noise. Returns a uint8 array with ink at 0 and paper at 255.
+    """
+    threshold = box_mean(gray, window)
+    threshold -= offset
+    ink = box_mean(gray, 3) < threshold
+    return np.where(ink, 0, 255).astype(np.uint8)
+
+
+def estimate_skew(
+    binary: np.ndarray, max_angle: float = MAX_SKEW, step: float = SKEW_STEP
+) -> float:
+    """Skew angle of the text lines, in degrees, by projection profile.
+
+    Ink pixels are projected on the vertical axis for every candidate angle: when
+    the angle matches the skew, text lines fall in few rows and the profile is the
+    most peaked (largest sum of squares).
+    """
+    ys, xs = np.nonzero(binary[::2, ::2] == 0)
+    if len(ys) < 100:
+        return 0.0
+    if len(ys) > 200_000:
+        keep = np.linspace(0, len(ys) - 1, 200_000).astype(np.int64)
+        ys, xs = ys[keep], xs[keep]
+    angles = np.arange(-max_angle, max_angle + step / 2, step)
+    best_angle, best_score = 0.0, -1.0
+    for angle in angles:
+        radians = np.deg2rad(angle)
+        rows = np.round(ys * np.cos(radians) - xs * np.sin(radians)).astype(np.int64)
+        profile = np.bincount(rows - rows.min())
+        score = float(np.dot(profile, profile))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def crop_borders(
+    binary: np.ndarray, gray: np.ndarray, margin: int = CROP_MARGIN
+) -> np.ndarray:
+    """Remove dark scanner borders and the empty margins around the text.
+
+    Borders are found on the gray page: binarization turns a solid dark band into
+    paper with a line of ink along its edge.
+    """
+    dark = gray < BORDER_DARK_LEVEL
+    row_ink = dark.mean(axis=1)
+    col_ink = dark.mean(axis=0)
+    # Scanner borders: solid dark bands along the edges
+    top, bottom = 0, len(row_ink)
+    while top < bottom and row_ink[top] > BORDER_INK:
+        top += 1
+    while bottom > top and row_ink[bottom - 1] > BORDER_INK:
+        bottom -= 1
+    left, right = 0, len(col_ink)
+    while left < right and col_ink[left] > BORDER_INK:
+        left += 1
+    while right > left and col_ink[right - 1] > BORDER_INK:
+        right -= 1
+    inner = binary[top:bottom, left:right] == 0
+    rows = np.flatnonzero(inner.mean(axis=1) > CONTENT_INK)
+    cols = np.flatnonzero(inner.mean(axis=0) > CONTENT_INK)
+    if len(rows) == 0 or len(cols) == 0:
+        return binary
+    y0 = top + max(rows[0] - margin, 0)
+    y1 = top + min(rows[-1] + margin + 1, inner.shape[0])
+    x0 = left + max(cols[0] - margin, 0)
+    x1 = left + min(cols[-1] + margin + 1, inner.shape[1])
+    return binary[y0:y1, x0:x1]
+
+
+def preprocess_for_ocr(image: Image.Image) -> Image.Image:
+    """Binarized, deskewed and cropped version of a scanned page."""
+    gray = to_gray(image)
+    binary = adaptive_binarize(gray)
+    angle = estimate_skew(binary)
+    if angle:
+        binary = np.asarray(
+            Image.fromarray(binary).rotate(
+                angle, resample=Image.Resampling.NEAREST, fillcolor=255
+            )
+        )
+        gray = np.asarray(
+            Image.fromarray(gray).rotate(
+                angle, resample=Image.Resampling.NEAREST, fillcolor=255
+            )
+        )
+    return Image.fromarray(crop_borders(binary, gray))
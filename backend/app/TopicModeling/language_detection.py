@@ -0,0 +1,120 @@
+"""Language detection on a few windows sampled from a document.
+
+langdetect cleans the whole text it is given (URL and e-mail regexes, Vietnamese
+normalization) before only looking at its first 10,000 characters, which makes
+detection on multi-megabyte documents slow, and blind to everything past the
+title pages. Windows taken at the start, middle and end of the document vote
+instead; detection stops as soon as a majority agrees.
+"""
+
+import threading
+from typing import Optional
+
+from langdetect import DetectorFactory
+from langdetect.detector_factory import PROFILES_DIRECTORY
+from langdetect.lang_detect_exception import LangDetectException
+
+from app.TopicModeling.memo import digest, get_memo
+
+LANGUAGES = ("fr", "en")
+WINDOW_SIZE = 2048
+N_WINDOWS = 3
+SEED = 0
+LANGUAGE_MEMO_SIZE = 1024 * 1024
+
+_factory: DetectorFactory | None = None
+_factory_lock = threading.Lock()
+
+
+def init_detector(seed: int = SEED) -> DetectorFactory:
+    """Factory of the detectors of this module, its language profiles loaded on
+    first use.
+
+    langdetect draws random n-grams: the seed makes detection deterministic. It is
+    set on this factory only, not on langdetect's shared one.
+    """
+    global _factory
+    with _factory_lock:
+        if _factory is None:
+            factory = DetectorFactory()
+            factory.load_profile(PROFILES_DIRECTORY)
+            factory.set_seed(seed)
+            _factory = factory
+        return _factory
+
+
+def sample_windows(
+    text: str, window_size: int = WINDOW_SIZE, n_windows: int = N_WINDOWS
+) -> list[str]:
+    """Windows of ``window_size`` characters spread evenly over the text, start
+    and end included, cut on whitespace. A short text is a single window.
+    """
+    if len(text) <= window_size * n_windows or n_windows < 2:
+        return [text]
+    step = (len(text) - window_size) / (n_windows - 1)
+    windows = []
+    for i in range(n_windows):
+        start = int(i * step)
+        if start > 0:
+            space = text.find(" ", start, start + window_size // 4)
+            start = space + 1 if space >= 0 else start
+        stop = start + window_size
+        if stop < len(text):
+            space = text.rfind(" ", stop - window_size // 4, stop)
+            stop = space if space > start else stop
+        windows.append(text[start:stop])
+    # Vote with the ends first: most documents agree there and skip the middle
+    return [windows[0], windows[-1], *windows[1:-1]]
+
+
+def detect_window(text: str) -> tuple[Optional[str], float]:
+    """Most probable of LANGUAGES in ``text`` and its probability."""
+    detector = init_detector().create()
+    detector.append(text)
+    try:
+        probabilities = detector.get_probabilities()
+    except LangDetectException:
+        return None, 0.0
+    return next(
+        ((item.lang, item.prob) for item in probabilities if item.lang in LANGUAGES),
+        (None, 0.0),
+    )
+
+
+def vote(text: str, window_size: int = WINDOW_SIZE, n_windows: int = N_WINDOWS):
+    """Language of ``text`` voted by its windows, None if no window is detected."""
+    return vote_windows(sample_windows(text, window_size, n_windows))
+
+
+def vote_windows(windows: list[str]) -> Optional[str]:
+    """Stops once a language holds a majority of the windows; otherwise the
+    language with the highest total probability wins.
+    """
+    votes: dict[str, int] = {}
+    scores: dict[str, float] = {}
+    for window in windows:
+        language, probability = detect_window(window)
+        if language is None:
+            continue
+        votes[language] = votes.get(language, 0) + 1
+        scores[language] = scores.get(language, 0.0) + probability
+        if votes[language] * 2 > len(windows):
+            return language
+    if not scores:
+        return None
+    return max(scores, key=scores.get)
+
+
+def detect_language(text: str) -> Optional[str]:
+    """Language of a document ("EN", "FR") or None, sampled and memoized.
+
+    The result only depends on the windows, so they are the memo key: long
+    documents are not hashed in full.
+    """
+    windows = sample_windows(text)
+
+    def detect() -> Optional[str]:
+        language = vote_windows(windows)
+        return language.upper() if language else None
+
+    return get_memo("languages", LANGUAGE_MEMO_SIZE).cached(digest(*windows), detect)
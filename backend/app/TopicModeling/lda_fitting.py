@@ -0,0 +1,218 @@
+"""Batch LDA fit that stops once the perplexity plateaus, with per-iteration telemetry.
+
+``LatentDirichletAllocation.fit`` only stops early when the perplexity changes by
+less than an absolute ``perp_tol`` (0.1) between evaluations, on perplexities in
+the hundreds or thousands, so it runs far more iterations than needed. ``fit_lda``
+runs the same variational EM steps but stops once the perplexity improved by less
+than a relative tolerance since the previous evaluation, after a minimum number of
+iterations.
+
+Each iteration is written to a JSON lines log, one object per line, overwritten at
+each fit or fold-in of new documents: a "start" event with the mode of the run, an
+"iteration" event with its wall time (and the perplexity when evaluated), and an
+"end" event, with the error when the run failed. The log is read by other
+processes for the progress of a running fit, see ``lda_progress``.
+
+The EM steps are private methods of ``LatentDirichletAllocation``, which is why
+scikit-learn is pinned to an exact version. ``check_private_api`` fails loudly when
+an upgrade removes one of them or one of the parameters passed here.
+"""
+
+import inspect
+import json
+import os
+import time
+
+import numpy as np
+import sklearn
+from joblib import effective_n_jobs
+from sklearn.decomposition import LatentDirichletAllocation
+from sklearn.utils.parallel import Parallel
+
+# Private LatentDirichletAllocation methods run by fit_lda, with the parameters it
+# passes to them
+PRIVATE_API = {
+    "_validate_params": (),
+    "_check_non_neg_array": ("X", "reset_n_features", "whom"),
+    "_init_latent_vars": ("n_features", "dtype"),
+    "_em_step": ("X", "total_samples", "batch_update", "parallel"),
+    "_e_step": ("X", "cal_sstats", "random_init", "parallel"),
+    "_perplexity_precomp_distr": ("X", "doc_topic_distr", "sub_sampling"),
+}
+
+
+def check_private_api() -> None:
+    """Raise a RuntimeError if the installed scikit-learn lacks a private method
+    of PRIVATE_API or one of its parameters."""
+    for name, parameters in PRIVATE_API.items():
+        method = getattr(LatentDirichletAllocation, name, None)
+        if method is not None and set(parameters) <= set(
+            inspect.signature(method).parameters
+        ):
+            continue
+        raise RuntimeError(
+            f"fit_lda needs LatentDirichletAllocation.{name}({', '.join(parameters)}), "
+            f"which scikit-learn {sklearn.__version__} does not have: use the "
+            "version pinned in pyproject.toml"
+        )
+
+
+class LdaTelemetry:
+    """JSON lines log of the iterations of a fit, in ``path``."""
+
+    def __init__(self, path: str | None):
+        self.path = path
+        self._file = None
+
+    def start(self, mode: str = "fit", **fields) -> None:
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._write("start", time=time.time(), mode=mode, **fields)
+
+    def iteration(self, iteration: int, seconds: float, perplexity: float | None):
+        self._write(
+            "iteration", iteration=iteration, seconds=seconds, perplexity=perplexity
+        )
+
+    def end(self, **fields) -> None:
+        self._write("end", time=time.time(), **fields)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, event: str, **fields) -> None:
+        if self._file is None:
+            return
+        self._file.write(json.dumps({"event": event, **fields}) + "\n")
+        self._file.flush()
+
+
+def fit_lda(
+    lda: LatentDirichletAllocation,
+    X,
+    tol: float = 1e-3,
+    min_iter: int = 10,
+    evaluate_every: int = 5,
+    telemetry: LdaTelemetry | None = None,
+) -> LatentDirichletAllocation:
+    """Fit ``lda`` on X with batch variational Bayes, like ``lda.fit(X)`` with the
+    batch learning method, for at most ``lda.max_iter`` iterations.
+
+    Every ``evaluate_every`` iterations, the perplexity of X is computed; once at
+    least ``min_iter`` iterations ran, the fit stops when it decreased by less than
+    ``tol`` (relative) since the previous evaluation. ``lda.n_iter_`` is the number
+    of iterations run and ``lda.bound_`` the final perplexity, as after fit.
+    """
+    check_private_api()
+    telemetry = telemetry or LdaTelemetry(None)
+    lda._validate_params()
+    X = lda._check_non_neg_array(
+        X, reset_n_features=True, whom="LatentDirichletAllocation.fit"
+    )
+    n_samples, n_features = X.shape
+    lda._init_latent_vars(n_features, dtype=X.dtype)
+    telemetry.start(
+        max_iter=lda.max_iter,
+        n_documents=n_samples,
+        n_terms=n_features,
+        n_topics=lda.n_components,
+    )
+
+    start_time = time.perf_counter()
+    last_perplexity = None
+    converged = False
+    error = None
+    try:
+        with Parallel(n_jobs=effective_n_jobs(lda.n_jobs)) as parallel:
+            for i in range(lda.max_iter):
+                iteration_start = time.perf_counter()
+                lda._em_step(
+                    X, total_samples=n_samples, batch_update=True, parallel=parallel
+                )
+                lda.n_iter_ += 1
+
+                perplexity = None
+                if evaluate_every > 0 and (i + 1) % evaluate_every == 0:
+                    doc_topic_distr, _ = lda._e_step(
+                        X, cal_sstats=False, random_init=False, parallel=parallel
+                    )
+                    perplexity = float(
+                        lda._perplexity_precomp_distr(
+                            X, doc_topic_distr, sub_sampling=False
+                        )
+                    )
+                telemetry.iteration(
+                    i + 1, time.perf_counter() - iteration_start, perplexity
+                )
+                if perplexity is None:
+                    continue
+                print(
+                    f"[LDA] Iteration {i + 1} of {lda.max_iter}, "
+                    f"perplexity: {perplexity:.4f}"
+                )
+                if (
+                    last_perplexity is not None
+                    and i + 1 >= min_iter
+                    and (last_perplexity - perplexity) < tol * last_perplexity
+                ):
+                    converged = True
+                    break
+                last_perplexity = perplexity
+
+            doc_topic_distr, _ = lda._e_step(
+                X, cal_sstats=False, random_init=False, parallel=parallel
+            )
+        lda.bound_ = lda._perplexity_precomp_distr(
+            X, doc_topic_distr, sub_sampling=False
+        )
+    except BaseException as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        seconds = time.perf_counter() - start_time
+        telemetry.end(
+            iterations=lda.n_iter_,
+            converged=converged,
+            perplexity=None if error else float(lda.bound_),
+            seconds=seconds,
+            error=error,
+        )
+    print(
+        f"[LDA] {'Converged' if converged else 'Stopped'} after {lda.n_iter_} "
+        f"iterations in {seconds:.2f}s, perplexity: {lda.bound_:.4f}"
+    )
+    return lda
+
+
+def lda_progress(path: str) -> dict | None:
+    """Summary of the running or last fit logged in ``path``, None without one."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            events = [json.loads(line) for line in f if line.endswith("\n")]
+    except (OSError, ValueError):
+        return None
+    if not events or events[0]["event"] != "start":
+        return None
+    start = events[0]
+    iterations = [event for event in events if event["event"] == "iteration"]
+    perplexities = [
+        event["perplexity"] for event in iterations if event["perplexity"] is not None
+    ]
+    end = events[-1] if events[-1]["event"] == "end" else None
+    return {
+        "mode": start.get("mode", "fit"),
+        "iterations": len(iterations),
+        "max_iter": start["max_iter"],
+        "seconds_per_iteration": (
+            float(np.mean([event["seconds"] for event in iterations]))
+            if iterations
+            else 0.0
+        ),
+        "elapsed_seconds": end["seconds"] if end else time.time() - start["time"],
+        "perplexity": end["perplexity"] if end else (perplexities or [None])[-1],
+        "converged": bool(end and end["converged"]),
+        "done": end is not None,
+        "error": end.get("error") if end else None,
+    }
@@ -0,0 +1,165 @@
+"""Precomputed, memory-mapped lookup table of WordNet noun lemmas.
+
+Loading WordNet takes seconds and tens of MB in every worker process, while the
+miner only ever calls ``WordNetLemmatizer.lemmatize(word)`` (nouns). The table
+holds every word whose lemma differs from the word itself, built once from
+WordNet, and is memory-mapped read-only so all processes share the same pages.
+A word missing from the table is its own lemma.
+"""
+
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from bisect import bisect_left
+
+import numpy as np
+
+MAGIC = b"LEMMAS01"
+HEADER = struct.Struct("<8sQQQ")  # magic, entries, keys size, values size
+
+
+class _Strings:
+    """Sequence view on the strings of a blob, for bisect."""
+
+    def __init__(self, blob: memoryview, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> bytes:
+        return bytes(self.blob[self.offsets[i] : self.offsets[i + 1]])
+
+
+class LemmaTable:
+    """Read-only word -> lemma table backed by a memory-mapped file.
+
+    Layout: header, key offsets and value offsets (uint32, entries + 1 each), then
+    the UTF-8 keys (sorted) and values blobs. Lookups are binary searches.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n_entries, keys_size, values_size = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a lemma table")
+        position = HEADER.size
+        key_offsets = np.frombuffer(
+            self._mmap, dtype="<u4", count=n_entries + 1, offset=position
+        )
+        position += key_offsets.nbytes
+        value_offsets = np.frombuffer(
+            self._mmap, dtype="<u4", count=n_entries + 1, offset=position
+        )
+        position += value_offsets.nbytes
+        view = memoryview(self._mmap)
+        self._keys = _Strings(view[position : position + keys_size], key_offsets)
+        position += keys_size
+        self._values = _Strings(view[position : position + values_size], value_offsets)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get(self, word: str, default: str | None = None) -> str | None:
+        key = word.encode("utf-8")
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return self._values[i].decode("utf-8")
+        return default
+
+    def __contains__(self, word: str) -> bool:
+        return self.get(word) is not None
+
+    @staticmethod
+    def write(path: str, lemmas: dict[str, str]) -> None:
+        """Write a table atomically."""
+        keys = sorted(word.encode("utf-8") for word in lemmas)
+        values = [lemmas[key.decode("utf-8")].encode("utf-8") for key in keys]
+        key_offsets = np.zeros(len(keys) + 1, dtype="<u4")
+        key_offsets[1:] = np.cumsum([len(key) for key in keys])
+        value_offsets = np.zeros(len(values) + 1, dtype="<u4")
+        value_offsets[1:] = np.cumsum([len(value) for value in values])
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(
+                    HEADER.pack(
+                        MAGIC, len(keys), int(key_offsets[-1]), int(value_offsets[-1])
+                    )
+                )
+                f.write(key_offsets.tobytes())
+                f.write(value_offsets.tobytes())
+                f.write(b"".join(keys))
+                f.write(b"".join(values))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def wordnet_noun_lemmas() -> dict[str, str]:
+    """Every word that WordNetLemmatizer.lemmatize maps to a different word.
+
+    Candidates are all noun lemma names, the forms WordNet's noun substitution
+    rules map back to them (plurals, "-ful" compounds) and the noun exceptions;
+    each one is checked against the real lemmatizer.
+    """
+    from nltk.corpus import wordnet as wn
+    from nltk.stem import WordNetLemmatizer
+
+    lemmatizer = WordNetLemmatizer()
+    substitutions = wn.MORPHOLOGICAL_SUBSTITUTIONS[wn.NOUN]
+    names = {name.lower() for name in wn.all_lemma_names(pos=wn.NOUN)}
+
+    def inflections(name: str):
+        for old, new in substitutions:
+            if name.endswith(new):
+                yield name[: len(name) - len(new)] + old
+
+    candidates = set(names)
+    candidates.update(wn._exception_map[wn.NOUN])
+    for name in names:
+        candidates.update(inflections(name))
+        if name.endswith("ful"):
+            candidates.update(form + "ful" for form in inflections(name[:-3]))
+
+    lemmas = {}
+    for word in candidates:
+        lemma = lemmatizer.lemmatize(word)
+        if lemma != word:
+            lemmas[word] = lemma
+    return lemmas
+
+
+_tables: dict[str, LemmaTable] = {}
+_tables_lock = threading.Lock()
+
+
+def get_lemma_table(path: str) -> LemmaTable:
+    """Return the process-wide table at ``path``, building it first if needed.
+
+    Processes starting together wait on a file lock while the first one builds.
+    """
+    with _tables_lock:
+        table = _tables.get(path)
+        if table is not None:
+            return table
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(f"{path}.lock", "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                if not os.path.exists(path):
+                    print(f"[MINER] Building the lemma table {path}...")
+                    LemmaTable.write(path, wordnet_noun_lemmas())
+        table = LemmaTable(path)
+        _tables[path] = table
+        return table
@@ -0,0 +1,145 @@
+"""Memoization of text processing results, keyed by a digest of the inputs.
+
+Keys are content digests rather than the inputs themselves, so a memo never holds
+whole documents, and memory is capped in bytes rather than in entries. A memo can
+be backed by an ExtractionCache directory, shared by all the worker processes, for
+results that are JSON serializable.
+"""
+
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+from app.TopicModeling.extraction_cache import ExtractionCache
+
+T = TypeVar("T")
+
+
+def digest(*parts) -> str:
+    """Digest of strings, bytes or other values (by their repr)."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, str):
+            data = part.encode("utf-8", "surrogatepass")
+        elif isinstance(part, (bytes, bytearray, memoryview)):
+            data = part
+        else:
+            data = repr(part).encode("utf-8")
+        # Length prefix, so ("ab", "c") and ("a", "bc") differ
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+class Memo:
+    """Least recently used memo of at most ``max_bytes`` (keys and values as counted
+    by sys.getsizeof), optionally backed by a shared on-disk ``store``.
+    """
+
+    def __init__(self, max_bytes: int, store: ExtractionCache | None = None):
+        self.max_bytes = max_bytes
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self.store_hits = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: OrderedDict[str, tuple[Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        """(True, value) for a known key, (False, None) otherwise."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[0]
+        if self.store is not None:
+            stored = self.store.get(key)
+            if stored is not None:
+                self._remember(key, stored["value"])
+                with self._lock:
+                    self.store_hits += 1
+                return True, stored["value"]
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def put(self, key: str, value: Any) -> None:
+        self._remember(key, value)
+        if self.store is not None:
+            self.store.put(key, {"value": value})
+
+    def cached(self, key: str, compute: Callable[[], T]) -> T:
+        """The value of ``key``, computed and remembered if unknown."""
+        found, value = self.get(key)
+        if not found:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _remember(self, key: str, value: Any) -> None:
+        size = sys.getsizeof(key) + sys.getsizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+
+_memos: dict[tuple[str, str | None], Memo] = {}
+_memos_lock = threading.Lock()
+
+
+def get_memo(
+    name: str, max_bytes: int, store_dir: str | None = None, store_max_bytes: int = 0
+) -> Memo:
+    """Return the process-wide memo ``name`` of ``store_dir``, created on first use.
+
+    With ``store_dir``, results are also kept on disk, up to ``store_max_bytes``.
+    """
+    key = (name, os.path.abspath(store_dir) if store_dir else None)
+    with _memos_lock:
+        memo = _memos.get(key)
+        if memo is None:
+            store = ExtractionCache(store_dir, store_max_bytes) if store_dir else None
+            memo = Memo(max_bytes, store)
+            _memos[key] = memo
+        return memo
+
+
+def memo_stats() -> dict[str, dict]:
+    """Counters of every memo of this process."""
+    with _memos_lock:
+        return {
+            name if store_dir is None else f"{name} ({store_dir})": memo.stats
+            for (name, store_dir), memo in _memos.items()
+        }
@@ -1,18 +1,29 @@
+import os
 import re
-from functools import lru_cache
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from collections.abc import Iterable, Iterator
+from itertools import chain
+from multiprocessing import cpu_count
 
 # from nltk.stem.snowball import FrenchStemmer, DutchStemmer
 from typing import Optional
 
-import langdetect
 import nltk
+import numpy as np
 import pandas as pd
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 
-URL_PATTERN = re.compile(
-    r"(?:http(?:s)?:\/\/)?[\w.-]+(?:\.[\w\.-]+)+[\w\-\._~:/?#[\]@!\$&\'\(\)\*\+,;=.]+"
-)
+from app.TopicModeling.language_detection import detect_language as sampled_language
+from app.TopicModeling.lemma_table import get_lemma_table
+from app.TopicModeling.memo import digest, get_memo
+from app.TopicModeling.token_arrays import MIN_TOKEN_LENGTH
+from app.TopicModeling.token_arrays import TOKEN_PATTERN as VECTORIZER_TOKEN_PATTERN
+from app.TopicModeling.token_arrays import TokenArray
+
+URL_BODY = r"[\w.-]+(?:\.[\w\.-]+)+[\w\-\._~:/?#[\]@!\$&\'\(\)\*\+,;=.]+"
+URL_PATTERN = re.compile(r"(?:http(?:s)?:\/\/)?" + URL_BODY)
 NORMALIZE_PATTERNS = [
     (re.compile(r"\W"), " "),
     (re.compile(r"\d"), " "),
@@ -20,46 +31,85 @@ NORMALIZE_PATTERNS = [
 ]
 
 
-@lru_cache(maxsize=1000)
 def detect_language(text: str) -> Optional[str]:
-    """Cache language detection results for performance"""
+    """Language sampled from a few windows of the text, cached by content hash"""
     try:
-        res = langdetect.detect_langs(text)
-        return next(
-            (item.lang.upper() for item in res if item.lang in ("fr", "en")), None
-        )
+        return sampled_language(text)
     except Exception as e:
         print(f"Miner.detect_language: {str(e)}")
         return None
 
 
-@lru_cache(maxsize=1000)
-def substitute_url(text: str, substituted_url: str = "URL") -> str:
-    """Cache URL substitution results"""
-    return URL_PATTERN.sub(substituted_url, text)
+# One scan over the text: URLs are matched and dropped, the runs of word characters
+# other than digits are the tokens. The lookahead skips the URL pattern where no
+# "." follows, and a run is cut before an "http(s)://" starting a URL, which the
+# cascade would have replaced in the middle of the run.
+TOKEN_PATTERN = re.compile(
+    rf"(?=(?:https?://)?[\w-]*\.)(?:{URL_PATTERN.pattern})"
+    rf"|((?:[^\W\dh]++|h(?!ttps?://{URL_BODY}))+)"
+)
+
+
+def iter_tokens(text: str) -> Iterator[str]:
+    """Lowercased tokens of ``text``, as ``normalize(text).split()``."""
+    for token in TOKEN_PATTERN.findall(text):
+        if token:
+            yield token.lower()
+
+
+def iter_raw_tokens(text: str) -> Iterator[str]:
+    """Tokens of a text that is not mined, as the vectorizer splits it."""
+    return iter(VECTORIZER_TOKEN_PATTERN.findall(text.lower()))
 
 
 def normalize(text: str) -> str:
-    """Optimize text normalization with pre-compiled patterns"""
+    """URLs, digits and non-word characters replaced by single spaces, lowercased.
+
+    Single pass equivalent of normalize_cascade.
+    """
     try:
-        normalized = substitute_url(text, " ")
-        for pattern, replacement in NORMALIZE_PATTERNS:
-            normalized = pattern.sub(replacement, normalized)
-        return normalized.lower().strip()
+        return " ".join(filter(None, TOKEN_PATTERN.findall(text))).lower()
     except Exception as e:
         print(f"normalize: {str(e)}")
         return ""
 
 
+def normalize_cascade(text: str) -> str:
+    """Reference normalization, one regex substitution per step."""
+    normalized = URL_PATTERN.sub(" ", text)
+    for pattern, replacement in NORMALIZE_PATTERNS:
+        normalized = pattern.sub(replacement, normalized)
+    return normalized.lower().strip()
+
+
+# Distinct words whose lemma a Miner remembers before starting over
+LEMMA_MEMO_SIZE = 500_000
+# Bytes of mined documents each process remembers
+MINED_TOKENS_MEMO_SIZE = 64 * 1024 * 1024
+
+
 class Miner:
-    def __init__(self):
-        for resource in ["wordnet", "stopwords"]:
+    def __init__(self, lemma_table_path: Optional[str] = None):
+        """With ``lemma_table_path``, lemmas are looked up in the shared lemma table
+        (built from WordNet on first use) and WordNet is not loaded in this process.
+        """
+        resources = ["stopwords"]
+        if lemma_table_path is None or not os.path.exists(lemma_table_path):
+            resources.append("wordnet")
+        for resource in resources:
             try:
                 nltk.data.find(f"corpora/{resource}")
             except LookupError:
                 nltk.download(resource, quiet=True)
 
-        self.lemmatizer = WordNetLemmatizer()
+        self.lemma_table_path = lemma_table_path
+        if lemma_table_path is not None:
+            self.lemma_table = get_lemma_table(lemma_table_path)
+            self.lemmatizer = None
+        else:
+            self.lemma_table = None
+            self.lemmatizer = WordNetLemmatizer()
+        self._lemmas: dict[str, str] = {}
         self.stopwords = {
             "EN": set(stopwords.words("english")),
             "FR": set(stopwords.words("french")),
@@ -67,24 +117,195 @@ class Miner:
 
         self.word_split = re.compile(r"\s+")
 
-    @lru_cache(maxsize=1000)
+    def lemmatize_word(self, word: str) -> str:
+        lemma = self._lemmas.get(word)
+        if lemma is None:
+            if self.lemma_table is not None:
+                lemma = self.lemma_table.get(word, word)
+            else:
+                lemma = self.lemmatizer.lemmatize(word)
+            if len(self._lemmas) >= LEMMA_MEMO_SIZE:
+                self._lemmas.clear()
+            self._lemmas[word] = lemma
+        return lemma
+
+    def lemmatize_vocabulary(self, words: Iterable[str]) -> dict[str, str]:
+        """Lemma of each distinct word, each one lemmatized once."""
+        return {word: self.lemmatize_word(word) for word in set(words)}
+
     def lemmatize(self, text: str) -> str:
-        """Cache lemmatisation results"""
-        return " ".join(
-            self.lemmatizer.lemmatize(word) for word in self.word_split.split(text)
-        )
+        words = text.split()
+        lemmas = self.lemmatize_vocabulary(words)
+        return " ".join(lemmas[word] for word in words)
 
     def delete_stop_words(self, language: str, text: str) -> str:
-        """Optimize stop words removal with sets"""
+        """Remove stop words, keeping the order and repetitions of the others"""
         if language not in self.stopwords:
             return text
-        words = set(self.word_split.split(text)) - self.stopwords[language]
-        return " ".join(words)
+        stop_words = self.stopwords[language]
+        return " ".join(
+            word for word in self.word_split.split(text) if word not in stop_words
+        )
+
+    def encode(
+        self, token_batches: Iterable[Iterable[str]], language: Optional[str]
+    ) -> TokenArray:
+        """Lemmatize tokens and drop stop words into a TokenArray, in text order.
+
+        Each distinct token is lemmatized and checked once.
+        """
+        stop_words = self.stopwords.get(language, set())
+        token_ids: dict[str, int] = {}  # token -> word id, -1 when dropped
+        word_ids: dict[str, int] = {}
+        ids = array("I")
+        for tokens in token_batches:
+            for token in tokens:
+                word_id = token_ids.get(token)
+                if word_id is None:
+                    lemma = self.lemmatize_word(token)
+                    if len(lemma) < MIN_TOKEN_LENGTH or lemma in stop_words:
+                        word_id = -1
+                    else:
+                        word_id = word_ids.setdefault(lemma, len(word_ids))
+                    token_ids[token] = word_id
+                if word_id >= 0:
+                    ids.append(word_id)
+        return TokenArray(list(word_ids), np.frombuffer(ids, dtype=np.uint32))
+
+    def mine_tokens(self, text: str) -> TokenArray:
+        """Lemmatized tokens of a text without its stop words, in order.
+
+        When the language is unknown, the text is not mined, as by mine_text: its
+        tokens are those the vectorizer finds in it, not lemmatized, stop words and
+        digits included. Memoized by content, for documents uploaded or extracted
+        several times.
+        """
+        return get_memo("mined_tokens", MINED_TOKENS_MEMO_SIZE).cached(
+            digest(self.lemma_table_path, text),
+            lambda: self._mine_batches([text], detect_language(text)),
+        )
+
+    def mine_segments(
+        self, segments, language_sample_size: int = 100_000
+    ) -> TokenArray:
+        """mine_tokens over a text given in segments, never holding the whole text.
+
+        The language is detected on the first ``language_sample_size`` characters.
+        """
+        segments = iter(segments)
+        sample = []
+        sample_length = 0
+        for segment in segments:
+            sample.append(segment)
+            sample_length += len(segment)
+            if sample_length >= language_sample_size:
+                break
+        language = detect_language("".join(sample)[:language_sample_size])
+
+        def text_batches():
+            carry = ""
+            for segment in chain(sample, segments):
+                # Split on the last whitespace so no word is cut between two segments
+                segment = carry + segment
+                cut = max(segment.rfind(" "), segment.rfind("\n"), segment.rfind("\t"))
+                if cut < 0 and len(segment) > 1024 * 1024:
+                    cut = len(segment) - 1  # No whitespace at all, cut anyway
+                carry = segment[cut + 1 :]
+                yield segment[: cut + 1]
+            yield carry
+
+        return self._mine_batches(text_batches(), language)
+
+    def _mine_batches(
+        self, batches: Iterable[str], language: Optional[str]
+    ) -> TokenArray:
+        if language is None:
+            return TokenArray.from_tokens(
+                chain.from_iterable(map(iter_raw_tokens, batches))
+            )
+        return self.encode(map(iter_tokens, batches), language)
+
+    def mine_document(self, text: str, keep_intermediate: bool = True) -> dict:
+        """Every column ``mine`` computes for one document, in one pass."""
+        language = detect_language(text)
+        if language is None:
+            return {"error": "Miner:Cannot detect language"}
+        stripped = normalize(text)
+        lemmatized = self.lemmatize(stripped)
+        row = {
+            "language": language,
+            "without_stop_words": self.delete_stop_words(language, lemmatized),
+        }
+        if keep_intermediate:
+            row["stripped"] = stripped
+            row["lemmatized"] = lemmatized
+        return row
+
+    def mine_batch(
+        self,
+        doc_df: pd.DataFrame,
+        content_column_name: str = "content",
+        workers: int = 0,
+        keep_intermediate: bool = False,
+    ) -> pd.DataFrame:
+        """``mine`` with the documents sharded over ``workers`` processes (0 = all
+        cores), each document mined in one pass by mine_document.
+
+        The DataFrame is not deep copied, and without ``keep_intermediate`` the
+        "stripped" and "lemmatized" columns are left out.
+        """
+        print("[MINER] Mining documents in batch mode...")
+        result_df = doc_df.copy(deep=False)
+        mask = result_df["error"].isnull().to_numpy()
+        columns = ["language", "without_stop_words"]
+        if keep_intermediate:
+            columns += ["stripped", "lemmatized"]
+        positions = np.flatnonzero(mask)
+        if len(positions) == 0:
+            return result_df
+
+        texts = result_df[content_column_name].to_numpy()[positions]
+        shards = shard_by_size(texts, (workers or cpu_count()) * SHARDS_PER_WORKER)
+        with ProcessPoolExecutor(
+            max_workers=workers or cpu_count(),
+            initializer=_init_mine_worker,
+            initargs=(self.lemma_table_path,),
+        ) as executor:
+            futures = [
+                executor.submit(_mine_shard, list(texts[shard]), keep_intermediate)
+                for shard in shards
+            ]
+            rows = [None] * len(texts)
+            for shard, future in zip(shards, futures):
+                for i, row in zip(shard, future.result()):
+                    rows[i] = row
+
+        for column in columns + ["error"]:
+            values = (
+                result_df[column].to_numpy(dtype=object, copy=True)
+                if column in result_df.columns
+                else np.full(len(result_df), None, dtype=object)
+            )
+            values[positions] = [row.get(column) for row in rows]
+            # A new column, so the caller's DataFrame is left untouched
+            result_df[column] = values
+        return result_df
 
     def mine(
-        self, doc_df: pd.DataFrame, content_column_name: str = "content"
+        self,
+        doc_df: pd.DataFrame,
+        content_column_name: str = "content",
+        workers: int = 1,
+        keep_intermediate: bool = True,
     ) -> pd.DataFrame:
-        """Optimize mining process with vectorized operations"""
+        """Optimize mining process with vectorized operations
+
+        With more than one worker (0 = all cores), see mine_batch.
+        """
+        if workers != 1:
+            return self.mine_batch(
+                doc_df, content_column_name, workers, keep_intermediate
+            )
         print("[MINER] Mining documents...")
         result_df = doc_df.copy()
 
@@ -109,9 +330,15 @@ class Miner:
         ].apply(normalize)
         strip_mask = result_df["stripped"].notnull()
 
-        result_df.loc[mask & lang_mask & strip_mask, "lemmatized"] = result_df[
-            "stripped"
-        ][mask & lang_mask & strip_mask].apply(self.lemmatize)
+        # Lemmatize the vocabulary of the batch once, then map each document
+        stripped = result_df["stripped"][mask & lang_mask & strip_mask]
+        tokens = stripped.apply(str.split)
+        lemmas = self.lemmatize_vocabulary(
+            word for document in tokens for word in document
+        )
+        result_df.loc[mask & lang_mask & strip_mask, "lemmatized"] = tokens.apply(
+            lambda document: " ".join(lemmas[word] for word in document)
+        )
         lem_mask = result_df["lemmatized"].notnull()
 
         result_df.loc[
@@ -144,3 +371,38 @@ class Miner:
         except Exception as e:
             print(f"Miner.mine_text: {str(e)}")
             return text
+
+
+# Shards per worker process in Miner.mine_batch, so workers finishing early can
+# take more of the batch
+SHARDS_PER_WORKER = 4
+
+_worker_miner: Optional[Miner] = None
+
+
+def shard_by_size(texts, n_shards: int) -> list[np.ndarray]:
+    """Split the positions of ``texts`` into at most ``n_shards`` contiguous shards
+    of similar total length."""
+    lengths = np.array(
+        [len(text) if isinstance(text, str) else 0 for text in texts], dtype=np.int64
+    )
+    bounds = np.searchsorted(
+        np.cumsum(lengths), np.linspace(0, lengths.sum(), n_shards + 1)[1:-1]
+    )
+    return [shard for shard in np.split(np.arange(len(texts)), bounds) if len(shard)]
+
+
+def _init_mine_worker(lemma_table_path: Optional[str]) -> None:
+    global _worker_miner
+    _worker_miner = Miner(lemma_table_path)
+
+
+def _mine_shard(texts: list[str], keep_intermediate: bool) -> list[dict]:
+    rows = []
+    for text in texts:
+        try:
+            rows.append(_worker_miner.mine_document(text, keep_intermediate))
+        except Exception as e:
+            print(f"Miner.mine_batch: {str(e)}")
+            rows.append({"error": f"Miner:{e}"})
+    return rows
@@ -0,0 +1,420 @@
+"""Topic model kept between runs and updated with the new documents only.
+
+The state of the last fit (vocabulary, LDA topic-word parameters, the documents it
+has seen) is saved in a directory. A run then folds the new and changed documents
+in with online variational Bayes (``LatentDirichletAllocation.partial_fit``)
+instead of fitting the whole corpus again; a full refit happens on demand, once
+the model is too old, or once too much of the corpus changed since the last one.
+
+The saved directory is also the artifact used for inference, e.g. the topics of a
+document at upload time: ``meta.json`` (priors, revision), ``vocabulary.txt`` (one
+term per line) and the topic-word arrays as ``.npy`` files, memory-mapped by
+TopicModel. The documents and candidate terms only needed for the updates are in
+``state.json``.
+"""
+
+import json
+import numbers
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections.abc import Mapping, Sequence
+from datetime import datetime
+
+import numpy as np
+from scipy.special import psi
+from sklearn.decomposition import LatentDirichletAllocation
+from sklearn.utils import check_random_state
+
+from app.TopicModeling.lda_fitting import LdaTelemetry
+from app.TopicModeling.token_arrays import TermIndex, TokenArray, document_term_matrix
+
+STATE_VERSION = 2
+# Candidate terms whose document frequency is tracked for vocabulary growth
+MAX_CANDIDATE_TERMS = 100_000
+
+
+def dirichlet_expectation(components: np.ndarray) -> np.ndarray:
+    """exp(E[log(beta)]) of the topic-word parameters, as sklearn's LDA keeps it."""
+    return np.exp(psi(components) - psi(components.sum(axis=1))[:, np.newaxis])
+
+
+def _fitted_lda(
+    components: np.ndarray,
+    exp_dirichlet_component: np.ndarray,
+    doc_topic_prior: float,
+    topic_word_prior: float,
+    n_batch_iter: int,
+    **params,
+) -> LatentDirichletAllocation:
+    """LatentDirichletAllocation with the fitted attributes set, as after a fit."""
+    lda = LatentDirichletAllocation(
+        n_components=components.shape[0],
+        doc_topic_prior=doc_topic_prior,
+        topic_word_prior=topic_word_prior,
+        learning_method="online",
+        **params,
+    )
+    lda.components_ = components
+    lda.exp_dirichlet_component_ = exp_dirichlet_component
+    lda.doc_topic_prior_ = doc_topic_prior
+    lda.topic_word_prior_ = topic_word_prior
+    lda.n_batch_iter_ = n_batch_iter
+    lda.n_iter_ = 0
+    lda.n_features_in_ = components.shape[1]
+    lda.random_state_ = check_random_state(lda.random_state)
+    return lda
+
+
+class TopicModelState:
+    """Everything needed to resume a fitted LDA model.
+
+    ``documents`` maps each document folded into the model to the digest of its
+    tokens, ``candidate_df`` counts the documents of the terms outside of the
+    vocabulary seen since the last full fit.
+    """
+
+    def __init__(
+        self,
+        vocabulary: list[str],
+        components: np.ndarray,
+        doc_topic_prior: float,
+        topic_word_prior: float,
+        n_batch_iter: int,
+        documents: dict[str, str],
+        fitted_at: str | None = None,
+        updated_at: str | None = None,
+        candidate_df: dict[str, int] | None = None,
+        n_removed: int = 0,
+        revision: int = 0,
+    ):
+        self.vocabulary = vocabulary
+        self.components = components
+        self.doc_topic_prior = doc_topic_prior
+        self.topic_word_prior = topic_word_prior
+        self.n_batch_iter = n_batch_iter
+        self.documents = documents
+        self.fitted_at = fitted_at or datetime.now().isoformat()
+        self.updated_at = updated_at or self.fitted_at
+        self.candidate_df = candidate_df or {}
+        self.n_removed = n_removed
+        self.revision = revision
+
+    @property
+    def n_topics(self) -> int:
+        return self.components.shape[0]
+
+    @classmethod
+    def from_lda(
+        cls,
+        lda: LatentDirichletAllocation,
+        vocabulary: list[str],
+        documents: Mapping[str, TokenArray],
+    ) -> "TopicModelState":
+        return cls(
+            vocabulary=list(vocabulary),
+            components=lda.components_,
+            doc_topic_prior=lda.doc_topic_prior_,
+            topic_word_prior=lda.topic_word_prior_,
+            n_batch_iter=lda.n_batch_iter_,
+            documents={name: t.digest() for name, t in documents.items()},
+        )
+
+    def to_lda(self, **params) -> LatentDirichletAllocation:
+        """A fitted LatentDirichletAllocation with this state, ready for partial_fit
+        and transform. ``params`` are the estimator's parameters (n_jobs, ...).
+        """
+        return _fitted_lda(
+            self.components,
+            dirichlet_expectation(self.components),
+            self.doc_topic_prior,
+            self.topic_word_prior,
+            self.n_batch_iter,
+            **params,
+        )
+
+    def changes(self, documents: Mapping[str, TokenArray]) -> tuple[list[str], int]:
+        """Documents new or changed since they were folded in, and the number of
+        documents of the model that no longer exist."""
+        changed = [
+            name
+            for name, tokens in documents.items()
+            if self.documents.get(name) != tokens.digest()
+        ]
+        removed = sum(1 for name in self.documents if name not in documents)
+        return changed, removed
+
+    def refit_reason(
+        self,
+        documents: Mapping[str, TokenArray],
+        n_topics: int,
+        max_delta_ratio: float,
+        max_age_days: float,
+    ) -> str | None:
+        """Why the model should be fitted again from scratch, None if it can be
+        updated with the changed documents."""
+        if n_topics != self.n_topics:
+            return f"the number of topics changed ({self.n_topics} -> {n_topics})"
+        if max_age_days:
+            age = datetime.now() - datetime.fromisoformat(self.fitted_at)
+            if age.total_seconds() > max_age_days * 86400:
+                return f"the model is {age.days} days old"
+        changed, removed = self.changes(documents)
+        delta = len(changed) + removed + self.n_removed
+        if delta > max_delta_ratio * max(len(self.documents), 1):
+            return f"{delta} documents changed since the last full fit"
+        return None
+
+    def fold_in(
+        self,
+        lda: LatentDirichletAllocation,
+        documents: Mapping[str, TokenArray],
+        ngram_range: tuple[int, int],
+        min_df: float,
+        max_df: float,
+        telemetry: LdaTelemetry | None = None,
+    ) -> int:
+        """Update ``lda`` and the state with the new and changed documents.
+
+        Terms outside of the vocabulary are added once they are found in enough
+        documents (counting only the documents seen since the last full fit), with
+        the topic-word prior as their initial weight. Returns the number of
+        documents folded in. The update is logged in ``telemetry`` as a
+        "fold_in" run of one iteration, none without changed documents.
+        """
+        telemetry = telemetry or LdaTelemetry(None)
+        changed, removed = self.changes(documents)
+        self.n_removed += removed
+        for name in [name for name in self.documents if name not in documents]:
+            del self.documents[name]
+        telemetry.start(
+            mode="fold_in",
+            max_iter=1 if changed else 0,
+            n_documents=len(changed),
+            n_terms=len(self.vocabulary),
+            n_topics=self.n_topics,
+        )
+        start_time = time.perf_counter()
+        error = None
+        try:
+            if changed:
+                self._fold_in(lda, documents, changed, ngram_range, min_df, max_df)
+                telemetry.iteration(1, time.perf_counter() - start_time, None)
+        except BaseException as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            telemetry.end(
+                iterations=1 if changed and error is None else 0,
+                converged=False,
+                perplexity=None,
+                seconds=time.perf_counter() - start_time,
+                error=error,
+            )
+        return len(changed)
+
+    def _fold_in(self, lda, documents, changed, ngram_range, min_df, max_df):
+        new_documents = [documents[name] for name in changed]
+
+        n_documents = len(documents)
+        min_count = (
+            min_df if isinstance(min_df, numbers.Integral) else min_df * n_documents
+        )
+        max_count = (
+            max_df if isinstance(max_df, numbers.Integral) else max_df * n_documents
+        )
+        self._grow_vocabulary(lda, new_documents, ngram_range, min_count, max_count)
+        X = TermIndex(self.vocabulary).transform(new_documents)
+        lda.total_samples = n_documents
+        lda.partial_fit(X)
+
+        self.components = lda.components_
+        self.n_batch_iter = lda.n_batch_iter_
+        for name in changed:
+            self.documents[name] = documents[name].digest()
+        self.updated_at = datetime.now().isoformat()
+
+    def _grow_vocabulary(self, lda, new_documents, ngram_range, min_count, max_count):
+        try:
+            matrix, terms = document_term_matrix(new_documents, ngram_range)
+        except ValueError:  # Empty documents
+            return
+        known = set(self.vocabulary)
+        frequencies = np.bincount(matrix.indices, minlength=matrix.shape[1])
+        for term, frequency in zip(terms, frequencies.tolist()):
+            if term not in known:
+                self.candidate_df[term] = self.candidate_df.get(term, 0) + frequency
+        added = [
+            term
+            for term, df in self.candidate_df.items()
+            if min_count <= df <= max_count
+        ]
+        for term in added:
+            del self.candidate_df[term]
+        if len(self.candidate_df) > MAX_CANDIDATE_TERMS:
+            kept = sorted(self.candidate_df.items(), key=lambda item: -item[1])
+            self.candidate_df = dict(kept[:MAX_CANDIDATE_TERMS])
+        if not added:
+            return
+        print(f"[TOPIC MODEL] {len(added)} terms added to the vocabulary")
+        self.vocabulary.extend(added)
+        new_columns = np.full((self.n_topics, len(added)), self.topic_word_prior)
+        lda.components_ = np.hstack([lda.components_, new_columns])
+        lda.exp_dirichlet_component_ = dirichlet_expectation(lda.components_)
+        lda.n_features_in_ = lda.components_.shape[1]
+
+    def save(self, path: str) -> None:
+        """Write the state to the ``path`` directory, replacing it atomically, as a
+        new revision of the model."""
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=parent, prefix=".topic_model_")
+        # Revisions keep increasing across full refits
+        previous = read_meta(path)
+        self.revision = max(self.revision, previous["revision"] if previous else 0) + 1
+        np.save(os.path.join(tmp_dir, "components.npy"), self.components)
+        np.save(
+            os.path.join(tmp_dir, "exp_dirichlet_component.npy"),
+            dirichlet_expectation(self.components),
+        )
+        with open(os.path.join(tmp_dir, "vocabulary.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(self.vocabulary))
+        with open(os.path.join(tmp_dir, "state.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "documents": self.documents,
+                    "candidate_df": self.candidate_df,
+                    "n_removed": self.n_removed,
+                },
+                f,
+            )
+        # Written last: a directory without it is not a model
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": STATE_VERSION,
+                    "revision": self.revision,
+                    "n_topics": self.n_topics,
+                    "n_terms": len(self.vocabulary),
+                    "doc_topic_prior": self.doc_topic_prior,
+                    "topic_word_prior": self.topic_word_prior,
+                    "n_batch_iter": self.n_batch_iter,
+                    "fitted_at": self.fitted_at,
+                    "updated_at": self.updated_at,
+                },
+                f,
+            )
+        old_dir = None
+        if os.path.exists(path):
+            old_dir = tempfile.mkdtemp(dir=parent, prefix=".topic_model_old_")
+            os.replace(path, os.path.join(old_dir, "model"))
+        os.replace(tmp_dir, path)
+        if old_dir is not None:
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: str) -> "TopicModelState | None":
+        """The saved state, None if there is none or it cannot be read."""
+        try:
+            meta = read_meta(path)
+            if meta is None:
+                return None
+            with open(os.path.join(path, "state.json"), encoding="utf-8") as f:
+                state = json.load(f)
+            vocabulary = read_vocabulary(path)
+            components = np.load(os.path.join(path, "components.npy"))
+        except (OSError, ValueError) as e:
+            print(f"[TOPIC MODEL] Could not load the model state: {e}")
+            return None
+        return cls(
+            vocabulary=vocabulary,
+            components=components,
+            doc_topic_prior=meta["doc_topic_prior"],
+            topic_word_prior=meta["topic_word_prior"],
+            n_batch_iter=meta["n_batch_iter"],
+            documents=state["documents"],
+            fitted_at=meta["fitted_at"],
+            updated_at=meta["updated_at"],
+            candidate_df=state["candidate_df"],
+            n_removed=state["n_removed"],
+            revision=meta["revision"],
+        )
+
+
+def read_meta(path: str) -> dict | None:
+    """Metadata of the model saved in ``path``, None if there is no usable one."""
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return None
+    if meta.get("version") != STATE_VERSION:
+        print(f"[TOPIC MODEL] Ignoring a model of version {meta.get('version')}")
+        return None
+    return meta
+
+
+def read_vocabulary(path: str) -> list[str]:
+    with open(os.path.join(path, "vocabulary.txt"), encoding="utf-8") as f:
+        content = f.read()
+    return content.split("\n") if content else []
+
+
+class TopicModel:
+    """Saved topic model loaded for inference, its arrays memory-mapped read-only.
+
+    ``transform`` gives the topic distribution of documents the model has not seen,
+    like the LDA it was saved from, without updating the model.
+    """
+
+    def __init__(self, path: str, meta: dict, n_jobs: int | None = None):
+        self.path = path
+        self.revision = meta["revision"]
+        self.n_topics = meta["n_topics"]
+        self.vocabulary = read_vocabulary(path)
+        self.index = TermIndex(self.vocabulary)
+        self.lda = _fitted_lda(
+            np.load(os.path.join(path, "components.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "exp_dirichlet_component.npy"), mmap_mode="r"),
+            meta["doc_topic_prior"],
+            meta["topic_word_prior"],
+            meta["n_batch_iter"],
+            n_jobs=n_jobs,
+        )
+
+    @classmethod
+    def load(cls, path: str, n_jobs: int | None = None) -> "TopicModel | None":
+        """The model saved in ``path``, None if there is none."""
+        try:
+            meta = read_meta(path)
+            return None if meta is None else cls(path, meta, n_jobs)
+        except (OSError, ValueError) as e:
+            print(f"[TOPIC MODEL] Could not load the model: {e}")
+            return None
+
+    def transform(self, documents: Sequence[TokenArray]) -> np.ndarray:
+        """Topic distribution of each document, one row per document."""
+        return self.lda.transform(self.index.transform(documents))
+
+
+_models: dict[str, tuple[tuple[int, int], TopicModel]] = {}
+_models_lock = threading.Lock()
+
+
+def get_topic_model(path: str) -> TopicModel | None:
+    """The model saved in ``path``, loaded once per revision and process."""
+    try:
+        stat = os.stat(os.path.join(path, "meta.json"))
+    except FileNotFoundError:
+        return None
+    key = (stat.st_ino, stat.st_mtime_ns)
+    with _models_lock:
+        cached = _models.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        model = TopicModel.load(path)
+        if model is not None:
+            _models[path] = (key, model)
+        return model
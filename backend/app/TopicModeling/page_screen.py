@@ -0,0 +1,94 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# A pixel darker than this (0-255 gray level) counts as ink
+INK_LEVEL = 160
+# Pages with less ink than this fraction of the pixels and an almost uniform
+# background are considered blank
+BLANK_INK_COVERAGE = 0.0005
+BLANK_MAX_STD = 6.0
+
+
+def pixmap_to_gray(samples: bytes, width: int, height: int, n: int) -> np.ndarray:
+    """Gray levels of a rendered pixmap, without copying the sample buffer."""
+    pixels = np.frombuffer(samples, dtype=np.uint8).reshape(height, width, n)
+    if n == 1:
+        return pixels[:, :, 0]
+    # ITU-R 601 luma with integer weights, same as PIL's "L" conversion
+    return (
+        (
+            pixels[:, :, 0].astype(np.uint32) * 299
+            + pixels[:, :, 1].astype(np.uint32) * 587
+            + pixels[:, :, 2].astype(np.uint32) * 114
+        )
+        // 1000
+    ).astype(np.uint8)
+
+
+def is_blank(
+    gray: np.ndarray,
+    max_ink_coverage: float = BLANK_INK_COVERAGE,
+    max_std: float = BLANK_MAX_STD,
+) -> bool:
+    """Whether a page has (almost) no ink on a uniform background.
+
+    Only one pixel in four in each direction is looked at, which is plenty to find
+    text at OCR resolutions and keeps the check well under a millisecond per page.
+    """
+    sample = gray[::4, ::4]
+    if sample.size == 0:
+        return True
+    ink_coverage = np.count_nonzero(sample < INK_LEVEL) / sample.size
+    return ink_coverage <= max_ink_coverage and float(sample.std()) <= max_std
+
+
+class PageSignature:
+    """Digest of the exact pixels of a rendered page, with its size.
+
+    Only pages with identical pixels share their text: two scans of an invoice with
+    a different name or amount on one line look alike to any perceptual hash or
+    thumbnail comparison, and reusing the text of one for the other would index a
+    document under the words of another.
+    """
+
+    def __init__(self, samples: bytes, width: int, height: int, n: int):
+        digest = hashlib.blake2b(samples, digest_size=32)
+        digest.update(f"{width}x{height}x{n}".encode())
+        self.exact_key = digest.hexdigest()
+
+    def matches(self, other: "PageSignature") -> bool:
+        return self.exact_key == other.exact_key
+
+
+class PageOCRCache:
+    """Bounded cache of OCR results keyed by the digest of the exact page pixels.
+
+    The least recently used entries are dropped once ``max_entries`` is reached.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, signature: PageSignature) -> str | None:
+        with self._lock:
+            text = self._entries.get(signature.exact_key)
+            if text is not None:
+                self._entries.move_to_end(signature.exact_key)
+            return text
+
+    def put(self, signature: PageSignature, text: str) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[signature.exact_key] = text
+            self._entries.move_to_end(signature.exact_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
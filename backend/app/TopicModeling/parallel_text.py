@@ -0,0 +1,91 @@
+"""Text layer extraction of one large PDF split over several processes.
+
+PyMuPDF holds the GIL while extracting text, so the page ranges are extracted by
+separate Python processes, each opening the document on its own. They are started
+with subprocess rather than multiprocessing because extraction pool workers are
+daemonic processes, which cannot have multiprocessing children.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections.abc import Iterator
+
+import fitz
+
+
+def extract_page_range(file_path: str, start: int, stop: int) -> list[str]:
+    with fitz.open(file_path) as doc:
+        return [doc[page_number].get_text() for page_number in range(start, stop)]
+
+
+def page_ranges(n_pages: int, n_ranges: int) -> list[tuple[int, int]]:
+    """Split ``n_pages`` pages into at most ``n_ranges`` contiguous ranges."""
+    n_ranges = max(1, min(n_ranges, n_pages))
+    size, remainder = divmod(n_pages, n_ranges)
+    ranges = []
+    start = 0
+    for i in range(n_ranges):
+        stop = start + size + (1 if i < remainder else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def iter_page_texts_parallel(
+    file_path: str,
+    n_pages: int,
+    workers: int,
+    tmp_dir: str | None = None,
+    timeout: float = 600.0,
+) -> Iterator[str]:
+    """Yield the text of each page in order, extracting ``workers`` page ranges
+    in parallel. A range whose process fails is extracted in this process instead.
+    """
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as out_dir:
+        processes = []
+        try:
+            for i, (start, stop) in enumerate(page_ranges(n_pages, workers)):
+                out_path = os.path.join(out_dir, f"{i}.json")
+                process = subprocess.Popen(
+                    [
+                        sys.executable,
+                        __file__,
+                        file_path,
+                        str(start),
+                        str(stop),
+                        out_path,
+                    ],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                )
+                processes.append((process, start, stop, out_path))
+
+            for process, start, stop, out_path in processes:
+                try:
+                    _, stderr = process.communicate(timeout=timeout)
+                    if process.returncode != 0:
+                        raise OSError(stderr.decode(errors="replace").strip()[-500:])
+                    with open(out_path, encoding="utf-8") as f:
+                        pages = json.load(f)
+                except (OSError, ValueError, subprocess.TimeoutExpired) as e:
+                    print(
+                        f"Parallel extraction of pages {start}-{stop} of {file_path} "
+                        f"failed, extracting them here: {e}"
+                    )
+                    pages = extract_page_range(file_path, start, stop)
+                yield from pages
+        finally:
+            for process, _, _, _ in processes:
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+
+
+if __name__ == "__main__":
+    path, first_page, last_page, output_path = sys.argv[1:]
+    page_texts = extract_page_range(path, int(first_page), int(last_page))
+    with open(output_path, "w", encoding="utf-8") as output:
+        json.dump(page_texts, output)
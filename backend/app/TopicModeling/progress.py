@@ -0,0 +1,81 @@
+import threading
+import time
+
+SCHEDULES = ("fifo", "longest_first", "shortest_first")
+
+
+def order_by_cost(costs: dict[str, float], schedule: str = "fifo") -> list[str]:
+    """Order files for submission according to their estimated cost.
+
+    ``longest_first`` minimizes the batch wall time (a huge file submitted last can
+    no longer decide the makespan), ``shortest_first`` minimizes the time to the
+    first results. ``fifo`` keeps the given order.
+    """
+    if schedule not in SCHEDULES:
+        raise ValueError(f"Unknown schedule '{schedule}', expected one of {SCHEDULES}")
+    if schedule == "fifo":
+        return list(costs)
+    return sorted(costs, key=costs.get, reverse=schedule == "longest_first")
+
+
+class BatchProgress:
+    """Progress and ETA of a batch of files with estimated costs.
+
+    Costs are in estimated single-worker seconds. Until the first file completes,
+    the ETA assumes ``workers`` files are processed in parallel; afterwards it is
+    calibrated on the throughput observed so far (cost completed per second).
+    """
+
+    def __init__(self, stage: str, costs: dict[str, float], workers: int = 1):
+        self.stage = stage
+        self.workers = max(1, workers)
+        self._costs = dict(costs)
+        self._total_cost = sum(self._costs.values())
+        self._completed_cost = 0.0
+        self._completed = 0
+        self._start_time = time.time()
+        self._end_time: float | None = None
+        self._lock = threading.Lock()
+
+    def complete(self, key: str) -> None:
+        with self._lock:
+            self._completed += 1
+            self._completed_cost += self._costs.get(key, 0.0)
+            if self._completed >= len(self._costs):
+                self._end_time = time.time()
+
+    @property
+    def total(self) -> int:
+        return len(self._costs)
+
+    @property
+    def completed(self) -> int:
+        return self._completed
+
+    @property
+    def done(self) -> bool:
+        return self._end_time is not None
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return (self._end_time or time.time()) - self._start_time
+
+    @property
+    def eta_seconds(self) -> float:
+        with self._lock:
+            if self._end_time is not None:
+                return 0.0
+            remaining_cost = self._total_cost - self._completed_cost
+            elapsed = time.time() - self._start_time
+            if self._completed_cost > 0 and elapsed > 0:
+                return remaining_cost / (self._completed_cost / elapsed)
+            return remaining_cost / self.workers
+
+    def as_dict(self) -> dict:
+        return {
+            "stage": self.stage,
+            "total": self.total,
+            "completed": self.completed,
+            "elapsed_seconds": round(self.elapsed_seconds, 2),
+            "eta_seconds": round(self.eta_seconds, 2),
+        }
@@ -0,0 +1,217 @@
+"""Vocabulary of n-grams built under a memory cap, then documents vectorized with it.
+
+Counting every unigram and bigram of a corpus before the min_df pruning holds all
+of them in memory at once, most of them bigrams found in a document or two. Here
+the vocabulary is built in passes over the documents:
+
+1. The document frequency of each word. A bigram is in no more documents than
+   its rarest word, so the n-grams with a word under min_df are never counted.
+2. The document and term frequencies of the remaining n-grams, in a dictionary
+   spilled to sorted run files whenever it exceeds its memory cap, then merged.
+
+The vocabulary is then fixed, and the documents vectorized with it in batches,
+with int32 indices and float32 counts.
+"""
+
+import heapq
+import os
+import sys
+import tempfile
+from collections.abc import Iterable, Iterator, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+
+from app.TopicModeling.token_arrays import (
+    TermIndex,
+    TokenArray,
+    _allowed_windows,
+    _ngram_keys,
+    document_frequency_limits,
+    top_terms,
+)
+
+# Approximate size of a counter entry on top of its term: dict slot and counts
+ENTRY_OVERHEAD = 200
+BATCH_SIZE = 1000
+
+
+class SpillingCounter:
+    """Document and term frequencies of terms, in memory up to ``max_bytes``, then
+    in sorted run files in ``dir``. Call ``add`` once per document and term."""
+
+    def __init__(self, max_bytes: int, dir: str | None = None):
+        self.max_bytes = max_bytes
+        self.dir = dir
+        self.runs: list[str] = []
+        self._counts: dict[str, list[int]] = {}
+        self._bytes = 0
+
+    def add(self, term: str, count: int) -> None:
+        counts = self._counts.get(term)
+        if counts is not None:
+            counts[0] += 1
+            counts[1] += count
+            return
+        self._counts[term] = [1, count]
+        self._bytes += sys.getsizeof(term) + ENTRY_OVERHEAD
+        if self._bytes > self.max_bytes:
+            self._spill()
+
+    def _spill(self) -> None:
+        fd, path = tempfile.mkstemp(prefix="vocabulary_", suffix=".run", dir=self.dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for term in sorted(self._counts):
+                df, tf = self._counts[term]
+                f.write(f"{term}\t{df}\t{tf}\n")
+        self.runs.append(path)
+        self._counts.clear()
+        self._bytes = 0
+
+    @staticmethod
+    def _read_run(path: str) -> Iterator[tuple[str, int, int]]:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                term, df, tf = line.rstrip("\n").split("\t")
+                yield term, int(df), int(tf)
+
+    def items(self) -> Iterator[tuple[str, int, int]]:
+        """(term, document frequency, term frequency) in alphabetical order."""
+        in_memory = ((term, df, tf) for term, (df, tf) in sorted(self._counts.items()))
+        merged = heapq.merge(in_memory, *(self._read_run(path) for path in self.runs))
+        current, total_df, total_tf = None, 0, 0
+        for term, df, tf in merged:
+            if term != current:
+                if current is not None:
+                    yield current, total_df, total_tf
+                current, total_df, total_tf = term, 0, 0
+            total_df += df
+            total_tf += tf
+        if current is not None:
+            yield current, total_df, total_tf
+
+    def close(self) -> None:
+        for path in self.runs:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.runs = []
+        self._counts.clear()
+        self._bytes = 0
+
+
+def iter_ngrams(
+    document: TokenArray, n: int, allowed_words: set[str] | None = None
+) -> Iterator[tuple[str, int]]:
+    """Distinct n-grams of a document and their counts, skipping the n-grams with
+    a word outside of ``allowed_words``."""
+    ids = document.ids.astype(np.int64)
+    n_words = max(len(document.words), 1)
+    keys = _ngram_keys(ids, n, n_words)
+    if allowed_words is not None and len(keys):
+        allowed = np.fromiter(
+            (word in allowed_words for word in document.words),
+            dtype=bool,
+            count=len(document.words),
+        )
+        keys = keys[_allowed_windows(allowed[ids], n)]
+    unique_keys, counts = np.unique(keys, return_counts=True)
+    # Word ids of each n-gram, unpacked from the keys, last word first
+    parts = []
+    for _ in range(n):
+        unique_keys, word_ids = np.divmod(unique_keys, n_words)
+        parts.append([document.words[i] for i in word_ids.tolist()])
+    names = parts[0] if n == 1 else map(" ".join, zip(*reversed(parts)))
+    yield from zip(names, counts.tolist())
+
+
+def build_vocabulary(
+    documents: Sequence[TokenArray],
+    ngram_range: tuple[int, int] = (1, 1),
+    min_df: float | int = 1,
+    max_df: float | int = 1.0,
+    max_features: int | None = None,
+    max_memory: int = 256 * 1024 * 1024,
+    tmp_dir: str | None = None,
+) -> list[str]:
+    """The n-grams CountVectorizer(ngram_range, min_df, max_df, max_features) would
+    keep for ``documents``, in alphabetical order, counted with at most about
+    ``max_memory`` bytes of dictionaries; ``documents`` is iterated once per pass.
+    """
+    n_documents = len(documents)
+    min_count, max_count = document_frequency_limits(min_df, max_df, n_documents)
+    min_n, max_n = ngram_range
+
+    # Words that can be part of a kept n-gram
+    allowed_words = None
+    if min_count > 1 and max_n > 1:
+        counter = SpillingCounter(max_memory, tmp_dir)
+        try:
+            for document in documents:
+                for word in document.words:
+                    counter.add(word, 0)
+            allowed_words = {word for word, df, _ in counter.items() if df >= min_count}
+        finally:
+            counter.close()
+
+    seen_terms = False
+    counter = SpillingCounter(max_memory, tmp_dir)
+    try:
+        for document in documents:
+            seen_terms = seen_terms or len(document) >= min_n
+            for n in range(min_n, max_n + 1):
+                for term, count in iter_ngrams(
+                    document, n, allowed_words if n > 1 else None
+                ):
+                    counter.add(term, count)
+        if counter.runs:
+            print(
+                f"[VOCABULARY] Document frequencies spilled to {len(counter.runs)} "
+                "files"
+            )
+        terms, term_frequency = [], []
+        for term, df, tf in counter.items():
+            if min_count <= df <= max_count:
+                terms.append(term)
+                term_frequency.append(tf)
+    finally:
+        counter.close()
+
+    if not seen_terms:
+        raise ValueError(
+            "empty vocabulary; perhaps the documents only contain stop words"
+        )
+    if not terms:
+        raise ValueError(
+            "After pruning, no terms remain. Try a lower min_df or a higher max_df."
+        )
+    if max_features is not None and max_features < len(terms):
+        kept = np.sort(top_terms(np.array(term_frequency), max_features))
+        terms = [terms[i] for i in kept.tolist()]
+    return terms
+
+
+def vectorize(
+    documents: Iterable[TokenArray],
+    terms: Sequence[str],
+    batch_size: int = BATCH_SIZE,
+    dtype=np.float32,
+) -> sp.csr_matrix:
+    """Counts of ``terms`` in each document, vectorized ``batch_size`` documents at
+    a time, with int32 indices and ``dtype`` counts."""
+    index = TermIndex(terms)
+    blocks = []
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) == batch_size:
+            blocks.append(index.transform(batch, dtype=dtype))
+            batch = []
+    if batch or not blocks:
+        blocks.append(index.transform(batch, dtype=dtype))
+    matrix = sp.vstack(blocks, format="csr")
+    if matrix.nnz < 2**31:
+        matrix.indices = matrix.indices.astype(np.int32, copy=False)
+        matrix.indptr = matrix.indptr.astype(np.int32, copy=False)
+    return matrix
@@ -0,0 +1,301 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+from multiprocessing.connection import wait as wait_connections
+
+
+class TaskTimeoutError(TimeoutError):
+    """The task ran longer than the pool's wall-clock limit."""
+
+
+class WorkerCrashedError(RuntimeError):
+    """The worker process died (e.g. segfault, OOM kill) while running the task."""
+
+
+class QuarantinedError(RuntimeError):
+    """The task's file previously hung or crashed the worker too many times."""
+
+
+def _worker_main(conn, initializer, initargs) -> None:
+    if initializer is not None:
+        initializer(*initargs)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        task_id, fn, args, kwargs = task
+        try:
+            result = (task_id, True, fn(*args, **kwargs))
+        except BaseException as e:
+            result = (task_id, False, e)
+        try:
+            conn.send(result)
+        except Exception as e:
+            conn.send((task_id, False, RuntimeError(f"Unpicklable result: {e}")))
+
+
+class _Task:
+    def __init__(self, task_id: int, future: Future, fn, args, kwargs):
+        self.id = task_id
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.attempts = 0
+        self.key = _task_key(args)
+
+
+def _task_key(args) -> str | None:
+    """Quarantine key of a task: the file of a process_single_file config.
+
+    The size and modification time are part of the key, so a file replaced by a new
+    upload is not kept in quarantine.
+    """
+    if not args or not isinstance(args[0], dict) or not args[0].get("file_path"):
+        return None
+    file_path = args[0]["file_path"]
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return file_path
+    return f"{file_path}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+class _Worker:
+    def __init__(self, context, initializer, initargs):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, initializer, initargs),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.task: _Task | None = None
+        self.deadline: float | None = None
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class SupervisedPool(Executor):
+    """Process pool that enforces a wall-clock limit on every task.
+
+    Unlike ``ProcessPoolExecutor``, each worker has its own pipe, so a worker that
+    hangs past ``task_timeout`` or dies (segfault, OOM kill) is killed and
+    respawned without losing the other in-flight tasks. Its task is retried up to
+    ``max_retries`` times, then failed with ``TaskTimeoutError`` or
+    ``WorkerCrashedError`` and its file is quarantined: later submissions of the
+    same file fail immediately with ``QuarantinedError``. The quarantine is kept
+    in ``quarantine_path`` when given, so it survives restarts.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        task_timeout: float = 300.0,
+        max_retries: int = 1,
+        quarantine_path: str | None = None,
+        initializer=None,
+        initargs=(),
+    ):
+        self.max_workers = max(1, max_workers)
+        self.task_timeout = task_timeout
+        self.max_retries = max_retries
+        self.quarantine_path = quarantine_path
+        self._initializer = initializer
+        self._initargs = initargs
+        self._context = multiprocessing.get_context(
+            "forkserver"
+            if "forkserver" in multiprocessing.get_all_start_methods()
+            else "spawn"
+        )
+        self._quarantine = self._load_quarantine()
+        self._pending: deque[_Task] = deque()
+        self._workers: list[_Worker] = []
+        self._lock = threading.Lock()
+        self._next_task_id = 0
+        self._shutdown = False
+        self._supervisor: threading.Thread | None = None
+
+    def _load_quarantine(self) -> set[str]:
+        if not self.quarantine_path or not os.path.exists(self.quarantine_path):
+            return set()
+        try:
+            with open(self.quarantine_path, encoding="utf-8") as f:
+                return set(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"[SUPERVISED POOL] Could not load quarantine: {e}")
+            return set()
+
+    def _add_to_quarantine(self, key: str | None) -> None:
+        if key is None:
+            return
+        self._quarantine.add(key)
+        print(f"[SUPERVISED POOL] Quarantined {key}")
+        if not self.quarantine_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.quarantine_path) or ".", exist_ok=True)
+            with open(self.quarantine_path, "w", encoding="utf-8") as f:
+                json.dump(sorted(self._quarantine), f)
+        except OSError as e:
+            print(f"[SUPERVISED POOL] Could not save quarantine: {e}")
+
+    @property
+    def quarantine(self) -> set[str]:
+        return set(self._quarantine)
+
+    def release(self, key: str) -> None:
+        """Remove a file from the quarantine, e.g. after it has been replaced."""
+        with self._lock:
+            self._quarantine.discard(key)
+            if self.quarantine_path:
+                with open(self.quarantine_path, "w", encoding="utf-8") as f:
+                    json.dump(sorted(self._quarantine), f)
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit to a pool that has been shut down")
+            task = _Task(self._next_task_id, future, fn, args, kwargs)
+            self._next_task_id += 1
+            if task.key is not None and task.key in self._quarantine:
+                future.set_exception(QuarantinedError(f"{task.key} is quarantined"))
+                return future
+            self._pending.append(task)
+            if self._supervisor is None:
+                self._supervisor = threading.Thread(
+                    target=self._supervise, name="SupervisedPool", daemon=True
+                )
+                self._supervisor.start()
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while self._pending:
+                    future = self._pending.popleft().future
+                    if not future.cancel():
+                        future.set_exception(
+                            RuntimeError("Pool shut down before the task was retried")
+                        )
+            supervisor = self._supervisor
+        if wait and supervisor is not None:
+            supervisor.join()
+
+    def _spawn_worker(self) -> _Worker:
+        return _Worker(self._context, self._initializer, self._initargs)
+
+    def _dispatch(self) -> None:
+        with self._lock:
+            while len(self._workers) < self.max_workers and self._pending:
+                self._workers.append(self._spawn_worker())
+            for worker in self._workers:
+                if worker.task is not None:
+                    continue
+                while self._pending:
+                    task = self._pending.popleft()
+                    # Retried tasks are already running
+                    if (
+                        task.attempts == 0
+                        and not task.future.set_running_or_notify_cancel()
+                    ):
+                        continue
+                    task.attempts += 1
+                    worker.task = task
+                    worker.deadline = time.monotonic() + self.task_timeout
+                    try:
+                        worker.conn.send((task.id, task.fn, task.args, task.kwargs))
+                    except Exception as e:
+                        worker.task = None
+                        task.future.set_exception(e)
+                        continue
+                    break
+
+    def _replace_worker(self, worker: _Worker, error: Exception) -> None:
+        """Kill a worker, retry or fail its task and start a fresh worker."""
+        worker.kill()
+        task = worker.task
+        with self._lock:
+            self._workers.remove(worker)
+            if task is not None:
+                if task.attempts <= self.max_retries and not self._shutdown:
+                    print(
+                        f"[SUPERVISED POOL] {error} ({task.key}), "
+                        f"retrying (attempt {task.attempts + 1})"
+                    )
+                    self._pending.appendleft(task)
+                else:
+                    self._add_to_quarantine(task.key)
+                    task.future.set_exception(error)
+
+    def _supervise(self) -> None:
+        while True:
+            self._dispatch()
+            with self._lock:
+                busy = [worker for worker in self._workers if worker.task is not None]
+                if self._shutdown and not busy and not self._pending:
+                    break
+
+            now = time.monotonic()
+            next_deadline = min((worker.deadline for worker in busy), default=now + 0.1)
+            timeout = max(0.0, min(next_deadline - now, 0.1))
+            ready = wait_connections(
+                [worker.conn for worker in busy]
+                + [worker.process.sentinel for worker in self._workers],
+                timeout=timeout,
+            )
+
+            for worker in list(self._workers):
+                if worker.conn in ready and worker.task is not None:
+                    try:
+                        task_id, success, result = worker.conn.recv()
+                    except (EOFError, OSError):
+                        self._replace_worker(
+                            worker,
+                            WorkerCrashedError("Worker died while running the task"),
+                        )
+                        continue
+                    task = worker.task
+                    worker.task = None
+                    worker.deadline = None
+                    if task_id != task.id:
+                        continue
+                    if success:
+                        task.future.set_result(result)
+                    else:
+                        task.future.set_exception(result)
+                elif worker.process.sentinel in ready:
+                    self._replace_worker(
+                        worker,
+                        WorkerCrashedError(
+                            f"Worker died with exit code {worker.process.exitcode}"
+                        ),
+                    )
+                elif worker.task is not None and time.monotonic() > worker.deadline:
+                    self._replace_worker(
+                        worker,
+                        TaskTimeoutError(f"Task exceeded {self.task_timeout}s"),
+                    )
+
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except Exception:
+                pass
+            worker.process.join(timeout=5)
+            worker.kill()
+        self._workers = []
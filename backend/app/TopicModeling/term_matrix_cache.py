@@ -0,0 +1,375 @@
+"""Document-term matrix kept on disk between topic modeling runs.
+
+Every n-gram of the documents is counted once, when a document is first seen or
+its tokens change, and the row is appended to a CSR matrix stored as raw arrays:
+``indices`` and ``data`` files grow at the end, the terms file only gets new terms
+appended, so the column of a term does not change until the next compaction. A
+changed document gets a new row; the rows of changed and deleted documents are left
+in the files, masked out, until they make up half of the matrix. It is then
+compacted into a new generation of files, with the live rows only and the terms
+that still have counts.
+
+Most n-grams of a corpus are bigrams found in a document or two. An n-gram is in no
+more documents than its rarest word, so the n-grams of two words or more are only
+stored when all their words are in at least min_df documents. When a word gets
+there later, the documents it is in are counted again.
+
+The small index (row and digest of each document, row pointers) is replaced
+atomically after the appends, so an interrupted update is rolled back: the files
+are cut back to the lengths it records. The matrix is loaded memory-mapped; only
+the rows and columns selected for a run are copied in memory.
+"""
+
+import json
+import numbers
+import os
+from collections import Counter
+from collections.abc import Iterable, Mapping, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+
+from app.TopicModeling.token_arrays import (
+    TokenArray,
+    document_term_matrix,
+    limit_features,
+    select_terms,
+)
+
+CACHE_VERSION = 2
+INDEX_FILE = "index.npz"
+# Compaction once masked rows hold this share of the stored counts
+MAX_DEAD_RATIO = 0.5
+# Documents counted at once when rows are appended
+BATCH_SIZE = 500
+
+
+class DocumentTermCache:
+    """Counts of the n-grams in ``ngram_range`` of documents identified by a key,
+    stored in the ``path`` directory, e.g. ``./tmp/dtm_cache``.
+
+    A cache written with another ngram_range or format is started over.
+
+    ``ngram_words`` are the words whose n-grams of two words or more are stored in
+    every row, None for all of them.
+    """
+
+    def __init__(self, path: str, ngram_range: tuple[int, int]):
+        self.path = path
+        self.ngram_range = tuple(ngram_range)
+        self.generation = 0
+        self.rows: dict[str, tuple[int, str]] = {}  # key -> (row, digest)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.terms: list[str] = []
+        self.terms_size = 0  # Bytes of the terms file
+        self._term_ids: dict[str, int] | None = None
+        self.ngram_words: set[str] | None = set()
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def nnz(self) -> int:
+        return int(self.indptr[-1])
+
+    def _file(
+        self, name: str, generation: int | None = None, extension: str = "bin"
+    ) -> str:
+        if generation is None:
+            generation = self.generation
+        return os.path.join(self.path, f"{name}.{generation}.{extension}")
+
+    def _terms_file(self, generation: int | None = None) -> str:
+        return self._file("terms", generation, "txt")
+
+    def _load(self) -> None:
+        try:
+            with np.load(os.path.join(self.path, INDEX_FILE)) as index:
+                meta = json.loads(str(index["meta"]))
+                if (
+                    meta["version"] != CACHE_VERSION
+                    or tuple(meta["ngram_range"]) != self.ngram_range
+                ):
+                    print("[DTM CACHE] Starting over: the cache format changed")
+                    return
+                keys = index["keys"].tolist()
+                digests = index["digests"].tolist()
+                rows = index["rows"].tolist()
+                self.indptr = index["indptr"].astype(np.int64)
+                ngram_words = (
+                    None
+                    if meta["all_ngram_words"]
+                    else set(index["ngram_words"].tolist())
+                )
+            with open(self._terms_file(meta["generation"]), "rb") as f:
+                terms = f.read(meta["terms_size"]).decode("utf-8")
+            self.terms = terms.split("\n")[:-1]
+            if len(self.terms) != meta["n_terms"]:
+                raise ValueError("the terms file is truncated")
+        except (OSError, ValueError, KeyError) as e:
+            if os.path.exists(os.path.join(self.path, INDEX_FILE)):
+                print(f"[DTM CACHE] Starting over: could not read the cache: {e}")
+            self.indptr = np.zeros(1, dtype=np.int64)
+            return
+        self.generation = meta["generation"]
+        self.terms_size = meta["terms_size"]
+        self.ngram_words = ngram_words
+        self.rows = {
+            key: (row, digest) for key, row, digest in zip(keys, rows, digests)
+        }
+
+    def _save(self) -> None:
+        meta = {
+            "version": CACHE_VERSION,
+            "ngram_range": list(self.ngram_range),
+            "generation": self.generation,
+            "n_terms": len(self.terms),
+            "terms_size": self.terms_size,
+            "all_ngram_words": self.ngram_words is None,
+        }
+        keys = list(self.rows)
+        tmp_path = os.path.join(self.path, f".{INDEX_FILE}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                meta=np.array(json.dumps(meta)),
+                keys=np.array(keys, dtype=str),
+                digests=np.array([self.rows[key][1] for key in keys], dtype=str),
+                rows=np.array([self.rows[key][0] for key in keys], dtype=np.int64),
+                indptr=self.indptr,
+                ngram_words=np.array(sorted(self.ngram_words or ()), dtype=str),
+            )
+        os.replace(tmp_path, os.path.join(self.path, INDEX_FILE))
+
+    def term_ids(self) -> dict[str, int]:
+        if self._term_ids is None:
+            self._term_ids = {term: i for i, term in enumerate(self.terms)}
+        return self._term_ids
+
+    def update(
+        self,
+        documents: Mapping[str, TokenArray],
+        min_df: float | int = 1,
+        required_terms: Iterable[str] = (),
+    ) -> int:
+        """Count the n-grams of the new and changed documents and mask out the
+        documents missing from ``documents``. Returns the number of rows added.
+
+        Only the n-grams that can be in ``min_df`` of the documents are stored, so
+        document_term_matrix must be given this min_df or a higher one; the
+        n-grams of ``required_terms`` are always stored, for transform.
+        """
+        changed = {
+            key: (tokens, digest)
+            for key, tokens in documents.items()
+            if (digest := tokens.digest()) != self.rows.get(key, (None, None))[1]
+        }
+        removed = [key for key in self.rows if key not in documents]
+        for key in removed:
+            del self.rows[key]
+
+        # Documents with words whose n-grams were not stored so far
+        allowed_words = self._allowed_words(documents, min_df, required_terms)
+        stored_words = self.ngram_words
+        if stored_words is not None:
+            new_words = None if allowed_words is None else allowed_words - stored_words
+            if new_words is None or new_words:
+                for key, tokens in documents.items():
+                    if key in changed or key not in self.rows:
+                        continue
+                    if (
+                        not stored_words.issuperset(tokens.words)
+                        if new_words is None
+                        else not new_words.isdisjoint(tokens.words)
+                    ):
+                        changed[key] = (tokens, self.rows[key][1])
+            self.ngram_words = (
+                None if allowed_words is None else stored_words | allowed_words
+            )
+
+        if changed:
+            self._append(changed)
+        if changed or removed or self.ngram_words != stored_words:
+            if self.nnz and self._live_nnz() < (1 - MAX_DEAD_RATIO) * self.nnz:
+                self._compact(allowed_words)
+            self._save()
+        return len(changed)
+
+    def _allowed_words(
+        self,
+        documents: Mapping[str, TokenArray],
+        min_df: float | int,
+        required_terms: Iterable[str],
+    ) -> set[str] | None:
+        """Words of the n-grams of two words or more that can be kept with
+        ``min_df``, those in at least min_df documents, None for all words."""
+        min_count = (
+            min_df if isinstance(min_df, numbers.Integral) else min_df * len(documents)
+        )
+        if self.ngram_range[1] < 2 or min_count <= 1:
+            return None
+        document_frequency = Counter()
+        for tokens in documents.values():
+            document_frequency.update(tokens.words)
+        allowed_words = {
+            word for word, count in document_frequency.items() if count >= min_count
+        }
+        for term in required_terms:
+            allowed_words.update(term.split(" "))
+        return allowed_words
+
+    def _append(self, changed: dict[str, tuple[TokenArray, str]]) -> None:
+        """Count the documents of ``changed`` ``BATCH_SIZE`` at a time, so that
+        counting a whole corpus (first run) never holds all its n-grams at once."""
+        items = list(changed.items())
+        for start in range(0, len(items), BATCH_SIZE):
+            self._append_batch(dict(items[start : start + BATCH_SIZE]))
+
+    def _append_batch(self, changed: dict[str, tuple[TokenArray, str]]) -> None:
+        token_arrays = [tokens for tokens, _ in changed.values()]
+        try:
+            matrix, names = document_term_matrix(
+                token_arrays, self.ngram_range, allowed_words=self.ngram_words
+            )
+        except ValueError:  # Only empty documents
+            matrix = sp.csr_matrix((len(token_arrays), 0), dtype=np.int64)
+            names = []
+
+        # Columns of the n-grams in the cache, new n-grams appended to the terms
+        term_ids = self.term_ids()
+        new_terms = [name for name in names if name not in term_ids]
+        for term in new_terms:
+            term_ids[term] = len(self.terms)
+            self.terms.append(term)
+        columns = np.fromiter(
+            (term_ids[name] for name in names), dtype=np.int32, count=len(names)
+        )
+        matrix.indices = columns[matrix.indices]
+        matrix.sort_indices()
+
+        # Appended past the lengths of the index, cutting what an interrupted
+        # update may have left
+        for name, values, item_size in (
+            ("indices", matrix.indices.astype("<i4"), 4),
+            ("data", matrix.data.astype("<i4"), 4),
+        ):
+            with open(self._file(name), "ab") as f:
+                f.truncate(self.nnz * item_size)
+                f.write(values.tobytes())
+        with open(self._terms_file(), "ab") as f:
+            f.truncate(self.terms_size)
+            data = "".join(term + "\n" for term in new_terms).encode("utf-8")
+            f.write(data)
+            self.terms_size += len(data)
+
+        first_row = self.n_rows
+        self.indptr = np.concatenate([self.indptr, self.nnz + matrix.indptr[1:]])
+        for i, (key, (_, digest)) in enumerate(changed.items()):
+            self.rows[key] = (first_row + i, digest)
+
+    def _live_nnz(self) -> int:
+        rows = np.fromiter((row for row, _ in self.rows.values()), dtype=np.int64)
+        return int((self.indptr[rows + 1] - self.indptr[rows]).sum())
+
+    def _compact(self, allowed_words: set[str] | None) -> None:
+        """Rewrite the matrix with the rows of the current documents only, and the
+        terms with the columns that still have counts, the n-grams of two words or
+        more only with ``allowed_words``."""
+        keys = list(self.rows)
+        matrix = self.matrix()[[self.rows[key][0] for key in keys]]
+        live = np.bincount(matrix.indices, minlength=len(self.terms)) > 0
+        if allowed_words is not None:
+            live &= np.fromiter(
+                (
+                    " " not in term or allowed_words.issuperset(term.split(" "))
+                    for term in self.terms
+                ),
+                dtype=bool,
+                count=len(self.terms),
+            )
+        live_terms = np.flatnonzero(live)
+        matrix = matrix[:, live_terms]
+        terms = [self.terms[i] for i in live_terms.tolist()]
+        terms_data = "".join(term + "\n" for term in terms).encode("utf-8")
+
+        generation = self.generation + 1
+        for name, values in (("indices", matrix.indices), ("data", matrix.data)):
+            with open(self._file(name, generation), "wb") as f:
+                f.write(values.astype("<i4").tobytes())
+        with open(self._terms_file(generation), "wb") as f:
+            f.write(terms_data)
+        old_generation = self.generation
+        self.generation = generation
+        self.indptr = matrix.indptr.astype(np.int64)
+        self.rows = {key: (i, self.rows[key][1]) for i, key in enumerate(keys)}
+        self.terms = terms
+        self.terms_size = len(terms_data)
+        self._term_ids = None
+        self.ngram_words = allowed_words
+        self._save()
+        for path in (
+            self._file("indices", old_generation),
+            self._file("data", old_generation),
+            self._terms_file(old_generation),
+        ):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        print(f"[DTM CACHE] Compacted to {len(keys)} documents and {len(terms)} terms")
+
+    def matrix(self) -> sp.csr_matrix:
+        """Every stored row, including masked ones, memory-mapped."""
+        if self.nnz == 0:
+            indices = np.empty(0, dtype=np.int32)
+            data = np.empty(0, dtype=np.int32)
+        else:
+            indices = np.memmap(
+                self._file("indices"), dtype="<i4", mode="r", shape=(self.nnz,)
+            )
+            data = np.memmap(
+                self._file("data"), dtype="<i4", mode="r", shape=(self.nnz,)
+            )
+        return sp.csr_matrix(
+            (data, indices, self.indptr), shape=(self.n_rows, len(self.terms))
+        )
+
+    def _select_rows(self, keys: Sequence[str]) -> sp.csr_matrix:
+        return self.matrix()[[self.rows[key][0] for key in keys]]
+
+    def document_term_matrix(
+        self,
+        keys: Sequence[str],
+        min_df: float | int = 1,
+        max_df: float | int = 1.0,
+        max_features: int | None = None,
+    ) -> tuple[sp.csr_matrix, np.ndarray]:
+        """Same result as ``token_arrays.document_term_matrix`` for the documents
+        of ``keys``, which must be up to date (see update)."""
+        matrix = self._select_rows(keys)
+        kept = select_terms(matrix, min_df, max_df)
+        feature_names = np.array(self.terms, dtype=object)[kept]
+        order = np.argsort(feature_names, kind="stable")
+        return limit_features(
+            matrix[:, kept[order]], feature_names[order], max_features
+        )
+
+    def transform(self, keys: Sequence[str], terms: Sequence[str]) -> sp.csr_matrix:
+        """Counts of ``terms`` in the documents of ``keys``, like
+        ``TermIndex(terms).transform``."""
+        matrix = self._select_rows(keys).tocoo()
+        term_ids = self.term_ids()
+        columns = np.full(len(self.terms), -1, dtype=np.int64)
+        for column, term in enumerate(terms):
+            term_id = term_ids.get(term)
+            if term_id is not None:
+                columns[term_id] = column
+        new_columns = columns[matrix.col]
+        found = new_columns >= 0
+        return sp.csr_matrix(
+            (matrix.data[found], (matrix.row[found], new_columns[found])),
+            shape=(len(keys), len(terms)),
+        )
@@ -0,0 +1,164 @@
+import codecs
+import io
+import os
+import tempfile
+from collections.abc import Iterable, Iterator
+
+import chardet
+
+ENCODING_SAMPLE_SIZE = 64 * 1024
+SEGMENT_SIZE = 1024 * 1024
+# chardet guesses from a few stray bytes are noise
+MIN_GUESS_CONFIDENCE = 0.5
+
+
+def detect_encoding(file_path: str, sample_size: int = ENCODING_SAMPLE_SIZE) -> str:
+    """Guess the encoding of a text file from a sample of its first bytes.
+
+    UTF-8 is checked first (it is by far the most common and chardet is slow to
+    confirm it), otherwise chardet decides, falling back to latin-1.
+    """
+    with open(file_path, "rb") as f:
+        sample = f.read(sample_size)
+    try:
+        # The sample may end in the middle of a multi-byte character
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    return chardet.detect(sample)["encoding"] or "latin-1"
+
+
+def _fallback_encoding(data: bytes, encoding: str) -> str:
+    """Encoding of ``data``, which starts with bytes invalid in ``encoding``: the
+    one chardet confidently guesses if it decodes ``data``, otherwise latin-1,
+    which decodes anything."""
+    guess = chardet.detect(data[:ENCODING_SAMPLE_SIZE])
+    guess = guess["encoding"] if guess["confidence"] >= MIN_GUESS_CONFIDENCE else None
+    if guess and codecs.lookup(guess).name != codecs.lookup(encoding).name:
+        try:
+            codecs.getincrementaldecoder(guess)().decode(data)
+            return guess
+        except UnicodeDecodeError:
+            pass
+    return "latin-1"
+
+
+def iter_text_file(
+    file_path: str, encoding: str | None = None, chunk_size: int = SEGMENT_SIZE
+) -> Iterator[str]:
+    """Decode a text file chunk by chunk, detecting its encoding on a sample.
+
+    The sample may not be representative of the whole file, so it is decoded
+    strictly: from the first byte that fails to decode, the rest of the file is
+    decoded with the encoding chardet guesses for it, or latin-1.
+    """
+    encoding = encoding or detect_encoding(file_path)
+    decoder = codecs.getincrementaldecoder(encoding)()
+    # Universal newlines, as when reading in text mode
+    newlines = io.IncrementalNewlineDecoder(None, translate=True)
+    with open(file_path, "rb") as f:
+        final = False
+        while not final:
+            chunk = f.read(chunk_size)
+            final = not chunk
+            try:
+                text = decoder.decode(chunk, final=final)
+            except UnicodeDecodeError as error:
+                # With the bytes of a character cut at the end of the previous
+                # chunk, which the error position counts
+                data = decoder.getstate()[0] + chunk
+                # The bytes before the error are valid in the detected encoding
+                text = codecs.decode(data[: error.start], encoding)
+                rest = data[error.start :]
+                fallback = _fallback_encoding(rest, encoding)
+                print(
+                    f"{file_path} is not all {encoding}, decoding the rest as {fallback}"
+                )
+                encoding = fallback
+                decoder = codecs.getincrementaldecoder(encoding)()
+                text += decoder.decode(rest, final=final)
+            text = newlines.decode(text, final=final)
+            if text:
+                yield text
+
+
+class ExtractedText:
+    """Lazily read handle on extracted text.
+
+    Small texts are kept in memory, large ones in a file that is only read segment
+    by segment, so consumers can stream over a text far bigger than the memory of
+    a worker. The handle is picklable: a file-backed text is handed to another
+    process by its path. Call ``discard`` once done to remove the file.
+    """
+
+    def __init__(self, text: str | None = None, path: str | None = None, length=0):
+        self._text = text
+        self.path = path
+        self.length = len(text) if text is not None else length
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def in_memory(self) -> bool:
+        return self.path is None
+
+    def segments(self, segment_size: int = SEGMENT_SIZE) -> Iterator[str]:
+        if self._text is not None:
+            for start in range(0, len(self._text), segment_size):
+                yield self._text[start : start + segment_size]
+            return
+        with open(self.path, encoding="utf-8") as f:
+            while segment := f.read(segment_size):
+                yield segment
+
+    def read(self) -> str:
+        if self._text is not None:
+            return self._text
+        with open(self.path, encoding="utf-8") as f:
+            return f.read()
+
+    def discard(self) -> None:
+        self._text = None
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class TextSpool:
+    """Collects text in memory, moving it to a file past ``max_memory`` characters."""
+
+    def __init__(self, max_memory: int, dir: str | None = None):
+        self.max_memory = max_memory
+        self.dir = dir
+        self.length = 0
+        self._buffer: io.StringIO | None = io.StringIO()
+        self._file = None
+        self._path: str | None = None
+
+    def write(self, text: str) -> None:
+        if self._file is None and self.length + len(text) > self.max_memory:
+            fd, self._path = tempfile.mkstemp(dir=self.dir, suffix=".txt")
+            self._file = open(fd, "w", encoding="utf-8")
+            self._file.write(self._buffer.getvalue())
+            self._buffer = None
+        if self._file is not None:
+            self._file.write(text)
+        else:
+            self._buffer.write(text)
+        self.length += len(text)
+
+    def writelines(self, segments: Iterable[str]) -> None:
+        for segment in segments:
+            self.write(segment)
+
+    def close(self) -> ExtractedText:
+        """Stop writing and return a handle on the collected text."""
+        if self._file is not None:
+            self._file.close()
+            return ExtractedText(path=self._path, length=self.length)
+        return ExtractedText(text=self._buffer.getvalue())
+
+    def abort(self) -> None:
+        """Stop writing and drop the collected text."""
+        self.close().discard()
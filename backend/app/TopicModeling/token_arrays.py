@@ -0,0 +1,309 @@
+"""Integer-encoded mined documents and the document-term matrix built from them.
+
+A mined document is kept as the ids of its tokens, in text order, into its own
+vocabulary of distinct words. The topic modeling stage merges the vocabularies and
+counts unigrams and n-grams with NumPy, building the same sparse matrix as
+CountVectorizer without joining the tokens into strings and tokenizing them again.
+"""
+
+import numbers
+import re
+import struct
+import sys
+import zlib
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+
+from app.TopicModeling.memo import digest
+
+# Tokens shorter than this are dropped, like CountVectorizer's default token_pattern
+MIN_TOKEN_LENGTH = 2
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+HEADER = struct.Struct("<II")  # distinct words, tokens
+
+
+class TokenArray:
+    """Tokens of a document as ids into ``words``, its distinct words."""
+
+    def __init__(self, words: list[str], ids: np.ndarray):
+        self.words = words
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __sizeof__(self) -> int:
+        return (
+            object.__sizeof__(self)
+            + self.ids.nbytes
+            + sum(sys.getsizeof(word) for word in self.words)
+        )
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Number of occurrences of each word."""
+        return np.bincount(self.ids, minlength=len(self.words))
+
+    def digest(self) -> str:
+        """Digest of the tokens, to tell whether a document changed."""
+        return digest("\n".join(self.words), self.ids.astype("<u4").tobytes())
+
+    def tokens(self) -> list[str]:
+        return [self.words[i] for i in self.ids]
+
+    def text(self) -> str:
+        """The tokens joined by spaces, in order: the mined_text of a document."""
+        return " ".join(self.tokens())
+
+    @classmethod
+    def from_tokens(cls, tokens: Iterable[str]) -> "TokenArray":
+        word_ids: dict[str, int] = {}
+        ids = [word_ids.setdefault(token, len(word_ids)) for token in tokens]
+        return cls(list(word_ids), np.array(ids, dtype=np.uint32))
+
+    @classmethod
+    def from_text(cls, text: str) -> "TokenArray":
+        """Tokenize ``text`` as CountVectorizer does, e.g. a mined_text string."""
+        return cls.from_tokens(TOKEN_PATTERN.findall(text.lower()))
+
+    def to_bytes(self) -> bytes:
+        words = "\n".join(self.words).encode("utf-8")
+        return zlib.compress(
+            HEADER.pack(len(self.words), len(self.ids))
+            + words
+            + self.ids.astype("<u4").tobytes()
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TokenArray":
+        data = zlib.decompress(data)
+        n_words, n_ids = HEADER.unpack_from(data)
+        words_end = len(data) - 4 * n_ids
+        words = data[HEADER.size : words_end].decode("utf-8").split("\n")
+        ids = np.frombuffer(data, dtype="<u4", offset=words_end).astype(np.uint32)
+        return cls(words if n_words else [], ids)
+
+
+def _ngram_keys(ids: np.ndarray, n: int, n_words: int) -> np.ndarray:
+    """Each n-gram of ``ids`` packed in an int64, first id most significant."""
+    if len(ids) < n:
+        return np.empty(0, dtype=np.int64)
+    keys = ids[: len(ids) - n + 1].astype(np.int64)
+    for offset in range(1, n):
+        keys = keys * n_words + ids[offset : len(ids) - n + 1 + offset]
+    return keys
+
+
+def _allowed_windows(allowed: np.ndarray, n: int) -> np.ndarray:
+    """Which n-grams of a document have all their words allowed, given whether
+    each token is."""
+    windows = np.ones(max(len(allowed) - n + 1, 0), dtype=bool)
+    for offset in range(n):
+        windows &= allowed[offset : len(allowed) - n + 1 + offset]
+    return windows
+
+
+def _ngram_name(key: int, n: int, words: Sequence[str], n_words: int) -> str:
+    parts = []
+    for _ in range(n):
+        key, word_id = divmod(key, n_words)
+        parts.append(words[word_id])
+    return " ".join(reversed(parts))
+
+
+def document_frequency_limits(
+    min_df: float | int, max_df: float | int, n_documents: int
+) -> tuple[float, float]:
+    """Minimum and maximum number of documents of a term, from CountVectorizer's
+    min_df and max_df (a number of documents or a proportion)."""
+    max_count = max_df if isinstance(max_df, numbers.Integral) else max_df * n_documents
+    min_count = min_df if isinstance(min_df, numbers.Integral) else min_df * n_documents
+    if max_count < min_count:
+        raise ValueError("max_df corresponds to < documents than min_df")
+    return min_count, max_count
+
+
+def limit_features(
+    matrix: sp.csr_matrix, feature_names: np.ndarray, max_features: int | None
+) -> tuple[sp.csr_matrix, np.ndarray]:
+    """The ``max_features`` most frequent columns of a document-term matrix with
+    its columns in alphabetical order, exactly as CountVectorizer picks them."""
+    if max_features is None or max_features >= matrix.shape[1]:
+        return matrix, feature_names
+    kept = np.sort(top_terms(np.asarray(matrix.sum(axis=0)).ravel(), max_features))
+    return matrix[:, kept], feature_names[kept]
+
+
+def top_terms(term_frequency: np.ndarray, max_features: int) -> np.ndarray:
+    """Positions of the ``max_features`` highest frequencies of terms given in
+    alphabetical order, tied terms in CountVectorizer's order."""
+    # Same (unstable) sort as CountVectorizer._limit_features
+    return (-term_frequency).argsort()[:max_features]
+
+
+def select_terms(
+    matrix: sp.csr_matrix, min_df: float | int, max_df: float | int
+) -> np.ndarray:
+    """Columns of a document-term matrix found in neither too few nor too many
+    documents, with CountVectorizer's errors."""
+    if matrix.shape[1] == 0:
+        raise ValueError(
+            "empty vocabulary; perhaps the documents only contain stop words"
+        )
+    min_count, max_count = document_frequency_limits(min_df, max_df, matrix.shape[0])
+    document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    kept = np.flatnonzero(
+        (document_frequency >= min_count) & (document_frequency <= max_count)
+    )
+    if len(kept) == 0:
+        raise ValueError(
+            "After pruning, no terms remain. Try a lower min_df or a higher max_df."
+        )
+    return kept
+
+
+def document_term_matrix(
+    documents: Sequence[TokenArray],
+    ngram_range: tuple[int, int] = (1, 1),
+    min_df: float | int = 1,
+    max_df: float | int = 1.0,
+    max_features: int | None = None,
+    allowed_words: set[str] | None = None,
+) -> tuple[sp.csr_matrix, np.ndarray]:
+    """Counts of the n-grams of each document and the n-gram of each column.
+
+    Same result as ``CountVectorizer(ngram_range, min_df, max_df, max_features)
+    .fit_transform`` on the documents joined by spaces: columns in alphabetical
+    order, n-grams found in too few or too many documents removed. With
+    ``allowed_words``, the n-grams of two words or more with a word outside of it
+    are not counted.
+    """
+    vocabulary: dict[str, int] = {}
+    documents_ids = []
+    for document in documents:
+        mapping = np.fromiter(
+            (vocabulary.setdefault(word, len(vocabulary)) for word in document.words),
+            dtype=np.int64,
+            count=len(document.words),
+        )
+        documents_ids.append(mapping[document.ids])
+    words = list(vocabulary)
+    n_words = max(len(words), 1)
+    min_n, max_n = ngram_range
+    if n_words**max_n >= 2**63:
+        raise ValueError(f"Too many words to count {max_n}-grams: {len(words)}")
+    allowed = None
+    if allowed_words is not None:
+        allowed = np.fromiter(
+            (word in allowed_words for word in words), dtype=bool, count=len(words)
+        )
+
+    n_documents = len(documents)
+    blocks, names = [], []
+    for n in range(min_n, max_n + 1):
+        keys = [_ngram_keys(ids, n, n_words) for ids in documents_ids]
+        if allowed is not None and n > 1:
+            keys = [
+                k[_allowed_windows(allowed[ids], n)]
+                for k, ids in zip(keys, documents_ids)
+            ]
+        rows = np.repeat(np.arange(n_documents), [len(k) for k in keys])
+        all_keys = np.concatenate(keys) if keys else np.empty(0, dtype=np.int64)
+        unique_keys, columns = np.unique(all_keys, return_inverse=True)
+        block = sp.csr_matrix(
+            (np.ones(len(columns), dtype=np.int64), (rows, columns.ravel())),
+            shape=(n_documents, len(unique_keys)),
+        )
+        block.sum_duplicates()
+        blocks.append(block)
+        names.append((n, unique_keys))
+    matrix = sp.hstack(blocks, format="csr")
+    kept = select_terms(matrix, min_df, max_df)
+
+    # Names of the kept columns, then alphabetical order
+    feature_names = np.empty(len(kept), dtype=object)
+    start = 0
+    position = 0
+    for n, unique_keys in names:
+        stop = start + len(unique_keys)
+        block_kept = kept[(kept >= start) & (kept < stop)]
+        for column in block_kept:
+            key = int(unique_keys[column - start])
+            feature_names[position] = _ngram_name(key, n, words, n_words)
+            position += 1
+        start = stop
+    order = np.argsort(feature_names, kind="stable")
+    return limit_features(matrix[:, kept[order]], feature_names[order], max_features)
+
+
+class TermIndex:
+    """Column of each term of a fixed vocabulary of n-grams, to vectorize documents
+    like ``CountVectorizer(vocabulary=terms).transform``.
+
+    Terms are packed in int64 keys over the words they are made of, so documents
+    are looked up with NumPy, n-grams with unknown words skipped.
+    """
+
+    def __init__(self, terms: Sequence[str]):
+        self.terms = list(terms)
+        self.words: dict[str, int] = {}
+        grouped: dict[int, tuple[list[int], list[int]]] = {}
+        parts = [term.split(" ") for term in self.terms]
+        for term_words in parts:
+            for word in term_words:
+                self.words.setdefault(word, len(self.words))
+        self.base = max(len(self.words), 1)
+        for column, term_words in enumerate(parts):
+            key = 0
+            for word in term_words:
+                key = key * self.base + self.words[word]
+            keys, columns = grouped.setdefault(len(term_words), ([], []))
+            keys.append(key)
+            columns.append(column)
+        self.keys: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+        for n, (keys, columns) in grouped.items():
+            keys = np.array(keys, dtype=np.int64)
+            order = np.argsort(keys)
+            self.keys[n] = (keys[order], np.array(columns, dtype=np.int64)[order])
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def transform(
+        self, documents: Sequence[TokenArray], dtype=np.int64
+    ) -> sp.csr_matrix:
+        rows, columns = [], []
+        for row, document in enumerate(documents):
+            mapping = np.fromiter(
+                (self.words.get(word, -1) for word in document.words),
+                dtype=np.int64,
+                count=len(document.words),
+            )
+            ids = mapping[document.ids]
+            for n, (keys, key_columns) in self.keys.items():
+                if len(ids) < n:
+                    continue
+                known = ids >= 0
+                windows = np.ones(len(ids) - n + 1, dtype=bool)
+                for offset in range(n):
+                    windows &= known[offset : len(ids) - n + 1 + offset]
+                ngrams = _ngram_keys(np.where(known, ids, 0), n, self.base)[windows]
+                positions = np.searchsorted(keys, ngrams)
+                positions[positions == len(keys)] = 0
+                found = keys[positions] == ngrams
+                columns.append(key_columns[positions[found]])
+                rows.append(np.full(int(found.sum()), row, dtype=np.int64))
+        matrix = sp.csr_matrix(
+            (
+                np.ones(sum(len(c) for c in columns), dtype=dtype),
+                (
+                    np.concatenate(rows) if rows else np.empty(0, dtype=np.int64),
+                    np.concatenate(columns) if columns else np.empty(0, dtype=np.int64),
+                ),
+            ),
+            shape=(len(documents), len(self.terms)),
+        )
+        matrix.sum_duplicates()
+        return matrix
@@ -7,8 +7,13 @@ from sklearn.decomposition import LatentDirichletAllocation
 from sklearn.feature_extraction.text import CountVectorizer
 
 from app.config import settings
+from app.TopicModeling.lda_fitting import LdaTelemetry, fit_lda
 from app.TopicModeling.miner_v2 import Miner
 from app.TopicModeling.Reader import Reader
+from app.TopicModeling.online_lda import TopicModelState
+from app.TopicModeling.streaming_vocabulary import build_vocabulary
+from app.TopicModeling.streaming_vocabulary import vectorize as streaming_vectorize
+from app.TopicModeling.term_matrix_cache import DocumentTermCache
 
 LIBREOFFICE_PATH = settings.LIBREOFFICE_PATH
 if not LIBREOFFICE_PATH:
@@ -18,6 +23,13 @@ if not TESSERACT_PATH:
     raise ValueError("TESSERACT_PATH must be set in environment variables.")
 NB_TOPICS = settings.LDA_NB_TOPICS if settings.LDA_NB_TOPICS else 5
 NB_TOP_WORDS = settings.LDA_NB_TOP_WORDS if settings.LDA_NB_TOP_WORDS else 10
+NGRAM_RANGE = (1, 2)
+MIN_DF = 0.05
+MAX_DF = 0.8
+MAX_FEATURES = settings.LDA_MAX_FEATURES or None
+DOC_TOPIC_PRIOR = 0.085
+TOPIC_WORD_PRIOR = 0.225
+N_JOBS = max(cpu_count() - 1, 1)
 
 
 def delete_eol(content):
@@ -29,23 +41,49 @@ def delete_eol(content):
         return content
 
 
+def iter_delete_eol(segments):
+    """delete_eol over a text given in segments, e.g. ExtractedText.segments()."""
+    carry = ""
+    for segment in segments:
+        segment = carry + segment
+        # A hyphen at the end may be followed by a line break in the next segment
+        carry = "-" if segment.endswith("-") else ""
+        if carry:
+            segment = segment[:-1]
+        yield delete_eol(segment)
+    if carry:
+        yield carry
+
+
 def get_length(content):
     if not isinstance(content, str):
         return 0
     return len(content)
 
 
-def process_documents(doc_df):
+def process_documents(doc_df, executor=None):
     print("[DOCUMENT PROCESSING] Processing documents...")
 
     reader = Reader(
         cv_file_column="file_path",
         doc_reader_path=LIBREOFFICE_PATH,
         tesseract_path=TESSERACT_PATH,
-        image_resolution=150,
+        image_resolution=settings.OCR_IMAGE_RESOLUTION,
+        ocr_workers=settings.OCR_WORKERS,
+        skip_blank_pages=settings.OCR_SKIP_BLANK_PAGES,
+        page_cache_size=settings.OCR_PAGE_CACHE_SIZE,
+        ocr_dpi_ladder=settings.OCR_DPI_LADDER,
+        ocr_min_confidence=settings.OCR_MIN_CONFIDENCE,
+        ocr_max_page_mb=settings.OCR_MAX_PAGE_MB,
+        ocr_preprocess=settings.OCR_PREPROCESS,
+        parallel_page_threshold=settings.PARALLEL_PDF_PAGE_THRESHOLD,
+        parallel_page_workers=settings.PARALLEL_PDF_WORKERS,
+        doc_converter_pool_size=settings.DOC_CONVERTER_POOL_SIZE,
+        cache_path=settings.EXTRACTION_CACHE_PATH,
+        cache_max_size=settings.EXTRACTION_CACHE_MAX_SIZE_MB * 1024 * 1024,
     )
 
-    doc_df = reader.read(doc_df)
+    doc_df = reader.read(doc_df, executor=executor)
 
     doc_df.to_pickle("./tmp/doc_df.reader.pkl")
 
@@ -80,8 +118,10 @@ def process_documents(doc_df):
 
     doc_df.to_pickle("./tmp/doc_df.transformer.pkl")
 
-    miner = Miner()
-    transf_doc_df = miner.mine(doc_df)
+    miner = Miner(settings.LEMMA_TABLE_PATH or None)
+    transf_doc_df = miner.mine(
+        doc_df, workers=settings.MINER_WORKERS, keep_intermediate=False
+    )
     transf_doc_df = transf_doc_df[
         [
             "file_name",
@@ -101,27 +141,138 @@ def process_documents(doc_df):
     return transf_doc_df
 
 
-def run_lda(doc_df):
-    print("[DOCUMENT PROCESSING] Starting LDA...")
-    vectorizer = CountVectorizer(ngram_range=(1, 2), max_df=0.8, min_df=0.05)
-    X = vectorizer.fit_transform(doc_df["content"])
-
-    doc_topic_prior = 0.085
-    topic_word_prior = 0.225
-
-    lda = LatentDirichletAllocation(
+def new_lda() -> LatentDirichletAllocation:
+    return LatentDirichletAllocation(
         n_components=NB_TOPICS,
         random_state=0,
-        verbose=1,
-        doc_topic_prior=doc_topic_prior,
-        topic_word_prior=topic_word_prior,
-        evaluate_every=50,
-        n_jobs=cpu_count() - 1,
-        max_iter=500,
+        doc_topic_prior=DOC_TOPIC_PRIOR,
+        topic_word_prior=TOPIC_WORD_PRIOR,
+        n_jobs=N_JOBS,
+        max_iter=settings.LDA_MAX_ITER,
     )
-    lda.fit(X)
 
-    topic_words = vectorizer.get_feature_names_out()
+
+def fit_new_lda(X) -> LatentDirichletAllocation:
+    """New LDA fitted on X until its perplexity plateaus, iterations logged in
+    LDA_TELEMETRY_PATH."""
+    return fit_lda(
+        new_lda(),
+        X,
+        tol=settings.LDA_TOL,
+        min_iter=settings.LDA_MIN_ITER,
+        evaluate_every=settings.LDA_EVALUATE_EVERY,
+        telemetry=LdaTelemetry(settings.LDA_TELEMETRY_PATH or None),
+    )
+
+
+def vectorize(doc_df, terms=None):
+    """Document-term matrix (float32 counts) of the "tokens" column of doc_df and
+    the term of each column: the n-grams kept by MIN_DF, MAX_DF and MAX_FEATURES,
+    or the given terms.
+
+    With DTM_CACHE_PATH, the counts are kept between runs and only the new and
+    changed documents are counted; like the vocabulary builder, the cache does not
+    count the n-grams with a word in fewer than MIN_DF documents. Otherwise the
+    vocabulary is built in passes under VOCABULARY_MAX_MEMORY_MB, then the
+    documents vectorized with it.
+    """
+    tokens = list(doc_df["tokens"])
+    if settings.DTM_CACHE_PATH:
+        keys = list(doc_df["file_name"])
+        cache = DocumentTermCache(settings.DTM_CACHE_PATH, NGRAM_RANGE)
+        n_counted = cache.update(
+            dict(zip(keys, tokens)),
+            min_df=MIN_DF,
+            required_terms=terms if terms is not None else (),
+        )
+        print(f"[DOCUMENT PROCESSING] Counted the n-grams of {n_counted} documents")
+        if terms is None:
+            X, terms = cache.document_term_matrix(
+                keys, min_df=MIN_DF, max_df=MAX_DF, max_features=MAX_FEATURES
+            )
+        else:
+            X, terms = cache.transform(keys, terms), np.array(terms, dtype=object)
+        return X.astype(np.float32), terms
+    if terms is None:
+        terms = build_vocabulary(
+            tokens,
+            NGRAM_RANGE,
+            min_df=MIN_DF,
+            max_df=MAX_DF,
+            max_features=MAX_FEATURES,
+            max_memory=settings.VOCABULARY_MAX_MEMORY_MB * 1024 * 1024,
+            tmp_dir="./tmp",
+        )
+    return streaming_vectorize(tokens, terms), np.array(terms, dtype=object)
+
+
+def update_lda(doc_df, full_refit=False):
+    """LDA of the saved topic model updated with the new and changed documents of
+    doc_df, or fitted again on all of them when needed. Returns the model, the
+    document-term matrix of doc_df and the term of each column.
+    """
+    documents = dict(zip(doc_df["file_name"], doc_df["tokens"]))
+    state = None
+    if full_refit:
+        reason = "requested"
+    else:
+        state = TopicModelState.load(settings.TOPIC_MODEL_PATH)
+        reason = (
+            "no saved model"
+            if state is None
+            else state.refit_reason(
+                documents,
+                NB_TOPICS,
+                max_delta_ratio=settings.LDA_REFIT_DELTA_RATIO,
+                max_age_days=settings.LDA_REFIT_MAX_AGE_DAYS,
+            )
+        )
+
+    if reason is None:
+        lda = state.to_lda(random_state=0, n_jobs=N_JOBS)
+        n_updated = state.fold_in(
+            lda,
+            documents,
+            NGRAM_RANGE,
+            MIN_DF,
+            MAX_DF,
+            telemetry=LdaTelemetry(settings.LDA_TELEMETRY_PATH or None),
+        )
+        print(f"[DOCUMENT PROCESSING] Topic model updated with {n_updated} documents")
+        X, topic_words = vectorize(doc_df, state.vocabulary)
+    else:
+        print(f"[DOCUMENT PROCESSING] Fitting the topic model again: {reason}")
+        X, topic_words = vectorize(doc_df)
+        lda = fit_new_lda(X)
+        state = TopicModelState.from_lda(lda, topic_words, documents)
+    state.save(settings.TOPIC_MODEL_PATH)
+    return lda, X, topic_words
+
+
+def run_lda(doc_df, full_refit=False):
+    """LDA on the "tokens" column (TokenArray) of doc_df, or on its "content".
+
+    With token arrays and LDA_INCREMENTAL, the model is kept between runs and only
+    updated with the documents that changed, unless full_refit.
+    """
+    print("[DOCUMENT PROCESSING] Starting LDA...")
+    if "tokens" in doc_df.columns and settings.LDA_INCREMENTAL:
+        lda, X, topic_words = update_lda(doc_df, full_refit)
+    else:
+        if "tokens" in doc_df.columns:
+            X, topic_words = vectorize(doc_df)
+        else:
+            vectorizer = CountVectorizer(
+                ngram_range=NGRAM_RANGE,
+                max_df=MAX_DF,
+                min_df=MIN_DF,
+                max_features=MAX_FEATURES,
+                dtype=np.float32,
+            )
+            X = vectorizer.fit_transform(doc_df["content"])
+            topic_words = vectorizer.get_feature_names_out()
+        lda = fit_new_lda(X)
+
     topic_word_prob = lda.components_ / lda.components_.sum(axis=1)[:, np.newaxis]
     topics = []
     for topic in topic_word_prob:
@@ -140,9 +291,9 @@ def run_lda(doc_df):
     return topics, doc_topics
 
 
-def run(doc_df):
+def run(doc_df, full_refit=False):
     print("[DOCUMENT PROCESSING] Starting Topic Modeling...")
-    topics, doc_topics = run_lda(doc_df)
+    topics, doc_topics = run_lda(doc_df, full_refit)
     return topics, doc_topics
 
 
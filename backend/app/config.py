@@ -29,6 +29,55 @@ class Settings(BaseSettings):
     LDA_NB_TOPICS: int = 5
     LDA_NB_TOP_WORDS: int = 10
     LDA_TRESHOLD_LINK: float = 0.01
+    # LDA stops once the perplexity, computed every LDA_EVALUATE_EVERY iterations,
+    # improved by less than LDA_TOL (relative), after at least LDA_MIN_ITER iterations
+    LDA_MAX_ITER: int = 500
+    LDA_MIN_ITER: int = 20
+    LDA_EVALUATE_EVERY: int = 5
+    LDA_TOL: float = 1e-3
+    LDA_TELEMETRY_PATH: str = "./tmp/lda_telemetry.jsonl"  # Per-iteration log
+    # Keep the topic model between runs and fold the new documents into it
+    LDA_INCREMENTAL: bool = True
+    TOPIC_MODEL_PATH: str = "./tmp/topic_model"
+    # N-gram counts of the documents kept between runs, empty to count them every run
+    DTM_CACHE_PATH: str = "./tmp/dtm_cache"
+    LDA_MAX_FEATURES: int = 0  # Most frequent n-grams kept, 0 to keep them all
+    # Memory cap of the n-gram counts when the vocabulary is built without the cache
+    VOCABULARY_MAX_MEMORY_MB: int = 256
+    # Full refit once this share of the documents changed since the last one, or
+    # once the model is this old (0 = never)
+    LDA_REFIT_DELTA_RATIO: float = 0.25
+    LDA_REFIT_MAX_AGE_DAYS: float = 30
+    EXTRACTION_WORKERS: int = 0  # Size of the shared extraction pool, 0 = all cores
+    EXTRACTION_TIMEOUT: float = 300.0  # Wall-clock limit per file, in seconds
+    EXTRACTION_MAX_RETRIES: int = 1
+    EXTRACTION_QUARANTINE_PATH: str = "./tmp/extraction_quarantine.json"
+    EXTRACTION_SCHEDULE: str = "longest_first"  # fifo, longest_first or shortest_first
+    # Pages OCR'd concurrently per scanned document, 0 = the cores divided between
+    # the extraction workers
+    OCR_WORKERS: int = 0
+    DOC_CONVERTER_POOL_SIZE: int = 2  # Warm LibreOffice instances, 0 = one-shot mode
+    OCR_IMAGE_RESOLUTION: int = 150
+    # Adaptive OCR, e.g. [100, 200, 300]: pages are OCR'd at the first resolution,
+    # then at the next ones while the mean word confidence stays under
+    # OCR_MIN_CONFIDENCE. Empty to always OCR at OCR_IMAGE_RESOLUTION.
+    OCR_DPI_LADDER: List[int] = []
+    OCR_MIN_CONFIDENCE: float = 70.0
+    # Memory cap of a page rendered (and preprocessed) for OCR, 0 for no cap
+    OCR_MAX_PAGE_MB: int = 64
+    OCR_PREPROCESS: bool = False  # Binarize, deskew and crop scanned pages before OCR
+    OCR_SKIP_BLANK_PAGES: bool = True
+    OCR_PAGE_CACHE_SIZE: int = 64  # OCR'd pages remembered to reuse duplicate pages
+    EXTRACTION_CACHE_PATH: str = "./tmp/extraction_cache"  # Empty to disable the cache
+    EXTRACTION_CACHE_MAX_SIZE_MB: int = 2048
+    EXTRACTION_SPOOL_THRESHOLD_MB: int = 64  # Larger texts are extracted to disk
+    # PDFs with at least this many pages have their text layer extracted by
+    # PARALLEL_PDF_WORKERS processes, 0 to disable
+    PARALLEL_PDF_PAGE_THRESHOLD: int = 500
+    PARALLEL_PDF_WORKERS: int = 4
+    MINER_WORKERS: int = 1  # Processes mining a batch of documents, 0 = all cores
+    # Word -> lemma table shared by the miners, built from WordNet if missing
+    LEMMA_TABLE_PATH: str = "./tmp/lemmas.bin"
     ALLOWED_EXTENSIONS: List[str] = [
         ".pdf", ".docx", ".doc", ".txt"
     ]
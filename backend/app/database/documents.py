@@ -90,6 +90,7 @@ def get_all_documents(
                 upload_date=doc["d"]["upload_date"],
                 text=doc["d"]["text"] if with_text else None,
                 mined_text=doc["d"]["mined_text"] if with_text else None,
+                mined_tokens=doc["d"].get("mined_tokens") if with_text else None,
             )
             for doc in result
         ]
@@ -259,9 +260,12 @@ def update_document(
 
 
 def set_text_of_document(
-    document_id: str, text: str | None = None, mined_text: str | None = None
+    document_id: str,
+    text: str | None = None,
+    mined_text: str | None = None,
+    mined_tokens: bytes | None = None,
 ) -> None:
-    """Set the text of a document"""
+    """Set the text of a document, mined_tokens being a serialized TokenArray"""
     if not document_id:
         raise ValueError("Document ID must be provided.")
     if text is None and mined_text is None:
@@ -275,6 +279,9 @@ def set_text_of_document(
     if mined_text is not None:
         set_clause.append("d.mined_text = $mined_text")
         parameters["mined_text"] = mined_text
+    if mined_tokens is not None:
+        set_clause.append("d.mined_tokens = $mined_tokens")
+        parameters["mined_tokens"] = mined_tokens
 
     set_clause_str = ", ".join(set_clause)
     execute_neo4j_query(
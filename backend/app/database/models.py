@@ -8,6 +8,7 @@ class Document:
         path: str,
         text: str | None = None,
         mined_text: str | None = None,
+        mined_tokens: bytes | None = None,
         processed: bool = False,
         upload_date: str | None = None,
     ):
@@ -16,6 +17,7 @@ class Document:
         self.path = path
         self.text = text
         self.mined_text = mined_text
+        self.mined_tokens = mined_tokens
         self.processed = processed
         self.upload_date = upload_date
 
@@ -1,12 +1,24 @@
+import asyncio
 import os
 import pathlib
-from multiprocessing import Pool, cpu_count
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 
 from app.config import settings
 from app.database.documents import get_all_documents, create_chunks_embedding_index
 from app.database.users import get_all_users, create_user
-from app.utils.document_transformer import preprocess_document
+from app.TopicModeling.Reader import get_reader
+from app.utils.document_transformer import preprocess_document, space_between_word
+from app.utils.preview import PreviewManager
+from app.TopicModeling.progress import BatchProgress, order_by_cost
+from app.utils.extraction_pool import (
+    estimate_costs,
+    pool_size,
+    reader_config,
+    set_extraction_progress,
+    start_doc_converter,
+)
 
 DOCUMENT_STORAGE_PATH = settings.DOCUMENT_STORAGE_PATH
 if not DOCUMENT_STORAGE_PATH:
@@ -37,21 +49,111 @@ def add_existing_documents():
             continue
         if file_path.startswith("."):
             continue
+        # Stored documents are not extracted again, keep them out of the schedule
+        # and of the progress
+        if _is_stored(file_path, stored_documents):
+            continue
 
         tasks.append((complete_file_path, file_path, stored_documents))
+    if not tasks:
+        print("No new documents to add")
+        return
+
+    # Convert all new .doc files up front in a few batched LibreOffice calls
+    doc_contents = _convert_doc_files(
+        [
+            complete_file_path
+            for complete_file_path, file_path, _ in tasks
+            if pathlib.Path(file_path).suffix.lower() == ".doc"
+        ]
+    )
+    tasks = [
+        (complete_file_path, file_path, stored, doc_contents.get(complete_file_path))
+        for complete_file_path, file_path, stored in tasks
+    ]
+
+    # Submit the documents in the configured order of estimated extraction cost
+    costs = estimate_costs([task[0] for task in tasks])
+    order = {
+        path: i
+        for i, path in enumerate(order_by_cost(costs, settings.EXTRACTION_SCHEDULE))
+    }
+    tasks.sort(key=lambda task: order[task[0]])
+    progress = BatchProgress("extraction", costs, workers=pool_size())
+    set_extraction_progress(progress)
 
-    num_processes = min(cpu_count(), len(tasks))
-    print(f"Processing {len(tasks)} documents using {num_processes} processes")
+    # Extraction runs in the shared extraction pool, the threads only wait on it and
+    # on the database and embedding calls
+    num_threads = min(pool_size(), len(tasks))
+    print(f"Processing {len(tasks)} documents using {num_threads} threads")
 
-    with Pool(processes=num_processes) as pool:
-        pool.map(_preprocess_wrapper, tasks)
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        list(executor.map(lambda task: _preprocess_wrapper(task, progress), tasks))
 
     create_chunks_embedding_index()
 
 
-def _preprocess_wrapper(args):
-    complete_file_path, file_path, stored_documents = args
-    preprocess_document(complete_file_path, file_path, stored_documents)
+def start_adding_existing_documents() -> threading.Thread:
+    """Add the existing documents, then generate the missing previews, in a
+    background thread, so that the API serves requests (and the progress of the
+    batch) while they are extracted."""
+    thread = threading.Thread(
+        target=_add_existing_documents_task, name="AddExistingDocuments", daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def _add_existing_documents_task():
+    try:
+        add_existing_documents()
+    except Exception as e:
+        print(f"Error adding existing documents: {e}")
+
+    try:
+        preview_manager = PreviewManager()
+        asyncio.run(preview_manager.generate_all_previews())
+    except Exception as e:
+        print(f"Error generating previews: {e}")
+
+
+def _preprocess_wrapper(args, progress: BatchProgress | None = None):
+    complete_file_path, file_path, stored_documents, raw_content = args
+    try:
+        preprocess_document(
+            complete_file_path, file_path, stored_documents, raw_content
+        )
+    finally:
+        if progress is not None:
+            progress.complete(complete_file_path)
+
+
+def _is_stored(file_path: str, stored_documents: list) -> bool:
+    spaced_filename = space_between_word(os.path.splitext(file_path)[0])
+    return any(doc.filename == spaced_filename for doc in stored_documents)
+
+
+def _convert_doc_files(file_paths: list[str]) -> dict[str, str]:
+    """Batch convert .doc files, returns the raw text of each converted file."""
+    if not file_paths:
+        return {}
+    # Same soffice instances as the extraction workers
+    start_doc_converter()
+    reader = get_reader(reader_config())
+    if reader.cache is not None:
+        # Files already in the extraction cache will not be converted again
+        file_paths = [
+            path for path in file_paths if reader.cache_key(path) not in reader.cache
+        ]
+        if not file_paths:
+            return {}
+
+    print(f"Converting {len(file_paths)} .doc files...")
+    try:
+        return reader.read_docs(file_paths)
+    except Exception as e:
+        print(f"Error converting .doc files, they will be converted one by one: {e}")
+        return {}
 
 
 def create_admin_user():
@@ -5,12 +5,13 @@ import uvicorn
 from anyio.streams.file import FileWriteStream
 from app.config import settings
 from app.init_database import (
-    add_existing_documents,
     create_admin_user,
+    start_adding_existing_documents,
 )
 from app.database.main import check_neo4j_connection
 from app.routers import documents, users, chatbot, topics
-from app.utils.preview import PreviewManager
+from app.TopicModeling.doc_converter import shutdown_converter_pools
+from app.utils.extraction_pool import shutdown_extraction_pool
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -22,15 +23,11 @@ async def lifespan(appli: FastAPI):
     if not check_neo4j_connection():
         raise ValueError("Could not connect to Neo4j database. Check your connection.")
 
-    add_existing_documents()
     create_admin_user()
     print("Database initialized")
-
-    try:
-        preview_manager = PreviewManager()
-        await preview_manager.generate_all_previews()
-    except Exception as e:
-        print(f"Error generating previews: {e}")
+    # Existing documents are extracted (and their previews generated) while the
+    # API is up, see GET /documents/process/status for the progress
+    start_adding_existing_documents()
 
     try:
         path = "./openapi.json"
@@ -43,6 +40,8 @@ async def lifespan(appli: FastAPI):
 
     yield
     print("Shutting down...")
+    shutdown_extraction_pool()
+    shutdown_converter_pools()
 
 
 # Initialize FastAPI
@@ -15,7 +15,7 @@ from app.schemas import (
     TopicResponse,
 )
 from app.TopicModeling.topic_modeling_v3 import delete_document_from_cache
-from app.utils.preview import PreviewManager
+from app.utils.preview import PreviewManager, discard_preview_source
 from app.utils.process_manager import ProcessManager
 from app.utils.security import get_current_user
 from app.utils.document_transformer import space_between_word, preprocess_document
@@ -109,6 +109,7 @@ async def upload_document(
         # overwriting if file already exists
         file_path = os.path.join(DOCUMENT_STORAGE_PATH, file.filename)
         if os.path.exists(file_path):
+            discard_preview_source(file_path)
             os.remove(file_path)
         with open(file_path, "wb") as f:
             content = await file.read()
@@ -265,8 +266,11 @@ async def list_documents(
     response_model=DocumentProcess,
     tags=["process"],
 )
-def process_document(_: User = Depends(get_current_user)):
-    """Process documents and extract topics"""
+def process_document(full_refit: bool = False, _: User = Depends(get_current_user)):
+    """Process documents and extract topics.
+
+    The topic model is updated with the new documents only, unless full_refit.
+    """
 
     if process_manager.is_running():
         raise HTTPException(status_code=409, detail="Process is already running")
@@ -276,12 +280,12 @@ def process_document(_: User = Depends(get_current_user)):
         if not documents:
             raise HTTPException(status_code=404, detail="No documents available")
 
-        if all(document.processed for document in documents):
+        if not full_refit and all(document.processed for document in documents):
             raise HTTPException(
                 status_code=409, detail="All documents are already processed"
             )
 
-        process_manager.run_process(documents)
+        process_manager.run_process(documents, full_refit)
 
         return {"message": "Processing started"}
     except HTTPException as e:
@@ -310,6 +314,8 @@ async def get_process_status(_: User = Depends(get_current_user)):
     response = {
         "status": process_manager.status.value,
         "last_run_time": process_manager.last_run_time,
+        "progress": process_manager.progress,
+        "lda": process_manager.lda_progress,
     }
     return response
 
@@ -326,6 +332,8 @@ async def delete_document(
             raise HTTPException(status_code=404, detail="Document not found")
 
         delete_document_from_cache(document.path)
+        if document.path:
+            discard_preview_source(document.path)
 
         delete_document_db(str(document_id))
 
@@ -357,8 +365,13 @@ async def update_document(
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
 
+        # The first page render of the previous file must not be used for the
+        # previews of the new one
+        if document.path:
+            discard_preview_source(document.path)
         file_path = os.path.join(DOCUMENT_STORAGE_PATH, file.filename)
         if os.path.exists(file_path):
+            discard_preview_source(file_path)
             os.remove(file_path)
         with open(file_path, "wb") as f:
             content = await file.read()
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 
-from app.schemas import TopicsList
+from app.schemas import TopicInference, TopicInferRequest, TopicsList
 from app.models import User
+from app.utils.extraction_pool import submit_mining
+from app.utils.process_documents import infer_topics
 from app.utils.security import get_current_user
 from app.database.topics import get_all_topics
 
@@ -22,3 +24,41 @@ async def get_topics(_: User = Depends(get_current_user),):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal Server Error",
         )
+
+
+@router.post(
+    "/topics/infer", response_model=TopicInference, status_code=200, tags=["topics"]
+)
+def infer_text_topics(request: TopicInferRequest, _: User = Depends(get_current_user)):
+    """
+    Get the topic distribution of a text with the current topic model, most
+    likely topics first. The model is not updated.
+    """
+    try:
+        tokens = submit_mining(request.text).result()
+        inferred = infer_topics([tokens])
+        if inferred is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No topic model, process the documents first",
+            )
+        topic_weights, topics = inferred
+        items = [
+            {
+                "id": topic.id,
+                "name": topic.name,
+                "description": topic.description,
+                "weight": float(weight),
+            }
+            for topic, weight in zip(topics, topic_weights[0])
+        ]
+        items.sort(key=lambda item: item["weight"], reverse=True)
+        return {"items": items}
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        print(f"Error 500 - Inferring topics: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        )
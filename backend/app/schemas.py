@@ -19,6 +19,15 @@ class TopicResponse(TopicBase):
 class TopicsList(BaseModel):
     items: list[TopicBase]
 
+class TopicInferRequest(BaseModel):
+    text: str
+
+class InferredTopic(TopicBase):
+    weight: float
+
+class TopicInference(BaseModel):
+    items: list[InferredTopic]
+
 class DocumentList(BaseModel):
     id: uuid.UUID
     filename: str
@@ -43,9 +52,31 @@ class DocumentProcess(BaseModel):
     message: str
 
 
+class ProcessProgress(BaseModel):
+    stage: str
+    total: int
+    completed: int
+    elapsed_seconds: float
+    eta_seconds: float
+
+
+class LdaProgress(BaseModel):
+    mode: str  # "fit" or "fold_in"
+    iterations: int
+    max_iter: int
+    seconds_per_iteration: float
+    elapsed_seconds: float
+    perplexity: Optional[float] = None
+    converged: bool
+    done: bool
+    error: Optional[str] = None
+
+
 class DocumentProcessStatus(BaseModel):
     status: ProcessStatus
     last_run_time: Optional[datetime] = None
+    progress: Optional[ProcessProgress] = None
+    lda: Optional[LdaProgress] = None
 
 
 class Document(SQLModel):
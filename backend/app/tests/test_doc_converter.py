@@ -0,0 +1,139 @@
+import multiprocessing
+import os
+import sys
+import time
+
+from app.TopicModeling.doc_converter import (
+    DocConverterPool,
+    shutdown_converter_pools,
+    start_converter_service,
+)
+from app.TopicModeling.Reader import Reader
+
+# Listens like a warm instance with --accept, converts files otherwise
+FAKE_SOFFICE = """\
+import os, pathlib, socket, sys
+args = sys.argv[1:]
+accept = [arg for arg in args if arg.startswith("--accept=")]
+if accept:
+    port = int(accept[0].split("port=")[1].split(";")[0])
+    server = socket.socket()
+    server.bind(("127.0.0.1", port))
+    server.listen()
+    pathlib.Path(os.environ["FAKE_SOFFICE_PIDS"], str(os.getpid())).touch()
+    while True:
+        server.accept()[0].close()
+outdir = args[args.index("--outdir") + 1]
+for path in args[args.index("--outdir") + 2 :]:
+    text = pathlib.Path(path).read_text()
+    pathlib.Path(outdir, pathlib.Path(path).stem + ".txt").write_text(text.upper())
+"""
+
+
+def _convert(args):
+    soffice_path, address, temporary_path, file_path = args
+    reader = Reader(
+        temporary_path=temporary_path,
+        doc_reader_path=soffice_path,
+        doc_converter_pool_size=2,
+        doc_converter_address=address,
+    )
+    return reader.read_docs([file_path])
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def _fake_soffice(tmp_path, monkeypatch):
+    soffice_path = tmp_path / "fake_soffice"
+    soffice_path.write_text(f"#!{sys.executable}\n{FAKE_SOFFICE}")
+    soffice_path.chmod(0o755)
+    pids_path = tmp_path / "pids"
+    pids_path.mkdir()
+    monkeypatch.setenv("FAKE_SOFFICE_PIDS", str(pids_path))
+    return soffice_path, pids_path
+
+
+def test_extraction_processes_share_the_soffice_instances_of_the_service(
+    tmp_path, monkeypatch
+):
+    soffice_path, pids_path = _fake_soffice(tmp_path, monkeypatch)
+    files = []
+    for i in range(4):
+        path = tmp_path / f"letter{i}.doc"
+        path.write_text(f"letter {i}")
+        files.append(str(path))
+
+    try:
+        address = start_converter_service(str(soffice_path), 2, str(tmp_path))
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(3) as pool:
+            results = pool.map(
+                _convert,
+                [(str(soffice_path), address, str(tmp_path), path) for path in files],
+            )
+        pids = [int(name) for name in os.listdir(pids_path)]
+        assert results == [{path: f"LETTER {i}"} for i, path in enumerate(files)]
+        assert len(pids) == 2
+    finally:
+        shutdown_converter_pools()
+
+    deadline = time.time() + 10
+    while any(_is_running(pid) for pid in pids) and time.time() < deadline:
+        time.sleep(0.1)
+    assert not any(_is_running(pid) for pid in pids)
+
+
+def test_files_of_the_same_name_are_converted_separately(tmp_path, monkeypatch):
+    soffice_path, _ = _fake_soffice(tmp_path, monkeypatch)
+    files = []
+    for folder in ["a", "b"]:
+        (tmp_path / folder).mkdir()
+        path = tmp_path / folder / "report.doc"
+        path.write_text(f"report {folder}")
+        files.append(str(path))
+    reader = Reader(
+        temporary_path=str(tmp_path),
+        doc_reader_path=str(soffice_path),
+        doc_converter_pool_size=1,
+    )
+
+    try:
+        assert reader.read_docs(files) == {files[0]: "REPORT A", files[1]: "REPORT B"}
+        reader.doc_converter_pool_size = 0
+        assert reader.read_docs(files) == {files[0]: "REPORT A", files[1]: "REPORT B"}
+    finally:
+        shutdown_converter_pools()
+
+
+def test_worker_failing_to_convert_is_restarted(tmp_path, monkeypatch):
+    soffice_path, _ = _fake_soffice(tmp_path, monkeypatch)
+    files = []
+    for name in ["letter", "memo"]:
+        path = tmp_path / f"{name}.doc"
+        path.write_text(name)
+        files.append(str(path))
+    pool = DocConverterPool(str(soffice_path), size=1, work_dir=str(tmp_path))
+    pool.start()
+    try:
+        worker = pool._workers[0]
+        convert = worker.convert
+
+        def crash(file_paths, outdir):
+            worker.stop()
+            raise OSError("soffice crashed")
+
+        worker.convert = crash
+        assert pool.convert(files, str(tmp_path)) == {}
+        assert worker.is_alive()
+
+        worker.convert = convert
+        converted = pool.convert(files, str(tmp_path))
+        assert sorted(converted) == files
+    finally:
+        pool.shutdown()
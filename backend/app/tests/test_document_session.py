@@ -0,0 +1,38 @@
+import fitz
+from PIL import Image
+
+from app.TopicModeling import document_session
+from app.TopicModeling.Reader import process_single_file
+
+
+def test_pdf_is_opened_once_for_text_page_count_and_preview(tmp_path, monkeypatch):
+    pdf_path = str(tmp_path / "report.pdf")
+    doc = fitz.open()
+    for i in range(3):
+        doc.new_page().insert_text((72, 100), f"Page {i} of the report", fontsize=12)
+    doc.save(pdf_path)
+    doc.close()
+
+    opened = []
+    open_document = fitz.open
+
+    def counting_open(*args, **kwargs):
+        opened.append(args)
+        return open_document(*args, **kwargs)
+
+    monkeypatch.setattr(document_session.fitz, "open", counting_open)
+    preview_path = str(tmp_path / "previews" / "report.png")
+    _, content, error, n_pages, _, _ = process_single_file(
+        {
+            "file_path": pdf_path,
+            "temporary_path": str(tmp_path),
+            "preview_path": preview_path,
+        }
+    )
+
+    assert error is None
+    assert n_pages == 3
+    assert "Page 2 of the report" in content
+    assert len(opened) == 1
+    with Image.open(preview_path) as preview:
+        assert preview.width == document_session.PREVIEW_SOURCE_WIDTH
@@ -0,0 +1,72 @@
+import os
+import time
+
+from app.TopicModeling.extraction_cache import ExtractionCache
+from app.TopicModeling.Reader import process_single_file
+
+
+def test_cache_roundtrip_and_counters(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    assert cache.get("missing") is None
+
+    cache.put("key", {"content": "some text", "n_pages": 2, "dt": 1.5, "stats": {}})
+    entry = cache.get("key")
+
+    assert entry["content"] == "some text"
+    assert entry["n_pages"] == 2
+    assert cache.counters["hits"] == 1
+    assert cache.counters["misses"] == 1
+
+
+def test_cache_key_depends_on_content_and_params(tmp_path):
+    file_path = tmp_path / "doc.txt"
+    file_path.write_text("first version")
+    key = ExtractionCache.make_key(str(file_path), image_resolution=150)
+
+    assert key == ExtractionCache.make_key(str(file_path), image_resolution=150)
+    assert key != ExtractionCache.make_key(str(file_path), image_resolution=300)
+
+    file_path.write_text("second version")
+    assert key != ExtractionCache.make_key(str(file_path), image_resolution=150)
+
+
+def test_overwritten_entry_is_counted_once(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache"), max_size=2000)
+    for _ in range(5):
+        cache.put("key", {"content": os.urandom(300).hex()})
+
+    assert cache.size == ExtractionCache(str(tmp_path / "cache")).size
+    assert cache.counters["evictions"] == 0
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache"), max_size=1200)
+    for i in range(3):
+        cache.put(f"key{i}", {"content": os.urandom(300).hex()})
+        time.sleep(0.01)
+    cache.get("key0")
+    cache.put("key3", {"content": os.urandom(300).hex()})
+
+    assert cache.size <= 1200
+    assert cache.counters["evictions"] > 0
+    assert "key0" in cache
+    assert "key1" not in cache
+
+
+def test_process_single_file_uses_cache(tmp_path):
+    file_path = tmp_path / "doc.txt"
+    file_path.write_text("Some document content")
+    config = {
+        "file_path": str(file_path),
+        "temporary_path": str(tmp_path / "tmp"),
+        "cache_path": str(tmp_path / "cache"),
+    }
+
+    _, content, error, _, _, stats = process_single_file(config)
+    assert error is None
+    assert not stats.get("cache_hit")
+
+    _, cached_content, error, _, _, stats = process_single_file(config)
+    assert error is None
+    assert stats["cache_hit"]
+    assert cached_content == content
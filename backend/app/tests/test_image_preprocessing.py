@@ -0,0 +1,54 @@
+import numpy as np
+from PIL import Image, ImageDraw
+
+from app.TopicModeling.image_preprocessing import (
+    adaptive_binarize,
+    box_mean,
+    estimate_skew,
+    preprocess_for_ocr,
+)
+
+
+def _scanned_page(angle: float) -> Image.Image:
+    page = Image.new("L", (800, 1000), 255)
+    draw = ImageDraw.Draw(page)
+    for i in range(25):
+        draw.rectangle((80, 100 + i * 30, 700, 112 + i * 30), fill=0)
+    page = page.rotate(angle, fillcolor=255)
+    gray = np.asarray(page, dtype=np.float64) * 0.6 + 70  # grey paper, faded ink
+    gray += np.random.default_rng(0).normal(0, 8, gray.shape)
+    gray[:, :30] = 20  # scanner border
+    return Image.fromarray(np.clip(gray, 0, 255).astype(np.uint8))
+
+
+def test_binarization_removes_grey_background_and_noise():
+    binary = adaptive_binarize(np.asarray(_scanned_page(0)))
+    assert set(np.unique(binary)) == {0, 255}
+    assert (binary[900:, 100:700] == 0).mean() < 0.01
+
+
+def test_skew_is_corrected_and_margins_cropped():
+    page = _scanned_page(2.0)
+    assert estimate_skew(adaptive_binarize(np.asarray(page))) == -2.0
+
+    cleaned = np.asarray(preprocess_for_ocr(page))
+    assert cleaned.shape[0] < 850 and cleaned.shape[1] < 700
+    assert abs(estimate_skew(cleaned)) <= 0.25
+
+
+def test_box_mean_is_the_mean_of_the_clipped_neighbourhood():
+    gray = np.random.default_rng(0).integers(0, 256, (23, 17), dtype=np.uint8)
+    for window in (1, 3, 11, 51):
+        half = window // 2
+        expected = [
+            [
+                gray[
+                    max(y - half, 0) : y + half + 1, max(x - half, 0) : x + half + 1
+                ].mean()
+                for x in range(gray.shape[1])
+            ]
+            for y in range(gray.shape[0])
+        ]
+        mean = box_mean(gray, window)
+        assert mean.dtype == np.float32
+        assert np.allclose(mean, expected, atol=1e-3)
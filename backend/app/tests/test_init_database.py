@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("passlib")
+
+from app import init_database  # noqa: E402
+
+
+def test_stored_documents_are_not_scheduled(tmp_path, monkeypatch):
+    for name in ["annual_report.pdf", "budget.txt", "minutes.doc", "notes.txt"]:
+        (tmp_path / name).write_text(name)
+    stored = [
+        SimpleNamespace(filename=init_database.space_between_word(name))
+        for name in ["annual_report", "minutes"]
+    ]
+    estimated, converted, extracted = [], [], []
+
+    def estimate_costs(file_paths):
+        estimated.extend(file_paths)
+        return {path: 1.0 for path in file_paths}
+
+    def convert_doc_files(file_paths):
+        converted.extend(file_paths)
+        return {}
+
+    monkeypatch.setattr(init_database, "DOCUMENT_STORAGE_PATH", str(tmp_path))
+    monkeypatch.setattr(init_database, "get_all_documents", lambda: stored)
+    monkeypatch.setattr(init_database, "estimate_costs", estimate_costs)
+    monkeypatch.setattr(init_database, "_convert_doc_files", convert_doc_files)
+    monkeypatch.setattr(
+        init_database,
+        "preprocess_document",
+        lambda path, *args: extracted.append(path),
+    )
+    monkeypatch.setattr(init_database, "create_chunks_embedding_index", lambda: None)
+    monkeypatch.setattr(init_database, "set_extraction_progress", lambda _: None)
+    monkeypatch.setattr(init_database, "pool_size", lambda: 2)
+
+    init_database.add_existing_documents()
+
+    new_documents = {str(tmp_path / "budget.txt"), str(tmp_path / "notes.txt")}
+    assert set(estimated) == new_documents
+    assert set(extracted) == new_documents
+    assert converted == []
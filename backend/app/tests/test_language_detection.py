@@ -0,0 +1,39 @@
+from langdetect import DetectorFactory
+
+from app.TopicModeling.language_detection import (
+    detect_language,
+    detect_window,
+    sample_windows,
+)
+
+ENGLISH = "The committee approved the annual budget for the research project. "
+FRENCH = "Le comité a approuvé le budget annuel du projet de recherche. "
+
+
+def test_sample_windows_cover_start_middle_and_end():
+    text = " ".join(f"w{i:05d}" for i in range(10_000))
+
+    windows = sample_windows(text, window_size=100, n_windows=3)
+
+    assert [len(window) <= 100 for window in windows] == [True] * 3
+    assert windows[0].startswith("w00000")
+    assert windows[1].endswith("w09999")
+    assert windows[2].startswith("w04")
+    assert sample_windows("short text", window_size=100) == ["short text"]
+
+
+def test_detect_language_votes_over_windows():
+    # French title pages followed by a long English body
+    text = FRENCH * 40 + ENGLISH * 2000
+
+    assert detect_language(text) == "EN"
+    assert detect_language(text) == "EN"
+    assert detect_language(FRENCH * 3) == "FR"
+    assert detect_language("1234 5678") is None
+
+
+def test_detection_is_seeded_without_changing_langdetect_defaults():
+    text = (ENGLISH + FRENCH) * 3
+
+    assert len({detect_window(text) for _ in range(5)}) == 1
+    assert DetectorFactory.seed is None
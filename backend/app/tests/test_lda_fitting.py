@@ -0,0 +1,97 @@
+import json
+
+import numpy as np
+import pytest
+from sklearn.decomposition import LatentDirichletAllocation
+
+from app.TopicModeling.lda_fitting import (
+    LdaTelemetry,
+    check_private_api,
+    fit_lda,
+    lda_progress,
+)
+
+
+def make_corpus(n_documents=200, n_terms=60, n_topics=3, seed=0):
+    rng = np.random.default_rng(seed)
+    topic_words = rng.dirichlet(np.full(n_terms, 0.1), n_topics)
+    document_topics = rng.dirichlet(np.full(n_topics, 0.2), n_documents)
+    return np.array(
+        [rng.multinomial(80, weights @ topic_words) for weights in document_topics]
+    )
+
+
+def new_lda(max_iter):
+    return LatentDirichletAllocation(
+        n_components=3, max_iter=max_iter, random_state=0, evaluate_every=-1
+    )
+
+
+def test_fit_lda_without_stopping_matches_fit():
+    X = make_corpus()
+    expected = new_lda(15).fit(X)
+
+    lda = fit_lda(new_lda(15), X, tol=-np.inf, evaluate_every=4)
+
+    assert lda.n_iter_ == 15
+    assert np.allclose(lda.components_, expected.components_)
+    assert np.isclose(lda.bound_, expected.bound_)
+
+
+def test_fit_lda_stops_on_plateau_and_logs_iterations(tmp_path):
+    X = make_corpus()
+    path = str(tmp_path / "lda.jsonl")
+
+    lda = fit_lda(
+        new_lda(500),
+        X,
+        tol=1e-3,
+        min_iter=10,
+        evaluate_every=5,
+        telemetry=LdaTelemetry(path),
+    )
+
+    assert 10 <= lda.n_iter_ < 500
+    with open(path) as f:
+        events = [json.loads(line) for line in f]
+    assert [event["event"] for event in events[:2]] == ["start", "iteration"]
+    assert events[-1]["event"] == "end" and events[-1]["converged"]
+    assert len(events) == lda.n_iter_ + 2
+    progress = lda_progress(path)
+    assert progress["iterations"] == lda.n_iter_
+    assert progress["done"] and progress["converged"]
+    assert progress["seconds_per_iteration"] > 0
+    assert lda_progress(str(tmp_path / "missing.jsonl")) is None
+
+
+def test_failed_fit_logs_its_error(tmp_path, monkeypatch):
+    X = make_corpus()
+    path = str(tmp_path / "lda.jsonl")
+    lda = new_lda(20)
+    calls = []
+
+    def em_step(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 3:
+            raise MemoryError("out of memory")
+        return LatentDirichletAllocation._em_step(lda, *args, **kwargs)
+
+    monkeypatch.setattr(lda, "_em_step", em_step)
+    with pytest.raises(MemoryError):
+        fit_lda(lda, X, telemetry=LdaTelemetry(path))
+
+    progress = lda_progress(path)
+    assert progress["done"] and not progress["converged"]
+    assert progress["iterations"] == 2
+    assert progress["error"] == "MemoryError: out of memory"
+
+
+def test_private_sklearn_api_is_checked(monkeypatch):
+    check_private_api()
+
+    def em_step(self, X, total_samples, parallel=None):
+        pass
+
+    monkeypatch.setattr(LatentDirichletAllocation, "_em_step", em_step)
+    with pytest.raises(RuntimeError, match="_em_step"):
+        check_private_api()
@@ -0,0 +1,19 @@
+from app.TopicModeling.lemma_table import LemmaTable
+
+
+def test_lemma_table_lookup(tmp_path):
+    path = str(tmp_path / "lemmas.bin")
+    LemmaTable.write(
+        path, {"documents": "document", "geese": "goose", "cafés": "café", "men": "man"}
+    )
+
+    table = LemmaTable(path)
+
+    assert len(table) == 4
+    assert table.get("geese") == "goose"
+    assert table.get("cafés") == "café"
+    assert table.get("men") == "man"
+    assert table.get("document") is None
+    assert table.get("zebra", "zebra") == "zebra"
+    assert "documents" in table
+    assert "" not in table
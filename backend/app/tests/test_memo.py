@@ -0,0 +1,40 @@
+from app.TopicModeling.extraction_cache import ExtractionCache
+from app.TopicModeling.memo import Memo, digest, get_memo
+
+
+def test_memo_is_capped_in_bytes():
+    memo = Memo(max_bytes=3000)
+    keys = [digest("document", i) for i in range(3)]
+    for key in keys:
+        memo.put(key, "x" * 1000)
+
+    assert memo.get(keys[0]) == (False, None)
+    assert memo.get(keys[2]) == (True, "x" * 1000)
+    assert memo.cached(keys[1], lambda: "recomputed") == "x" * 1000
+    assert memo.stats["bytes"] <= 3000
+    assert memo.stats["evictions"] == 1
+    assert memo.stats["hits"] == 2
+    assert memo.stats["misses"] == 1
+
+    memo.put(digest("too big"), "x" * 5000)
+    assert memo.get(digest("too big")) == (False, None)
+
+
+def test_memo_store_is_shared(tmp_path):
+    first = Memo(1024, ExtractionCache(str(tmp_path), 1024 * 1024))
+    second = Memo(1024, ExtractionCache(str(tmp_path), 1024 * 1024))
+    key = digest("/data/report.pdf", 1234)
+
+    assert first.cached(key, lambda: "abc123") == "abc123"
+    assert second.get(key) == (True, "abc123")
+    assert second.stats["store_hits"] == 1
+    assert digest("ab", "c") != digest("a", "bc")
+
+
+def test_memos_of_different_stores_are_separate(tmp_path):
+    first = get_memo("digests", 1024, str(tmp_path / "a"), 1024 * 1024)
+    second = get_memo("digests", 1024, str(tmp_path / "b"), 1024 * 1024)
+
+    assert first is not second
+    assert second.store.cache_dir == str(tmp_path / "b")
+    assert get_memo("digests", 1024, str(tmp_path / "a"), 1024 * 1024) is first
@@ -1,8 +1,12 @@
 import pandas as pd
-from app.TopicModeling.miner_v2 import Miner
+import pytest
+from app.TopicModeling import miner_v2
+from app.TopicModeling.miner_v2 import Miner, shard_by_size
+from app.TopicModeling.token_arrays import TokenArray
 
 
-def test_miner_performance():
+@pytest.mark.parametrize("workers", [1, 2])
+def test_miner_performance(workers):
     miner = Miner()
     test_data = pd.DataFrame(
         {
@@ -16,7 +20,7 @@ def test_miner_performance():
         }
     )
 
-    result = miner.mine(test_data)
+    result = miner.mine(test_data, workers=workers)
 
     assert not result.empty
     assert "language" in result.columns
@@ -24,7 +28,8 @@ def test_miner_performance():
     assert "lemmatized" in result.columns
 
 
-def test_miner_preserves_columns():
+@pytest.mark.parametrize("workers", [1, 2])
+def test_miner_preserves_columns(workers):
     miner = Miner()
     test_data = pd.DataFrame(
         {
@@ -41,7 +46,7 @@ def test_miner_preserves_columns():
         }
     )
 
-    result = miner.mine(test_data)
+    result = miner.mine(test_data, workers=workers)
 
     original_columns = ["id", "title", "content", "date", "error"]
     for col in original_columns:
@@ -54,3 +59,23 @@ def test_miner_preserves_columns():
     assert len(result) == len(test_data)
     assert (result["id"] == test_data["id"]).all()
     assert (result["title"] == test_data["title"]).all()
+
+
+def test_shard_by_size_balances_text_length():
+    texts = ["a" * 100, "b" * 100, "c" * 10, "d" * 90, None, "e" * 100]
+
+    shards = shard_by_size(texts, 3)
+
+    assert [shard.tolist() for shard in shards] == [[0], [1, 2], [3, 4, 5]]
+    assert shard_by_size([], 4) == []
+
+
+def test_text_of_unknown_language_is_not_mined(monkeypatch):
+    miner = Miner()
+    monkeypatch.setattr(miner_v2, "detect_language", lambda text: None)
+    text = "Le 12 mars, the meeting notes at http://example.com: budget a b"
+
+    expected = TokenArray.from_text(miner.mine_text(text)).tokens()
+    assert miner.mine_tokens(text).tokens() == expected
+    assert miner.mine_segments([text[:20], text[20:]]).tokens() == expected
+    assert "the" in expected and "12" in expected
@@ -0,0 +1,29 @@
+import random
+
+from app.TopicModeling.miner_v2 import iter_tokens, normalize, normalize_cascade
+
+SAMPLES = [
+    "",
+    "   ",
+    "Hello, World! 123abc is_snake_case ÉCOLE",
+    "See https://example.com/path?q=1&r=2, e.g. www.site.org or 3.14.",
+    "prefixhttp://site.com/page suffix",
+    "xhttp:// not a url",
+    "hyphen-ated\nline\tbreaks\r\nand  spaces",
+    "İstanbul straße ĲSSEL ǅ",
+    "emails: someone@mail.example.com, version v1.2.3-beta",
+]
+PIECES = list("abhtps:/.-_ 1\n\tÉéİß?#=&,;!@~") + ["http://", "https://", ".com"]
+
+
+def test_normalize_matches_cascade():
+    for text in SAMPLES:
+        assert normalize(text) == normalize_cascade(text), text
+        assert list(iter_tokens(text)) == normalize_cascade(text).split(), text
+
+
+def test_normalize_matches_cascade_on_random_text():
+    rng = random.Random(0)
+    for _ in range(20_000):
+        text = "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 40)))
+        assert normalize(text) == normalize_cascade(text), text
@@ -0,0 +1,124 @@
+import random
+
+import numpy as np
+from sklearn.decomposition import LatentDirichletAllocation
+
+from app.TopicModeling.lda_fitting import LdaTelemetry, lda_progress
+from app.TopicModeling.online_lda import TopicModelState, get_topic_model
+from app.TopicModeling.token_arrays import TermIndex, TokenArray, document_term_matrix
+
+NGRAM_RANGE = (1, 1)
+
+
+def make_documents(n, vocabulary, seed=0, prefix="doc"):
+    rng = random.Random(seed)
+    return {
+        f"{prefix}{i}": TokenArray.from_tokens(
+            rng.choice(vocabulary) for _ in range(rng.randint(20, 60))
+        )
+        for i in range(n)
+    }
+
+
+def fit_state(documents):
+    X, terms = document_term_matrix(list(documents.values()), NGRAM_RANGE)
+    lda = LatentDirichletAllocation(n_components=3, max_iter=5, random_state=0)
+    lda.fit(X)
+    return TopicModelState.from_lda(lda, terms, documents)
+
+
+def test_state_round_trip(tmp_path):
+    documents = make_documents(20, [f"word{i}" for i in range(30)])
+    state = fit_state(documents)
+    path = str(tmp_path / "model")
+    state.save(path)
+    state.save(path)
+
+    loaded = TopicModelState.load(path)
+
+    assert loaded.vocabulary == state.vocabulary
+    assert np.array_equal(loaded.components, state.components)
+    assert loaded.documents == state.documents
+    assert loaded.n_batch_iter == state.n_batch_iter
+    assert TopicModelState.load(str(tmp_path / "missing")) is None
+    lda = loaded.to_lda()
+    assert lda.transform(np.ones((1, len(state.vocabulary)))).shape == (1, 3)
+
+
+def test_fold_in_only_updates_with_changed_documents():
+    vocabulary = [f"word{i}" for i in range(30)]
+    documents = make_documents(20, vocabulary)
+    state = fit_state(documents)
+    lda = state.to_lda(random_state=0)
+
+    assert state.fold_in(lda, documents, NGRAM_RANGE, 0.05, 0.8) == 0
+    assert state.refit_reason(documents, 3, 0.25, 30) is None
+
+    # New documents bring new words, found in enough documents to be added
+    new_documents = make_documents(4, vocabulary + ["budget"], seed=1, prefix="new")
+    new_documents["new0"] = TokenArray.from_tokens(["budget"] * 10)
+    new_documents["new1"] = TokenArray.from_tokens(["budget", "word1"] * 5)
+    documents.update(new_documents)
+    components = state.components.copy()
+
+    assert state.fold_in(lda, documents, NGRAM_RANGE, 0.05, 0.8) == 4
+    assert state.vocabulary[-1] == "budget"
+    assert lda.components_.shape == (3, len(state.vocabulary))
+    assert not np.allclose(lda.components_[:, : components.shape[1]], components)
+    assert set(state.documents) == set(documents)
+    assert state.fold_in(lda, documents, NGRAM_RANGE, 0.05, 0.8) == 0
+
+
+def test_fold_in_is_logged_as_a_run(tmp_path):
+    vocabulary = [f"word{i}" for i in range(30)]
+    documents = make_documents(20, vocabulary)
+    state = fit_state(documents)
+    lda = state.to_lda(random_state=0)
+    path = str(tmp_path / "lda.jsonl")
+    documents.update(make_documents(3, vocabulary, seed=1, prefix="new"))
+
+    state.fold_in(lda, documents, NGRAM_RANGE, 0.05, 0.8, LdaTelemetry(path))
+
+    progress = lda_progress(path)
+    assert progress["mode"] == "fold_in"
+    assert progress["iterations"] == 1 and progress["done"]
+    assert progress["error"] is None
+
+    state.fold_in(lda, documents, NGRAM_RANGE, 0.05, 0.8, LdaTelemetry(path))
+
+    progress = lda_progress(path)
+    assert progress["mode"] == "fold_in"
+    assert progress["iterations"] == 0 and progress["done"]
+
+
+def test_refit_reason():
+    documents = make_documents(8, [f"word{i}" for i in range(30)])
+    state = fit_state(documents)
+
+    assert state.refit_reason(documents, 4, 0.25, 30) is not None
+    state.fitted_at = "2000-01-01T00:00:00"
+    assert state.refit_reason(documents, 3, 0.25, 30) is not None
+    assert state.refit_reason(documents, 3, 0.25, 0) is None
+    del documents["doc0"], documents["doc1"]
+    documents["doc2"] = TokenArray.from_tokens(["changed"])
+    assert state.refit_reason(documents, 3, 0.25, 0) is not None
+
+
+def test_topic_model_infers_like_the_saved_lda(tmp_path):
+    vocabulary = [f"word{i}" for i in range(30)]
+    state = fit_state(make_documents(20, vocabulary))
+    path = str(tmp_path / "model")
+    state.save(path)
+    new_documents = list(make_documents(5, vocabulary + ["unknown"], seed=2).values())
+
+    model = get_topic_model(path)
+
+    assert model.revision == 1
+    assert model is get_topic_model(path)
+    expected = state.to_lda().transform(
+        TermIndex(state.vocabulary).transform(new_documents)
+    )
+    assert np.allclose(model.transform(new_documents), expected)
+    state.save(path)
+    assert get_topic_model(path).revision == 2
+    assert get_topic_model(str(tmp_path / "missing")) is None
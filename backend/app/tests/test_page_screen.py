@@ -0,0 +1,119 @@
+import os
+
+import fitz
+
+from app.TopicModeling.Reader import Reader
+
+
+def _make_pdf(path):
+    doc = fitz.open()
+    for text in ["COVER PAGE", None, "Chapter one", "COVER PAGE", None, "Chapter two"]:
+        page = doc.new_page()
+        if text is not None:
+            page.insert_text((72, 100), text, fontsize=24)
+    doc.save(path)
+    doc.close()
+
+
+def test_blank_and_duplicate_pages_are_not_ocred(tmp_path):
+    pdf_path = str(tmp_path / "scan.pdf")
+    _make_pdf(pdf_path)
+    reader = Reader(temporary_path=str(tmp_path), image_resolution=72, ocr_workers=2)
+    ocr_calls = []
+
+    def fake_ocr(image):
+        ocr_calls.append(image.size)
+        return f"text {len(ocr_calls)}\n"
+
+    reader.ocr_image = fake_ocr
+    with fitz.open(pdf_path) as doc:
+        page_texts = reader.ocr_pages(doc)
+
+    assert len(ocr_calls) == 3
+    assert page_texts[1] == page_texts[4] == ""
+    assert page_texts[3] == page_texts[0]
+    assert page_texts[5] != page_texts[2]
+    assert reader.stats["ocr_pages"] == 3
+    assert reader.stats["blank_pages_skipped"] == 2
+    assert reader.stats["duplicate_pages_reused"] == 1
+
+
+def test_pages_differing_by_one_line_are_all_ocred(tmp_path):
+    pdf_path = str(tmp_path / "invoices.pdf")
+    doc = fitz.open()
+    for first_line in ["John Smith 1,250.00 EUR", "Mary Jones 9,870.00 EUR"]:
+        page = doc.new_page()
+        page.insert_text((72, 72), first_line, fontsize=11)
+        for line in range(30):
+            page.insert_text(
+                (72, 100 + 20 * line), f"Item {line} delivered", fontsize=11
+            )
+    doc.save(pdf_path)
+    doc.close()
+    reader = Reader(temporary_path=str(tmp_path), image_resolution=100, ocr_workers=1)
+    reader.ocr_image = lambda image: f"page {hash(image.tobytes())}\n"
+    with fitz.open(pdf_path) as doc:
+        first = reader.ocr_pages(doc, [0])
+        second = reader.ocr_pages(doc, [1])
+
+    assert first[0] != second[1]
+    assert reader.stats["ocr_pages"] == 2
+    assert reader.stats["duplicate_pages_reused"] == 0
+
+
+def test_low_confidence_pages_are_ocred_again_at_higher_resolution(tmp_path):
+    pdf_path = str(tmp_path / "scan.pdf")
+    _make_pdf(pdf_path)
+    reader = Reader(
+        temporary_path=str(tmp_path),
+        ocr_workers=2,
+        ocr_dpi_ladder=[50, 100, 200],
+        ocr_max_page_mb=2,
+        page_cache_size=0,
+    )
+    widths = []
+
+    def fake_ocr(image):
+        widths.append(image.width)
+        # Only readable once rendered at 100 DPI or more
+        return f"page of width {image.width}\n", 90.0 if image.width > 500 else 20.0
+
+    reader.ocr_image_with_confidence = fake_ocr
+    with fitz.open(pdf_path) as doc:
+        page_texts = reader.ocr_pages(doc)
+
+    assert reader.stats["ocr_escalations"] == 4
+    assert sorted(set(widths)) == [310, 620]
+    assert all(page_texts[page] == "page of width 620\n" for page in (0, 2, 3, 5))
+    assert list(page_texts) == list(range(6))
+
+
+def test_pages_without_words_are_not_ocred_again(tmp_path):
+    pdf_path = str(tmp_path / "scan.pdf")
+    _make_pdf(pdf_path)
+    reader = Reader(
+        temporary_path=str(tmp_path),
+        ocr_dpi_ladder=[50, 100, 200],
+        ocr_max_page_mb=2,
+        page_cache_size=0,
+    )
+    widths = []
+
+    def fake_ocr(image):
+        widths.append(image.width)
+        return "", None
+
+    reader.ocr_image_with_confidence = fake_ocr
+    with fitz.open(pdf_path) as doc:
+        reader.ocr_pages(doc)
+
+    assert reader.stats["ocr_escalations"] == 0
+    assert widths == [310] * 4
+
+
+def test_reader_leaves_the_ocr_thread_limit_of_the_process_alone(
+    tmp_path, monkeypatch
+):
+    monkeypatch.delenv("OMP_THREAD_LIMIT", raising=False)
+    Reader(temporary_path=str(tmp_path), ocr_workers=4)
+    assert "OMP_THREAD_LIMIT" not in os.environ
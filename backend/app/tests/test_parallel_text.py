@@ -0,0 +1,22 @@
+import fitz
+
+from app.TopicModeling.parallel_text import iter_page_texts_parallel, page_ranges
+
+
+def test_page_ranges_cover_all_pages_in_order():
+    assert page_ranges(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert page_ranges(2, 4) == [(0, 1), (1, 2)]
+
+
+def test_parallel_extraction_is_stitched_in_page_order(tmp_path):
+    pdf_path = str(tmp_path / "manual.pdf")
+    doc = fitz.open()
+    for i in range(25):
+        doc.new_page().insert_text((72, 100), f"Section {i}", fontsize=12)
+    doc.save(pdf_path)
+    expected = [page.get_text() for page in doc]
+    doc.close()
+
+    pages = list(iter_page_texts_parallel(pdf_path, 25, 3, tmp_dir=str(tmp_path)))
+
+    assert pages == expected
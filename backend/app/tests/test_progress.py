@@ -0,0 +1,22 @@
+from app.TopicModeling.progress import BatchProgress, order_by_cost
+
+
+def test_order_by_cost():
+    costs = {"small.txt": 0.1, "scan.pdf": 30.0, "report.docx": 2.0}
+    assert order_by_cost(costs, "fifo") == ["small.txt", "scan.pdf", "report.docx"]
+    assert order_by_cost(costs, "longest_first") == [
+        "scan.pdf",
+        "report.docx",
+        "small.txt",
+    ]
+    assert order_by_cost(costs, "shortest_first")[0] == "small.txt"
+
+
+def test_batch_progress():
+    progress = BatchProgress("extraction", {"a": 4.0, "b": 4.0}, workers=2)
+    assert progress.eta_seconds == 4.0
+    progress.complete("a")
+    assert progress.completed == 1 and not progress.done
+    progress.complete("b")
+    assert progress.done
+    assert progress.as_dict()["eta_seconds"] == 0.0
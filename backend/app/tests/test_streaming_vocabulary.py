@@ -0,0 +1,88 @@
+import random
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+
+from app.TopicModeling.streaming_vocabulary import (
+    SpillingCounter,
+    build_vocabulary,
+    vectorize,
+)
+from app.TopicModeling.token_arrays import TokenArray
+
+
+def make_documents(n, seed=0):
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(150)] + ["école", "données"]
+    return [
+        [
+            rng.choice(vocabulary[: rng.randint(5, len(vocabulary))])
+            for _ in range(rng.randint(0, 200))
+        ]
+        for _ in range(n)
+    ]
+
+
+def test_spilling_counter_merges_runs(tmp_path):
+    counter = SpillingCounter(max_bytes=500, dir=str(tmp_path))
+    for document in [["b", "a"], ["a", "c"], ["c", "d", "a"]] * 20:
+        for term in document:
+            counter.add(term, 2)
+
+    assert counter.runs
+    assert list(counter.items()) == [
+        ("a", 60, 120),
+        ("b", 20, 40),
+        ("c", 40, 80),
+        ("d", 20, 40),
+    ]
+    counter.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize(
+    "ngram_range, min_df, max_df, max_features",
+    [
+        ((1, 2), 0.05, 0.8, None),
+        ((1, 2), 2, 1.0, 100),
+        ((1, 1), 1, 1.0, None),
+        ((2, 3), 3, 0.9, 50),
+    ],
+)
+def test_build_vocabulary_matches_count_vectorizer(
+    tmp_path, ngram_range, min_df, max_df, max_features
+):
+    documents = make_documents(120)
+    texts = [" ".join(document) for document in documents]
+    vectorizer = CountVectorizer(
+        ngram_range=ngram_range, min_df=min_df, max_df=max_df, max_features=max_features
+    )
+    expected = vectorizer.fit_transform(texts)
+    token_arrays = [TokenArray.from_tokens(document) for document in documents]
+
+    terms = build_vocabulary(
+        token_arrays,
+        ngram_range,
+        min_df,
+        max_df,
+        max_features,
+        max_memory=20_000,
+        tmp_dir=str(tmp_path),
+    )
+    matrix = vectorize(token_arrays, terms, batch_size=16)
+
+    assert terms == list(vectorizer.get_feature_names_out())
+    assert matrix.dtype == np.float32
+    assert matrix.indices.dtype == np.int32
+    assert (matrix != expected).nnz == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_build_vocabulary_errors():
+    with pytest.raises(ValueError, match="empty vocabulary"):
+        build_vocabulary([TokenArray.from_tokens([])])
+    with pytest.raises(ValueError, match="no terms remain"):
+        build_vocabulary(
+            [TokenArray.from_tokens(["ab"]), TokenArray.from_tokens(["cd"])], min_df=2
+        )
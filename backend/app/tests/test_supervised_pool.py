@@ -0,0 +1,54 @@
+import os
+import time
+
+import pytest
+
+from app.TopicModeling.supervised_pool import (
+    QuarantinedError,
+    SupervisedPool,
+    TaskTimeoutError,
+    WorkerCrashedError,
+)
+
+
+def _work(config: dict) -> str:
+    action = config.get("action")
+    if action == "hang":
+        time.sleep(60)
+    if action == "crash":
+        os._exit(1)
+    return config["file_path"]
+
+
+def test_completed_tasks_survive_hangs_and_crashes(tmp_path):
+    quarantine_path = str(tmp_path / "quarantine.json")
+    pool = SupervisedPool(
+        max_workers=2,
+        task_timeout=2,
+        max_retries=1,
+        quarantine_path=quarantine_path,
+    )
+    try:
+        ok = [pool.submit(_work, {"file_path": f"ok_{i}"}) for i in range(4)]
+        hang = pool.submit(_work, {"file_path": "hang", "action": "hang"})
+        crash = pool.submit(_work, {"file_path": "crash", "action": "crash"})
+
+        assert [future.result(timeout=30) for future in ok] == [
+            f"ok_{i}" for i in range(4)
+        ]
+        with pytest.raises(TaskTimeoutError):
+            hang.result(timeout=30)
+        with pytest.raises(WorkerCrashedError):
+            crash.result(timeout=30)
+
+        assert pool.quarantine == {"hang", "crash"}
+        with pytest.raises(QuarantinedError):
+            pool.submit(_work, {"file_path": "crash"}).result(timeout=5)
+        assert pool.submit(_work, {"file_path": "after"}).result(timeout=30) == "after"
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+    assert SupervisedPool(1, quarantine_path=quarantine_path).quarantine == {
+        "hang",
+        "crash",
+    }
@@ -0,0 +1,131 @@
+import os
+import random
+
+import numpy as np
+
+from app.TopicModeling import term_matrix_cache
+from app.TopicModeling.term_matrix_cache import DocumentTermCache
+from app.TopicModeling.token_arrays import TermIndex, TokenArray, document_term_matrix
+
+
+def make_documents(n, seed=0, prefix="doc"):
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(40)]
+    return {
+        f"{prefix}{i}": TokenArray.from_tokens(
+            rng.choice(vocabulary) for _ in range(rng.randint(0, 80))
+        )
+        for i in range(n)
+    }
+
+
+def assert_same_as_document_term_matrix(cache, documents, min_df=0.05):
+    keys = list(documents)
+    matrix, names = cache.document_term_matrix(keys, min_df=min_df, max_df=0.8)
+    expected, expected_names = document_term_matrix(
+        list(documents.values()), (1, 2), min_df=min_df, max_df=0.8
+    )
+    assert list(names) == list(expected_names)
+    assert (matrix != expected).nnz == 0
+
+
+def test_cache_only_counts_changed_documents(tmp_path, monkeypatch):
+    monkeypatch.setattr(term_matrix_cache, "BATCH_SIZE", 7)
+    path = str(tmp_path / "dtm")
+    documents = make_documents(30)
+    cache = DocumentTermCache(path, (1, 2))
+
+    assert cache.update(documents) == 30
+    assert_same_as_document_term_matrix(cache, documents)
+
+    # Reloaded from disk: nothing to count again
+    cache = DocumentTermCache(path, (1, 2))
+    assert cache.update(documents) == 0
+    assert_same_as_document_term_matrix(cache, documents)
+
+    documents.update(make_documents(5, seed=1, prefix="new"))
+    documents["doc0"] = TokenArray.from_tokens(["changed", "document"])
+    del documents["doc1"]
+    assert cache.update(documents) == 6
+    assert_same_as_document_term_matrix(DocumentTermCache(path, (1, 2)), documents)
+
+    terms = ["word3", "word1 word2", "unknown", "changed document"]
+    keys = list(documents)
+    expected = TermIndex(terms).transform(list(documents.values()))
+    assert (cache.transform(keys, terms) != expected).nnz == 0
+
+
+def test_cache_compacts_masked_rows(tmp_path):
+    path = str(tmp_path / "dtm")
+    cache = DocumentTermCache(path, (1, 2))
+    cache.update(make_documents(10))
+    documents = make_documents(10, seed=1)
+    nnz = cache.nnz
+
+    cache.update(documents)
+
+    assert cache.n_rows == 10
+    assert cache.nnz < 2 * nnz
+    # The n-grams only found in the replaced documents are dropped
+    _, names = document_term_matrix(list(documents.values()), (1, 2))
+    assert sorted(cache.terms) == sorted(names)
+    assert sorted(os.listdir(path)) == [
+        "data.1.bin",
+        "index.npz",
+        "indices.1.bin",
+        "terms.1.txt",
+    ]
+    assert_same_as_document_term_matrix(DocumentTermCache(path, (1, 2)), documents)
+
+
+def test_cache_rolls_back_an_interrupted_update(tmp_path):
+    path = str(tmp_path / "dtm")
+    documents = make_documents(10)
+    cache = DocumentTermCache(path, (1, 2))
+    cache.update(documents)
+    # Rows appended, index not saved
+    cache._append({"lost": (TokenArray.from_tokens(["lost", "words"]), "digest")})
+
+    cache = DocumentTermCache(path, (1, 2))
+    cache.update({**documents, "other": TokenArray.from_tokens(["other", "words"])})
+
+    assert "lost" not in cache.terms
+    assert np.array_equal(cache.transform(["other"], ["other words"]).toarray(), [[1]])
+    assert DocumentTermCache(path, (1, 1)).n_rows == 0
+
+
+def test_cache_only_stores_the_ngrams_of_frequent_words(tmp_path):
+    path = str(tmp_path / "dtm")
+    documents = make_documents(30)
+    # "rare" is in 2 documents, under min_df (3 documents)
+    for key in ("doc0", "doc1"):
+        documents[key] = TokenArray.from_tokens(
+            documents[key].tokens() + ["rare", "word1", "rare"]
+        )
+    cache = DocumentTermCache(path, (1, 2))
+    cache.update(documents, min_df=0.1)
+
+    assert "rare" in cache.terms
+    assert not any(" " in term and "rare" in term.split() for term in cache.terms)
+    assert_same_as_document_term_matrix(cache, documents, min_df=0.1)
+
+    # In 4 documents out of 32: the documents it was already in are counted again
+    documents.update(
+        {
+            f"new{i}": TokenArray.from_tokens(["word1", "rare", "word2"])
+            for i in range(2)
+        }
+    )
+    cache = DocumentTermCache(path, (1, 2))
+    assert cache.update(documents, min_df=0.1) == 4
+    assert "rare word1" in cache.terms
+    assert_same_as_document_term_matrix(
+        DocumentTermCache(path, (1, 2)), documents, min_df=0.1
+    )
+
+    # The n-grams of a vocabulary are stored whatever their document frequency
+    terms = ["word1 rare", "word3", "unknown word"]
+    keys = list(documents)
+    cache.update(documents, min_df=0.5, required_terms=terms)
+    expected = TermIndex(terms).transform(list(documents.values()))
+    assert (cache.transform(keys, terms) != expected).nnz == 0
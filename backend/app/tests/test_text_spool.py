@@ -0,0 +1,65 @@
+from app.TopicModeling.Reader import process_single_file
+from app.TopicModeling.text_spool import TextSpool, detect_encoding, iter_text_file
+from app.TopicModeling.topic_modeling_v3 import delete_eol, iter_delete_eol
+
+
+def test_spool_moves_to_disk_past_threshold(tmp_path):
+    spool = TextSpool(max_memory=10, dir=str(tmp_path))
+    spool.writelines(["0123456", "789abc", "def"])
+    text = spool.close()
+
+    assert not text.in_memory
+    assert len(text) == 16
+    assert list(text.segments(segment_size=5)) == ["01234", "56789", "abcde", "f"]
+    assert text.read() == "0123456789abcdef"
+    text.discard()
+    assert not (tmp_path / text.path).exists()
+
+
+def test_streamed_extraction_matches_full_read(tmp_path):
+    file_path = tmp_path / "notes.txt"
+    file_path.write_bytes(
+        "Résumé des réunions,\nsuite-\nment.\n".encode("latin-1") * 500
+    )
+    assert detect_encoding(str(file_path)) != "utf-8"
+    config = {"file_path": str(file_path), "temporary_path": str(tmp_path)}
+
+    _, content, error, _, _, _ = process_single_file(config)
+    _, streamed, _, _, _, stats = process_single_file(
+        {**config, "stream": True, "spool_threshold": 1000}
+    )
+
+    assert error is None
+    assert stats["spooled"]
+    assert streamed.read() == content
+    assert "".join(iter_delete_eol(streamed.segments(segment_size=7))) == delete_eol(
+        content
+    )
+    streamed.discard()
+
+
+def test_text_decoded_past_the_encoding_sample(tmp_path):
+    # ASCII in the sample, latin-1 after it
+    text = "minutes of the meeting\n" * 4000 + "Résumé des réunions\n"
+    file_path = tmp_path / "minutes.txt"
+    file_path.write_bytes(text.encode("latin-1"))
+    assert detect_encoding(str(file_path)) == "utf-8"
+
+    assert "".join(iter_text_file(str(file_path))) == text
+
+    # The invalid byte is held back at the end of a chunk
+    file_path.write_bytes("a\r\né".encode("utf-8") + "éb".encode("latin-1"))
+    assert "".join(iter_text_file(str(file_path), chunk_size=2)) == "a\nééb"
+
+
+def test_valid_text_before_a_stray_byte_keeps_its_encoding(tmp_path):
+    # UTF-8 past the encoding sample, with a cp1252 quote near the end of the chunk
+    text = "Résumé des réunions\n" * 4000
+    file_path = tmp_path / "minutes.txt"
+    file_path.write_bytes(text.encode("utf-8") + b"\x92s\n")
+    assert detect_encoding(str(file_path)) == "utf-8"
+
+    decoded = "".join(iter_text_file(str(file_path)))
+
+    assert decoded.startswith(text)
+    assert decoded[len(text) :] in ("’s\n", "\x92s\n")
@@ -0,0 +1,72 @@
+import random
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+
+from app.TopicModeling.token_arrays import TermIndex, TokenArray, document_term_matrix
+
+
+def test_token_array_round_trip():
+    tokens = TokenArray.from_tokens(["budget", "réunion", "budget", "report"])
+
+    assert tokens.words == ["budget", "réunion", "report"]
+    assert tokens.ids.tolist() == [0, 1, 0, 2]
+    assert tokens.counts.tolist() == [2, 1, 1]
+    assert tokens.text() == "budget réunion budget report"
+    assert TokenArray.from_text(tokens.text()).counts.tolist() == [2, 1, 1]
+
+    restored = TokenArray.from_bytes(tokens.to_bytes())
+    assert restored.words == tokens.words
+    assert np.array_equal(restored.ids, tokens.ids)
+    assert len(TokenArray.from_bytes(TokenArray.from_tokens([]).to_bytes())) == 0
+
+
+def test_document_term_matrix_matches_count_vectorizer():
+    rng = random.Random(0)
+    vocabulary = [f"word{i}" for i in range(200)] + ["école", "données"]
+    documents = [
+        [
+            rng.choice(vocabulary[: rng.randint(20, 202)])
+            for _ in range(rng.randint(0, 300))
+        ]
+        for _ in range(100)
+    ]
+    token_arrays = [TokenArray.from_tokens(document) for document in documents]
+    texts = [" ".join(document) for document in documents]
+
+    for ngram_range, min_df, max_df in [
+        ((1, 2), 0.05, 0.8),
+        ((1, 1), 1, 1.0),
+        ((2, 3), 2, 50),
+    ]:
+        vectorizer = CountVectorizer(
+            ngram_range=ngram_range, min_df=min_df, max_df=max_df
+        )
+        expected = vectorizer.fit_transform(texts)
+
+        matrix, feature_names = document_term_matrix(
+            token_arrays, ngram_range=ngram_range, min_df=min_df, max_df=max_df
+        )
+
+        assert list(feature_names) == list(vectorizer.get_feature_names_out())
+        assert (matrix != expected).nnz == 0
+
+
+def test_term_index_matches_count_vectorizer_vocabulary():
+    rng = random.Random(1)
+    vocabulary = [f"word{i}" for i in range(50)]
+    documents = [
+        [rng.choice(vocabulary) for _ in range(rng.randint(0, 100))] for _ in range(30)
+    ]
+    texts = [" ".join(document) for document in documents]
+    fitted = CountVectorizer(ngram_range=(1, 2), min_df=2).fit(texts)
+    terms = list(fitted.get_feature_names_out()) + ["unknown", "word1 unknown"]
+    rng.shuffle(terms)
+
+    expected = CountVectorizer(ngram_range=(1, 2), vocabulary=terms).transform(texts)
+    matrix = TermIndex(terms).transform(
+        [TokenArray.from_tokens(document) for document in documents]
+    )
+
+    assert matrix.shape == expected.shape
+    assert (matrix != expected).nnz == 0
@@ -3,10 +3,12 @@ import os
 from langchain.text_splitter import CharacterTextSplitter
 
 from app.config import settings
-from app.TopicModeling.miner_v2 import Miner
-from app.TopicModeling.Reader import process_single_file
-from app.TopicModeling.topic_modeling_v3 import delete_eol
 from app.utils.ai_model import generate_embedding_for_texts
+from app.TopicModeling.text_spool import ExtractedText
+from app.TopicModeling.token_arrays import TokenArray
+from app.utils.extraction_pool import submit_extraction
+from app.utils.preview import preview_source_path
+from app.utils.process_documents import link_inferred_topics
 from app.database.documents import (
     create_document,
     set_text_of_document,
@@ -21,8 +23,6 @@ TESSERACT_PATH = settings.TESSERACT_PATH
 if not TESSERACT_PATH:
     raise ValueError("TESSERACT_PATH must be set in environment variables.")
 
-miner = Miner()
-
 def space_between_word(text):
     # Replace underscores with spaces
     result = text.replace("_", " ")
@@ -61,23 +61,53 @@ def chunk_text(text: str, chunk_size: int = 1000) -> list[str]:
     return text_splitter.split_text(text)
 
 
-def extract_document_text(file_path: str) -> str:
-    """Extract text from a document."""
-    config = {
-        "file_path": file_path,
-        "doc_reader_path": LIBREOFFICE_PATH,
-        "tesseract_path": TESSERACT_PATH,
-        "image_resolution": 150,
-    }
-    _, content, error, _, _ = process_single_file(config)
+def chunk_segments(segments, chunk_size: int = 1000):
+    """chunk_text over a text given in segments, a few segments at a time."""
+    buffer = ""
+    for segment in segments:
+        buffer += segment
+        if len(buffer) < 20 * chunk_size:
+            continue
+        chunks = chunk_text(buffer, chunk_size)
+        if len(chunks) == 1:
+            yield from chunks
+            buffer = ""
+            continue
+        # The last chunk may continue in the next segment
+        yield from chunks[:-1]
+        buffer = chunks[-1]
+    if buffer:
+        yield from chunk_text(buffer, chunk_size)
+
+
+def extract_document_text(
+    file_path: str, raw_content: str | None = None
+) -> tuple[ExtractedText | None, TokenArray | None]:
+    """Extract text from a document.
+
+    The text is returned as an ExtractedText handle, discard it once done.
+    """
+    # PDFs get their first page rendered for the previews while they are open
+    preview_path = (
+        preview_source_path(file_path) if file_path.lower().endswith(".pdf") else None
+    )
+    try:
+        cleaned_content, mined_content, error = submit_extraction(
+            file_path, raw_content, preview_path
+        ).result()
+    except Exception as e:
+        error = str(e)
     if error:
         print(f"Error extracting text from {file_path}: {error}")
-        return None
-    cleaned_content = delete_eol(content)
-    mined_content = miner.mine_text(cleaned_content)
+        return None, None
     return cleaned_content, mined_content
 
-def preprocess_document(file_path: str, filename: str, stored_documents: list) -> Document:
+def preprocess_document(
+    file_path: str,
+    filename: str,
+    stored_documents: list,
+    raw_content: str | None = None,
+) -> Document:
     """Preprocess the document by extracting text, mining it, chunking it, and generating embeddings."""
     base_filename = os.path.splitext(filename)[0]
     spaced_filename = space_between_word(base_filename)
@@ -91,16 +121,25 @@ def preprocess_document(file_path: str, filename: str, stored_documents: list) -
         )
 
         # Extract text from the document
-        text, mined_text = extract_document_text(file_path)
+        text, mined_tokens = extract_document_text(file_path, raw_content)
         if text is not None:
-            # Save the extracted text to the database
-            set_text_of_document(
-                document_id=created_document.id,
-                text=text,
-                mined_text=mined_text,
-            )
-            # Prepare text for RAG
-            chunks = chunk_text(text)
+            try:
+                # Save the extracted text to the database
+                set_text_of_document(
+                    document_id=created_document.id,
+                    text=text.read(),
+                    mined_text=mined_tokens.text(),
+                    mined_tokens=mined_tokens.to_bytes(),
+                )
+                # Topics of the current model, until the next processing run
+                try:
+                    link_inferred_topics(created_document.id, mined_tokens)
+                except Exception as e:
+                    print(f"Error inferring the topics of {filename}: {str(e)}")
+                # Prepare text for RAG
+                chunks = list(chunk_segments(text.segments()))
+            finally:
+                text.discard()
             embeddings = generate_embedding_for_texts(chunks)
             # Save chunks to the database
             create_document_chunks(
@@ -0,0 +1,229 @@
+import threading
+from concurrent.futures import Future
+from multiprocessing import cpu_count
+
+from app.config import settings
+from app.TopicModeling.doc_converter import start_converter_service
+from app.TopicModeling.miner_v2 import Miner
+from app.TopicModeling.progress import BatchProgress
+from app.TopicModeling.Reader import (
+    get_reader,
+    limit_ocr_threads,
+    process_single_file,
+)
+from app.TopicModeling.supervised_pool import SupervisedPool
+from app.TopicModeling.text_spool import ExtractedText, TextSpool
+from app.TopicModeling.token_arrays import TokenArray
+from app.TopicModeling.topic_modeling_v3 import delete_eol, iter_delete_eol
+
+_pool: SupervisedPool | None = None
+_pool_lock = threading.Lock()
+_progress: BatchProgress | None = None
+# Address of the process owning the soffice instances, set in the API process when
+# the pool starts and in the workers by _init_worker
+_converter_address: str | None = None
+
+# Per worker process state, created once by _init_worker
+_miner: Miner | None = None
+
+
+def reader_config(file_path: str | None = None, **overrides) -> dict:
+    """Task configuration for process_single_file built from the settings."""
+    config = {
+        "file_path": file_path,
+        "temporary_path": "./tmp",
+        "doc_reader_path": settings.LIBREOFFICE_PATH,
+        "tesseract_path": settings.TESSERACT_PATH,
+        "image_resolution": settings.OCR_IMAGE_RESOLUTION,
+        # Workers OCR documents at the same time, so they share the cores
+        "ocr_workers": settings.OCR_WORKERS or max(1, cpu_count() // pool_size()),
+        "skip_blank_pages": settings.OCR_SKIP_BLANK_PAGES,
+        "page_cache_size": settings.OCR_PAGE_CACHE_SIZE,
+        "ocr_dpi_ladder": settings.OCR_DPI_LADDER,
+        "ocr_min_confidence": settings.OCR_MIN_CONFIDENCE,
+        "ocr_max_page_mb": settings.OCR_MAX_PAGE_MB,
+        "ocr_preprocess": settings.OCR_PREPROCESS,
+        "parallel_page_threshold": settings.PARALLEL_PDF_PAGE_THRESHOLD,
+        "parallel_page_workers": settings.PARALLEL_PDF_WORKERS,
+        "doc_converter_pool_size": settings.DOC_CONVERTER_POOL_SIZE,
+        "doc_converter_address": _converter_address,
+        "cache_path": settings.EXTRACTION_CACHE_PATH,
+        "cache_max_size": settings.EXTRACTION_CACHE_MAX_SIZE_MB * 1024 * 1024,
+        "stream": True,
+        "spool_threshold": settings.EXTRACTION_SPOOL_THRESHOLD_MB * 1024 * 1024,
+    }
+    config.update(overrides)
+    return config
+
+
+def _init_worker(config: dict) -> None:
+    """Warm up a worker: Reader (temporary directory, single-threaded Tesseract)
+    and NLTK data."""
+    global _miner, _converter_address
+    _converter_address = config.get("doc_converter_address")
+    limit_ocr_threads()
+    get_reader(config)
+    _miner = Miner(settings.LEMMA_TABLE_PATH or None)
+
+
+def extract_and_mine(
+    config: dict,
+) -> tuple[str | ExtractedText | None, TokenArray | None, str | None]:
+    """Extract the text of a file and mine it.
+
+    With ``config["stream"]``, the cleaned content is returned as an ExtractedText
+    handle, backed by a file in the temporary directory for large texts: call its
+    ``discard`` method once done with it. The mined content is a TokenArray.
+
+    Returns:
+        tuple: (cleaned_content, mined_content, error_message)
+    """
+    _, content, error, _, _, _ = process_single_file(config)
+    if error or content is None:
+        return None, None, error or "No content extracted"
+    if _miner is None:
+        _init_worker(config)
+    if not isinstance(content, ExtractedText):
+        cleaned_content = delete_eol(content)
+        return cleaned_content, _miner.mine_tokens(cleaned_content), None
+    if content.in_memory:
+        cleaned_content = delete_eol(content.read())
+        return (
+            ExtractedText(cleaned_content),
+            _miner.mine_tokens(cleaned_content),
+            None,
+        )
+
+    # Too big to be held in memory: clean and mine it segment by segment
+    spool = TextSpool(config["spool_threshold"], dir=config["temporary_path"])
+    try:
+        spool.writelines(iter_delete_eol(content.segments()))
+    except Exception:
+        spool.abort()
+        raise
+    finally:
+        content.discard()
+    cleaned_content = spool.close()
+    return cleaned_content, _miner.mine_segments(cleaned_content.segments()), None
+
+
+def estimate_file_cost(file_path: str) -> float:
+    """Estimated extraction cost of a file, see Reader.estimate_cost."""
+    return get_reader(reader_config()).estimate_cost(file_path)["cost"]
+
+
+def mine_text(text: str) -> TokenArray:
+    """Mine a text given directly, e.g. to infer its topics."""
+    if _miner is None:
+        _init_worker(reader_config())
+    return _miner.mine_tokens(delete_eol(text))
+
+
+def pool_size() -> int:
+    """Number of extraction worker processes."""
+    return settings.EXTRACTION_WORKERS or cpu_count()
+
+
+def set_extraction_progress(progress: BatchProgress | None) -> None:
+    """Register the progress of the running extraction batch."""
+    global _progress
+    _progress = progress
+
+
+def get_extraction_progress() -> BatchProgress | None:
+    """Progress of the running (or last) extraction batch, if any."""
+    return _progress
+
+
+def start_doc_converter() -> None:
+    """Start the converter service shared by this process and the extraction
+    workers, once, so that .doc files are converted by DOC_CONVERTER_POOL_SIZE
+    soffice instances in total."""
+    global _converter_address
+    if _converter_address is None:
+        _converter_address = start_converter_service(
+            settings.LIBREOFFICE_PATH,
+            settings.DOC_CONVERTER_POOL_SIZE,
+            "./tmp",
+        )
+
+
+def get_extraction_pool() -> SupervisedPool:
+    """Return the process-wide extraction pool, starting it on first use.
+
+    Files that exceed EXTRACTION_TIMEOUT or crash their worker are retried
+    EXTRACTION_MAX_RETRIES times, then quarantined.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            start_doc_converter()
+            max_workers = pool_size()
+            print(f"[EXTRACTION POOL] Starting {max_workers} workers")
+            _pool = SupervisedPool(
+                max_workers=max_workers,
+                task_timeout=settings.EXTRACTION_TIMEOUT,
+                max_retries=settings.EXTRACTION_MAX_RETRIES,
+                quarantine_path=settings.EXTRACTION_QUARANTINE_PATH,
+                initializer=_init_worker,
+                initargs=(reader_config(),),
+            )
+        return _pool
+
+
+def submit_extraction(
+    file_path: str, raw_content: str | None = None, preview_path: str | None = None
+) -> Future:
+    """Submit a file to the extraction pool, see extract_and_mine for the result.
+
+    When ``preview_path`` is given, the first page of a PDF is rendered there
+    while the document is open for extraction.
+
+    The future raises TaskTimeoutError, WorkerCrashedError or QuarantinedError when
+    the file could not be extracted by a healthy worker.
+    """
+    config = reader_config(file_path, content=raw_content, preview_path=preview_path)
+    return get_extraction_pool().submit(extract_and_mine, config)
+
+
+def estimate_costs(file_paths: list[str]) -> dict[str, float]:
+    """Estimated extraction costs of files, in single-worker seconds.
+
+    The files are hashed (extraction cache lookup) and opened (page count) by the
+    extraction pool workers, not by the calling process. A file whose cost could
+    not be estimated counts for the mean cost of the others. The tasks are given
+    the bare file path, so a file that crashes the estimate is not quarantined: its
+    extraction is still attempted.
+    """
+    futures = {
+        file_path: get_extraction_pool().submit(estimate_file_cost, file_path)
+        for file_path in file_paths
+    }
+    costs = {}
+    for file_path, future in futures.items():
+        try:
+            costs[file_path] = future.result()
+        except Exception as e:
+            print(f"Warning: Could not estimate cost of {file_path}: {e}")
+            costs[file_path] = None
+    known_costs = [cost for cost in costs.values() if cost is not None]
+    mean_cost = sum(known_costs) / len(known_costs) if known_costs else 1.0
+    return {
+        file_path: mean_cost if cost is None else cost
+        for file_path, cost in costs.items()
+    }
+
+
+def submit_mining(text: str) -> Future:
+    """Submit a text to be mined by the extraction pool, see mine_text."""
+    return get_extraction_pool().submit(mine_text, text)
+
+
+def shutdown_extraction_pool(wait: bool = True) -> None:
+    """Stop the extraction pool, waiting for running extractions if ``wait``."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            print("[EXTRACTION POOL] Shutting down")
+            _pool.shutdown(wait=wait, cancel_futures=True)
+            _pool = None
@@ -1,15 +1,70 @@
-import io
+import hashlib
 import os
 import pathlib
+import time
 from multiprocessing import Pool, cpu_count
 from typing import Dict, List, Literal, Tuple
-import fitz
 from PIL import Image
 
 from app.database.documents import get_all_documents
+from app.TopicModeling.document_session import DocumentSession
 
 PreviewSize = Literal["thumbnail", "detail"]
 
+# First page renders older than this are removed, whether they were used or not
+PREVIEW_SOURCE_MAX_AGE = 24 * 3600
+
+
+def preview_sources_dir() -> str:
+    storage_path = os.getenv("DOCUMENT_STORAGE_PATH", "./documents")
+    return os.path.join(storage_path, "previews", "sources")
+
+
+def preview_source_path(document_path: str) -> str:
+    """Where the extraction saves the first page render of a document.
+
+    The first preview of a new upload is created from this render, so the document
+    is not opened again to generate it. The render is keyed by the path, size and
+    modification time of the document: a document replaced at the same path never
+    gets the render of the previous one.
+    """
+    try:
+        stat = os.stat(document_path)
+        version = f"{stat.st_size}|{stat.st_mtime_ns}"
+    except OSError:
+        version = ""
+    key = f"{os.path.abspath(document_path)}|{version}"
+    name = hashlib.sha1(key.encode()).hexdigest()
+    return os.path.join(preview_sources_dir(), f"{name}.png")
+
+
+def discard_preview_source(document_path: str) -> None:
+    """Remove the first page render of a document, before it is replaced or
+    deleted."""
+    try:
+        os.remove(preview_source_path(document_path))
+    except FileNotFoundError:
+        pass
+
+
+def remove_stale_preview_sources(max_age: float = PREVIEW_SOURCE_MAX_AGE) -> int:
+    """Remove the first page renders older than ``max_age`` seconds, e.g. of
+    documents whose previews were never generated. Returns the number removed."""
+    removed = 0
+    oldest = time.time() - max_age
+    try:
+        entries = list(os.scandir(preview_sources_dir()))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < oldest:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
 
 class PreviewManager:
     def __init__(self):
@@ -88,33 +143,35 @@ class PreviewManager:
             preview_filename = f"{document_id}.webp"
             preview_path = os.path.join(preview_dir, preview_filename)
 
-            # Generate preview based on file type
-            if document_path.lower().endswith(".pdf"):
-                doc = fitz.open(document_path)
-                if doc.page_count > 0:
-                    page = doc[0]
-                    # Higher resolution for detail view
-                    scale = 4 if size == "detail" else 2
-                    pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale))
-                    img_data = pix.tobytes("png")
-                    img = Image.open(io.BytesIO(img_data))
-
-                    # Calculate aspect ratio and resize
-                    aspect_ratio = img.height / img.width
-                    target_height = int(target_width * aspect_ratio)
-                    img = img.resize(
-                        (target_width, target_height), Image.Resampling.LANCZOS
-                    )
-
-                    # Save with appropriate quality settings
-                    img.save(preview_path, "WEBP", quality=quality, method=6)
-
-                    # Cache the result
-                    if document_id not in self.preview_cache:
-                        self.preview_cache[document_id] = {}
-                    self.preview_cache[document_id][size] = preview_path
-                    return preview_path
-            return None
+            # Use the first page rendered during extraction if there is one
+            source_path = preview_source_path(document_path)
+            if os.path.exists(source_path):
+                with Image.open(source_path) as source:
+                    img = source.copy()
+            else:
+                with DocumentSession(document_path) as session:
+                    img = session.render_first_page()
+            if img is None:
+                return None
+
+            # Calculate aspect ratio and resize
+            aspect_ratio = img.height / img.width
+            target_height = int(target_width * aspect_ratio)
+            img = img.resize((target_width, target_height), Image.Resampling.LANCZOS)
+
+            # Save with appropriate quality settings
+            img.save(preview_path, "WEBP", quality=quality, method=6)
+
+            # Cache the result
+            if document_id not in self.preview_cache:
+                self.preview_cache[document_id] = {}
+            self.preview_cache[document_id][size] = preview_path
+
+            # The render was only kept for the first preview, the other size is
+            # rendered from the document if it is ever requested
+            if os.path.exists(source_path):
+                os.remove(source_path)
+            return preview_path
         except Exception as e:
             print(f"Preview generation error for {document_id} ({size}): {str(e)}")
             return None
@@ -133,6 +190,9 @@ class PreviewManager:
 
     async def generate_all_previews(self):
         """Generate previews for all documents at startup using process pool"""
+        removed = remove_stale_preview_sources()
+        if removed:
+            print(f"Removed {removed} stale first page renders")
         try:
             documents = get_all_documents()
             preview_tasks: List[Tuple[str, str]] = []
@@ -7,6 +7,8 @@ import pandas as pd
 
 from app.config import settings
 from app.TopicModeling import topic_modeling_v3
+from app.TopicModeling.online_lda import get_topic_model
+from app.TopicModeling.token_arrays import TokenArray
 from app.utils.ai_model import generate_name_for_topic
 from app.database.models import Document
 from app.database.documents import (
@@ -44,7 +46,71 @@ def _get_topic_by_name_id(topics: list[T], idx: int) -> T | None:
     return None
 
 
-def run_process_document(documents: list[Document]) -> None:
+def set_document_topics(
+    document_id: str, topic_weights: list[float], stored_topics: list
+) -> None:
+    """Link a document to the topics it has a weight over the threshold for, and
+    unlink it from the others."""
+    document_topics = get_document_topics_by_id(document_id)
+    for topic_idx, weight in enumerate(topic_weights):
+        existing_topic_matches = _get_topic_by_name_id(document_topics, topic_idx)
+
+        if weight < NB_TRESHOLD_LINK:
+            # Skip topics with low weight
+            if existing_topic_matches is not None:
+                # Remove existing link between document and topic if it exists
+                delete_document_topic_link(
+                    document_id=document_id,
+                    topic_id=existing_topic_matches.id,
+                )
+            continue
+
+        if existing_topic_matches is not None:
+            # Update existing link if it exists
+            update_weight_of_document_topic_link(
+                document_id=document_id,
+                topic_id=existing_topic_matches.id,
+                weight=float(weight),
+            )
+        else:
+            topic = _get_topic_by_name_id(stored_topics, topic_idx)
+            if not topic:
+                raise ValueError(f"Topic {topic_idx} not found.")
+            link_document_to_topic(
+                document_id=document_id,
+                topic_id=topic.id,
+                weight=float(weight),
+            )
+
+
+def infer_topics(tokens: list[TokenArray]):
+    """Topic distribution of each document by the saved topic model, without
+    updating it, and the topic of each column. None if there is no model yet or
+    its topics are not stored.
+    """
+    model = get_topic_model(settings.TOPIC_MODEL_PATH)
+    if model is None:
+        return None
+    stored_topics = get_all_topics()
+    topics = [_get_topic_by_name_id(stored_topics, i) for i in range(model.n_topics)]
+    if any(topic is None for topic in topics):
+        return None
+    return model.transform(tokens), topics
+
+
+def link_inferred_topics(document_id: str, tokens: TokenArray) -> None:
+    """Link a new document to its topics as inferred by the saved topic model.
+
+    The document stays unprocessed: the next processing run folds it into the model.
+    """
+    inferred = infer_topics([tokens])
+    if inferred is None:
+        return
+    topic_weights, topics = inferred
+    set_document_topics(document_id, topic_weights[0].tolist(), topics)
+
+
+def run_process_document(documents: list[Document], full_refit: bool = False) -> None:
     errors = []
 
     print("[DOCUMENT PROCESSING] Collecting documents...")
@@ -53,6 +119,7 @@ def run_process_document(documents: list[Document]) -> None:
         file_path_list = []
         file_name_list = []
         document_mined_texts = []
+        document_tokens = []
         time_list = []
         size_list = []
 
@@ -64,6 +131,12 @@ def run_process_document(documents: list[Document]) -> None:
                 file_path_list.append(document.path)
                 file_name_list.append(document.filename)
                 document_mined_texts.append(document.mined_text)
+                # Documents mined before token arrays existed only have mined_text
+                document_tokens.append(
+                    TokenArray.from_bytes(document.mined_tokens)
+                    if document.mined_tokens
+                    else TokenArray.from_text(document.mined_text or "")
+                )
                 time_list.append(
                     datetime.timestamp(datetime.fromisoformat(document.upload_date))
                 )
@@ -74,12 +147,13 @@ def run_process_document(documents: list[Document]) -> None:
                 "file_path": file_path_list,
                 "file_name": file_name_list,
                 "content": document_mined_texts,
+                "tokens": document_tokens,
                 "creation_time": time_list,
                 "file_size": size_list,
             }
         )
 
-        topics, doc_topics = topic_modeling_v3.run(doc_df)
+        topics, doc_topics = topic_modeling_v3.run(doc_df, full_refit)
 
         print(f"[DOCUMENT PROCESSING] Topic modeling completed. Topics: {len(topics)}")
         print("[DOCUMENT PROCESSING] Creating topics...")
@@ -131,39 +205,7 @@ def run_process_document(documents: list[Document]) -> None:
             try:
                 document = get_document_by_filename(doc_topic[0])
                 if document is not None:
-                    document_topics = get_document_topics_by_id(document.id)
-                    for topic_idx, weight in enumerate(doc_topic[1]):
-                        existing_topic_matches = _get_topic_by_name_id(
-                            document_topics, topic_idx
-                        )
-
-                        if weight < NB_TRESHOLD_LINK:
-                            # Skip topics with low weight
-                            if existing_topic_matches is not None:
-                                # Remove existing link between document and topic if it exists
-                                delete_document_topic_link(
-                                    document_id=document.id,
-                                    topic_id=existing_topic_matches.id,
-                                )
-                            continue
-
-                        if existing_topic_matches is not None:
-                            # Update existing link if it exists
-                            update_weight_of_document_topic_link(
-                                document_id=document.id,
-                                topic_id=existing_topic_matches.id,
-                                weight=float(weight),
-                            )
-                        else:
-                            topic = _get_topic_by_name_id(stored_topics, topic_idx)
-                            if not topic:
-                                raise ValueError(f"Topic {topic_idx} not found.")
-                            link_document_to_topic(
-                                document_id=document.id,
-                                topic_id=topic.id,
-                                weight=float(weight),
-                            )
-
+                    set_document_topics(document.id, doc_topic[1], stored_topics)
                     set_document_processed(
                         document_id=document.id,
                     )
@@ -3,6 +3,9 @@ from datetime import datetime
 from enum import Enum
 from typing import Any, Optional
 
+from app.config import settings
+from app.TopicModeling.lda_fitting import lda_progress
+from app.utils.extraction_pool import get_extraction_progress
 from app.utils.process_documents import run_process_document
 
 
@@ -51,7 +54,7 @@ class ProcessManager:
         except Exception:
             return False
 
-    def run_process(self, documents: list) -> None:
+    def run_process(self, documents: list, full_refit: bool = False) -> None:
         if self.is_running():
             raise RuntimeError("Process already running")
 
@@ -61,7 +64,9 @@ class ProcessManager:
             if self._executor is None:
                 self._executor = ProcessPoolExecutor(max_workers=1)
             self._status = ProcessStatus.RUNNING
-            self._future = self._executor.submit(run_process_document, documents)
+            self._future = self._executor.submit(
+                run_process_document, documents, full_refit
+            )
             self._future.add_done_callback(self._process_completed)
         except Exception as e:
             self.shutdown()
@@ -93,6 +98,22 @@ class ProcessManager:
         """Returns the current status of the process."""
         return self._status
 
+    @property
+    def progress(self) -> Optional[dict]:
+        """Returns the progress and ETA of the running extraction batch, if any."""
+        extraction_progress = get_extraction_progress()
+        if extraction_progress is None:
+            return None
+        return extraction_progress.as_dict()
+
+    @property
+    def lda_progress(self) -> Optional[dict]:
+        """Returns the iterations run and time per iteration of the running (or
+        last) LDA fit, logged by the processing run."""
+        if not settings.LDA_TELEMETRY_PATH:
+            return None
+        return lda_progress(settings.LDA_TELEMETRY_PATH)
+
     @property
     def last_run_time(self) -> Optional[datetime]:
         """Returns the timestamp of the last process execution."""
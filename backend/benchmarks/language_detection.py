@@ -0,0 +1,119 @@
+"""Benchmark of sampled language detection against full-text detection.
+
+Documents are either the .txt files of a directory or a synthetic corpus of
+English and French documents from a few KB to several MB, some of them starting
+with pages in the other language. Each document is detected on its full text, as
+the miner used to, and with the sampled windows vote, reporting the latency of
+both and how often they agree.
+
+Usage, from the backend directory:
+    python -m benchmarks.language_detection --documents 40 --max-size-mb 4
+    python -m benchmarks.language_detection --corpus /path/to/texts
+"""
+
+import argparse
+import pathlib
+import random
+import statistics
+import time
+
+import langdetect
+
+from app.TopicModeling.language_detection import LANGUAGES, init_detector, vote
+
+ENGLISH = (
+    "the committee approved the annual budget for the research project and asked "
+    "the university to publish a report on the results of the analysis of energy "
+    "policy health data collected by students and teachers during the meeting"
+).split()
+FRENCH = (
+    "le comité a approuvé le budget annuel du projet de recherche et a demandé à "
+    "l'université de publier un rapport sur les résultats de l'analyse des données "
+    "de santé recueillies par les étudiants et les enseignants pendant la réunion"
+).split()
+
+
+def make_document(rng: random.Random, size: int) -> tuple[str, str]:
+    language = rng.choice(["en", "fr"])
+    words, other = (ENGLISH, FRENCH) if language == "en" else (FRENCH, ENGLISH)
+    parts = []
+    if rng.random() < 0.3:
+        # Title pages in the other language
+        parts.append(" ".join(rng.choice(other) for _ in range(rng.randint(50, 400))))
+    length = sum(len(part) for part in parts)
+    while length < size:
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(8, 20)))
+        parts.append(sentence.capitalize() + ".")
+        length += len(parts[-1]) + 1
+    return " ".join(parts), language
+
+
+def full_text_language(text: str) -> str | None:
+    try:
+        probabilities = langdetect.detect_langs(text)
+    except langdetect.LangDetectException:
+        return None
+    return next((item.lang for item in probabilities if item.lang in LANGUAGES), None)
+
+
+def timed(function, text: str) -> tuple[str | None, float]:
+    start = time.perf_counter()
+    result = function(text)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="Directory of .txt files to use instead")
+    parser.add_argument("--documents", type=int, default=40)
+    parser.add_argument("--max-size-mb", type=float, default=4.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Seeds of the full text reference and of the sampled detection
+    langdetect.DetectorFactory.seed = args.seed
+    init_detector(args.seed)
+    if args.corpus:
+        documents = [
+            (path.read_text(encoding="utf-8", errors="replace"), None)
+            for path in sorted(pathlib.Path(args.corpus).rglob("*.txt"))
+        ]
+    else:
+        rng = random.Random(args.seed)
+        max_size = int(args.max_size_mb * 1024 * 1024)
+        documents = [
+            make_document(rng, int(max_size ** rng.random()))
+            for _ in range(args.documents)
+        ]
+
+    full_times, sampled_times = [], []
+    agree = correct_full = correct_sampled = labelled = 0
+    for text, expected in documents:
+        full, full_time = timed(full_text_language, text)
+        sampled, sampled_time = timed(vote, text)
+        full_times.append(full_time)
+        sampled_times.append(sampled_time)
+        agree += full == sampled
+        if expected is not None:
+            labelled += 1
+            correct_full += full == expected
+            correct_sampled += sampled == expected
+
+    total_mb = sum(len(text) for text, _ in documents) / 1024 / 1024
+    print(f"{len(documents)} documents, {total_mb:.1f} M characters")
+    for name, times in (("full text", full_times), ("sampled", sampled_times)):
+        print(
+            f"{name:>10}: total {sum(times):.2f}s, "
+            f"median {statistics.median(times) * 1000:.1f}ms, "
+            f"max {max(times) * 1000:.1f}ms"
+        )
+    print(f"Agreement: {agree}/{len(documents)}")
+    if labelled:
+        print(
+            f"Correct: full text {correct_full}/{labelled}, "
+            f"sampled {correct_sampled}/{labelled}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Wall time of the LDA stage with a fixed iteration count against early stopping.
+
+The corpus is sampled from an LDA generative model. The fixed run is the previous
+configuration (max_iter=500, perplexity evaluated every 50 iterations with
+sklearn's absolute tolerance), the early stopping run uses fit_lda with the
+default settings. Both report their wall time, iterations and final perplexity.
+
+Usage, from the backend directory:
+    python -m benchmarks.lda_convergence --documents 1000 --terms 2000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.decomposition import LatentDirichletAllocation
+
+from app.TopicModeling.lda_fitting import fit_lda
+
+DOC_TOPIC_PRIOR = 0.085
+TOPIC_WORD_PRIOR = 0.225
+
+
+def make_corpus(n_documents, n_terms, n_topics, length, seed=0) -> sp.csr_matrix:
+    rng = np.random.default_rng(seed)
+    topic_words = rng.dirichlet(np.full(n_terms, 0.05), n_topics)
+    document_topics = rng.dirichlet(np.full(n_topics, 0.3), n_documents)
+    counts = [
+        rng.multinomial(length, weights @ topic_words) for weights in document_topics
+    ]
+    return sp.csr_matrix(np.array(counts, dtype=np.float32))
+
+
+def new_lda(n_topics, max_iter, evaluate_every):
+    return LatentDirichletAllocation(
+        n_components=n_topics,
+        random_state=0,
+        doc_topic_prior=DOC_TOPIC_PRIOR,
+        topic_word_prior=TOPIC_WORD_PRIOR,
+        evaluate_every=evaluate_every,
+        max_iter=max_iter,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument("--terms", type=int, default=2000)
+    parser.add_argument("--topics", type=int, default=5)
+    parser.add_argument("--length", type=int, default=300)
+    parser.add_argument("--tol", type=float, default=1e-3)
+    parser.add_argument("--min-iter", type=int, default=20)
+    parser.add_argument("--evaluate-every", type=int, default=5)
+    args = parser.parse_args()
+
+    X = make_corpus(args.documents, args.terms, args.topics, args.length)
+    print(f"{args.documents} documents, {args.terms} terms, {args.topics} topics")
+
+    start = time.perf_counter()
+    fixed = new_lda(args.topics, 500, 50).fit(X)
+    fixed_seconds = time.perf_counter() - start
+    print(
+        f"      fixed: {fixed_seconds:.2f}s, {fixed.n_iter_} iterations, "
+        f"perplexity {fixed.bound_:.2f}"
+    )
+
+    start = time.perf_counter()
+    early = fit_lda(
+        new_lda(args.topics, 500, -1),
+        X,
+        tol=args.tol,
+        min_iter=args.min_iter,
+        evaluate_every=args.evaluate_every,
+    )
+    early_seconds = time.perf_counter() - start
+    print(
+        f"early stop: {early_seconds:.2f}s, {early.n_iter_} iterations, "
+        f"perplexity {early.bound_:.2f}"
+    )
+    print(
+        f"{fixed_seconds / early_seconds:.1f}x faster, perplexity "
+        f"{100 * (early.bound_ / fixed.bound_ - 1):+.2f}%"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Throughput of the single pass normalize against the regex cascade it replaced.
+
+The text is either a file or synthetic prose mixing words, numbers, punctuation,
+accented letters and URLs. Each normalizer runs a few times over the whole text;
+the best run is reported in MB/s of UTF-8 input, and both outputs are compared.
+
+Usage, from the backend directory:
+    python -m benchmarks.normalization --size-mb 20
+    python -m benchmarks.normalization --file /path/to/text.txt
+"""
+
+import argparse
+import random
+import time
+
+from app.TopicModeling.miner_v2 import iter_tokens, normalize, normalize_cascade
+
+WORDS = (
+    "the of and to in is that for it as was with be by on not this are or from at "
+    "document report archive meeting budget research student teacher university "
+    "données réunion étudiant université prévu à côté déjà"
+).split()
+EXTRAS = [
+    "2024",
+    "3.14",
+    "(see",
+    "p.12)",
+    "e.g.",
+    "https://example.com/docs?id=42",
+    "www.uclouvain.be",
+    "-",
+    "—",
+    "n°5",
+]
+
+
+def make_text(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        words = [
+            rng.choice(EXTRAS) if rng.random() < 0.08 else rng.choice(WORDS)
+            for _ in range(rng.randint(6, 18))
+        ]
+        sentence = " ".join(words).capitalize() + rng.choice([".", ",", ";", ".\n"])
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(parts)
+
+
+def best_time(function, text: str, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--file", help="Text file to normalize instead")
+    parser.add_argument("--size-mb", type=float, default=20.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8", errors="replace") as f:
+            text = f.read()
+    else:
+        text = make_text(int(args.size_mb * 1024 * 1024))
+    size_mb = len(text.encode("utf-8")) / 1024 / 1024
+
+    print(f"{size_mb:.1f} MB of text")
+    results = {
+        "cascade": best_time(normalize_cascade, text, args.repeat),
+        "normalize": best_time(normalize, text, args.repeat),
+        "iter_tokens": best_time(lambda t: list(iter_tokens(t)), text, args.repeat),
+    }
+    for name, seconds in results.items():
+        print(f"{name:>12}: {seconds:.2f}s, {size_mb / seconds:.1f} MB/s")
+    print(f"Identical output: {normalize(text) == normalize_cascade(text)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Benchmark of the OCR image preprocessing on a synthetic scanned corpus.
+
+Pages of random text are rendered with PyMuPDF, then degraded like real scans:
+grey paper, uneven lighting, noise, skew, a dark scanner border and JPEG
+compression. The pages per second and peak memory of preprocess_for_ocr alone are
+reported first. Each page is then OCR'd as is and after preprocess_for_ocr,
+reporting the pages per second (preprocessing included) and the share of the
+ground truth characters recovered.
+
+Usage, from the backend directory (Tesseract must be installed, unless --no-ocr):
+    python -m benchmarks.ocr_preprocessing --pages 20 --dpi 150
+"""
+
+import argparse
+import difflib
+import io
+import random
+import re
+import time
+import tracemalloc
+
+import fitz
+import numpy as np
+import pytesseract
+from PIL import Image
+
+from app.TopicModeling.image_preprocessing import preprocess_for_ocr
+
+WORDS = (
+    "the of and to in is that for it as was with be by on not he this are or his "
+    "from at which but have an they you were her she all their there been one "
+    "document report archive meeting budget research student teacher university "
+    "project analysis results method data system network energy policy health"
+).split()
+
+
+def make_scanned_page(seed: int, dpi: int) -> tuple[Image.Image, str]:
+    rng = random.Random(seed)
+    lines = [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 11)))
+        for _ in range(30)
+    ]
+    doc = fitz.open()
+    page = doc.new_page()
+    for i, line in enumerate(lines):
+        page.insert_text((60, 70 + i * 22), line, fontsize=10)
+    pix = page.get_pixmap(matrix=fitz.Matrix(dpi / 72, dpi / 72))
+    image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples).convert("L")
+    doc.close()
+
+    image = image.rotate(
+        rng.uniform(-3, 3), resample=Image.Resampling.BILINEAR, fillcolor=255
+    )
+    gray = np.asarray(image, dtype=np.float64)
+    np_rng = np.random.default_rng(seed)
+    paper = rng.uniform(170, 220)
+    lighting = np.linspace(0, rng.uniform(-30, 30), gray.shape[1])[None, :]
+    gray = gray / 255 * (paper - 30) + 30 + lighting
+    gray += np_rng.normal(0, 10, gray.shape)
+    border = int(gray.shape[1] * 0.04)
+    gray[:, :border] = 25
+    gray = np.clip(gray, 0, 255).astype(np.uint8)
+
+    buffer = io.BytesIO()
+    Image.fromarray(gray).save(buffer, "JPEG", quality=60)
+    return Image.open(io.BytesIO(buffer.getvalue())), "\n".join(lines)
+
+
+def recovered_characters(text: str, truth: str) -> int:
+    def clean(value: str) -> str:
+        return re.sub(r"\s+", " ", value).strip().lower()
+
+    matcher = difflib.SequenceMatcher(None, clean(text), clean(truth), autojunk=False)
+    return sum(block.size for block in matcher.get_matching_blocks())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--dpi", type=int, default=150)
+    parser.add_argument("--tesseract", default=None, help="Tesseract executable")
+    parser.add_argument(
+        "--no-ocr", action="store_true", help="Only measure the preprocessing"
+    )
+    args = parser.parse_args()
+    if args.tesseract:
+        pytesseract.pytesseract.tesseract_cmd = args.tesseract
+
+    corpus = [make_scanned_page(seed, args.dpi) for seed in range(args.pages)]
+    total_characters = sum(len(re.sub(r"\s+", " ", truth)) for _, truth in corpus)
+
+    peak = 0
+    start_time = time.perf_counter()
+    for image, _ in corpus:
+        tracemalloc.start()
+        preprocess_for_ocr(image)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    elapsed = time.perf_counter() - start_time
+    print(
+        f"{'preprocessing':>12}: {args.pages / elapsed:6.2f} pages/s, "
+        f"{peak / 2**20:.0f} MB peak per page"
+    )
+    if args.no_ocr:
+        return
+
+    for name, prepare in (
+        ("raw", lambda image: image),
+        ("preprocessed", preprocess_for_ocr),
+    ):
+        recovered = 0
+        start_time = time.perf_counter()
+        for image, truth in corpus:
+            recovered += recovered_characters(
+                pytesseract.image_to_string(prepare(image)), truth
+            )
+        elapsed = time.perf_counter() - start_time
+        print(
+            f"{name:>12}: {args.pages / elapsed:6.2f} pages/s, "
+            f"{recovered / total_characters:6.1%} characters recovered"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Peak memory of the document-term matrix built in one go against the streaming
+vocabulary builder and the on-disk cache, on a synthetic corpus with a Zipfian word
+distribution.
+
+All build the unigram + bigram matrix with min_df=0.05 and max_df=0.8, as the
+topic modeling stage does; peaks are measured with tracemalloc, the matrices
+compared. The cache is measured on a first run (every document counted) and on a
+run with 20 new documents.
+
+Usage, from the backend directory:
+    python -m benchmarks.vocabulary --documents 2000 --tokens 2000
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.TopicModeling.streaming_vocabulary import build_vocabulary, vectorize
+from app.TopicModeling.term_matrix_cache import DocumentTermCache
+from app.TopicModeling.token_arrays import TokenArray, document_term_matrix
+
+NGRAM_RANGE = (1, 2)
+MIN_DF = 0.05
+MAX_DF = 0.8
+
+
+def make_documents(n_documents: int, n_tokens: int, n_words: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    words = [f"word{i}" for i in range(n_words)]
+    documents = []
+    for _ in range(n_documents):
+        ids = (rng.zipf(1.2, n_tokens) - 1) % n_words
+        unique_ids, local_ids = np.unique(ids, return_inverse=True)
+        documents.append(
+            TokenArray([words[i] for i in unique_ids], local_ids.astype(np.uint32))
+        )
+    return documents
+
+
+def measure(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak / 1024 / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=50_000)
+    parser.add_argument("--max-memory-mb", type=int, default=64)
+    args = parser.parse_args()
+
+    documents = make_documents(args.documents, args.tokens, args.words)
+    print(f"{args.documents} documents of {args.tokens} tokens")
+
+    (expected, expected_terms), seconds, peak = measure(
+        lambda: document_term_matrix(documents, NGRAM_RANGE, MIN_DF, MAX_DF)
+    )
+    print(f"   one pass: {seconds:.2f}s, peak {peak:.0f} MB")
+
+    def streaming():
+        terms = build_vocabulary(
+            documents,
+            NGRAM_RANGE,
+            MIN_DF,
+            MAX_DF,
+            max_memory=args.max_memory_mb * 1024 * 1024,
+        )
+        return vectorize(documents, terms), terms
+
+    (matrix, terms), seconds, peak = measure(streaming)
+    print(f"  streaming: {seconds:.2f}s, peak {peak:.0f} MB")
+    print(
+        f"Identical matrix: {list(terms) == list(expected_terms)} "
+        f"and {(matrix != expected).nnz == 0}, {len(terms)} terms"
+    )
+
+    new_documents = make_documents(20, args.tokens, args.words, seed=1)
+    with tempfile.TemporaryDirectory() as cache_path:
+
+        def cached(documents):
+            keys = [f"doc{i}" for i in range(len(documents))]
+            cache = DocumentTermCache(cache_path, NGRAM_RANGE)
+            cache.update(dict(zip(keys, documents)), min_df=MIN_DF)
+            matrix, terms = cache.document_term_matrix(keys, MIN_DF, MAX_DF)
+            return matrix, terms, len(cache.terms)
+
+        (matrix, terms, n_stored), seconds, peak = measure(lambda: cached(documents))
+        print(
+            f"  cache, first run: {seconds:.2f}s, peak {peak:.0f} MB, "
+            f"{n_stored} n-grams stored"
+        )
+        print(
+            f"Identical matrix: {list(terms) == list(expected_terms)} "
+            f"and {(matrix != expected).nnz == 0}"
+        )
+        _, seconds, peak = measure(lambda: cached(documents + new_documents))
+        print(
+            f"  cache, {len(new_documents)} new documents: {seconds:.2f}s, "
+            f"peak {peak:.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()